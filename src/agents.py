@@ -3,10 +3,17 @@ from typing import Any, Optional, Type
 
 
 class Agent:
-    def __init__(self, name: str, instructions: str, output_type: Optional[Type[Any]] = None):
+    def __init__(self, name: str, instructions: str, output_type: Optional[Type[Any]] = None, **kwargs: Any):
         self.name = name
         self.instructions = instructions
         self.output_type = output_type
+        self.model = kwargs.get("model")
+        self.tools = kwargs.get("tools", [])
+
+    def clone(self, **kwargs: Any) -> "Agent":
+        fields = {"name": self.name, "instructions": self.instructions, "output_type": self.output_type,
+                  "model": self.model, "tools": self.tools}
+        return Agent(**{**fields, **kwargs})
 
 
 @dataclass
@@ -16,21 +23,9 @@ class _RunResult:
 
 class Runner:
     async def run(self, agent: Agent, prompt: str) -> _RunResult:
-        # Placeholder implementation so imports work. Produces an empty structured output
-        # if an output_type was provided; otherwise returns the raw prompt.
-        if agent.output_type is not None:
-            try:
-                empty_payload = agent.output_type(
-                    brand_name="",
-                    brand_values=[],
-                    audiences=[],
-                    goal="",
-                    constraints=None,
-                )
-                return _RunResult(final_output=empty_payload)
-            except Exception:
-                # Fallback to returning the prompt if initialization fails
-                return _RunResult(final_output=prompt)
-        return _RunResult(final_output=prompt)
-
+        # Placeholder implementation so imports work. Delegates to the deterministic fake
+        # backend (zero latency) so every output type comes back schema-valid.
+        from src.tools.fake_backend import FakeConfig, FakeRunner
 
+        result = await FakeRunner(FakeConfig(latency_median=0.0, latency_sigma=0.0)).run(agent, prompt)
+        return _RunResult(final_output=result.final_output)
@@ -1,20 +1,9 @@
-import os 
-from agents import Agent
-from dotenv import load_dotenv
-from src.schemas import InputPayload
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Access your API key
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-   raise ValueError("OPENAI_API_KEY not found in .env file")
-
-# Create an brand context extraction agent with structured output
-context_extractor = Agent(
-    name="Brand Context Extractor",
-    instructions="""
+from functools import lru_cache
+
+from src.context.schemas import InputPayload
+from src.tools.clients import client_bound, get_responses_model, getenv
+
+CONTEXT_INSTRUCTIONS = """
         You are a parser. Extract brand context from the following dossier and campaign goal.
 
         ALWAYS return a valid JSON object matching InputPayload.
@@ -27,7 +16,45 @@ context_extractor = Agent(
         - constraints → if budget/timeline appear, set them; else leave empty
 
         If you can’t find something, return empty strings/lists. Do not hallucinate.
-     """,
-     output_type=InputPayload,
-     model=os.getenv("OPENAI_MODEL_IDEATION", "gpt-4o-mini"),
-)
\ No newline at end of file
+     """
+
+
+@client_bound
+@lru_cache(maxsize=1)
+def get_context_extractor():
+    """Build the brand context extraction agent (structured output) on first use."""
+    from agents import Agent
+
+    return Agent(
+        name="Brand Context Extractor",
+        instructions=CONTEXT_INSTRUCTIONS,
+        output_type=InputPayload,
+        model=get_responses_model(getenv("OPENAI_MODEL_IDEATION", "gpt-4o-mini")),
+    )
+
+
+# Map step of map-reduce extraction (processor.extract_brief_mapreduce): one dossier section at a time
+CONTEXT_SECTION_INSTRUCTIONS = CONTEXT_INSTRUCTIONS + """
+        SECTION MODE:
+        - The input is ONE SECTION of a longer dossier (after its DOSSIER TITLE line), plus the CAMPAIGN GOAL.
+        - Extract only what this section states. Other sections are parsed separately and merged.
+        - brand_values → values this section mentions (may be fewer than 3, or empty)
+        - audiences → only audiences this section describes, using the dossier's own names for them
+        - brand_name → from the section or the DOSSIER TITLE
+     """
+
+
+@client_bound
+@lru_cache(maxsize=1)
+def get_section_extractor():
+    return get_context_extractor().clone(
+        name="Brand Context Section Extractor",
+        instructions=CONTEXT_SECTION_INSTRUCTIONS,
+    )
+
+
+def __getattr__(name):
+    # keep `from src.context.context_extractor import context_extractor` working, built lazily
+    if name == "context_extractor":
+        return get_context_extractor()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
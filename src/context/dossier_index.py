@@ -0,0 +1,192 @@
+# src/context/dossier_index.py
+import hashlib, json, os, re
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+from src.tools.tokens import estimate_tokens
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+INDEX_DIR = os.getenv("OMNI_INDEX_DIR", os.path.join(ROOT_DIR, ".cache", "dossier_index"))
+INDEX_VERSION = 1
+
+CHUNK_WORDS = 160
+CHUNK_OVERLAP = 30
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9'’\-]*")
+# Section breaks in our dossiers: markdown rules/headings, "**Discrete facts**"-style labels, blank lines
+_SECTION = re.compile(r"\n\s*\n|\s---\s|\s(?=#{1,4}\s)|\s(?=\*\*[A-Z][^*]{2,60}\*\*)")
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the their this to was were will with
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def chunk_dossier(text: str, max_words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """Split on section breaks, then pack/window sections into passages of ≤ max_words."""
+    chunks: List[str] = []
+    for section in _SECTION.split(text):
+        words = section.split()
+        if not words:
+            continue
+        step = max(1, max_words - overlap)
+        for start in range(0, len(words), step):
+            chunks.append(" ".join(words[start:start + max_words]))
+            if start + max_words >= len(words):
+                break
+
+    # merge tiny neighbours (headings, one-line labels) so they carry context
+    merged: List[str] = []
+    for chunk in chunks:
+        if merged and len(merged[-1].split()) + len(chunk.split()) <= max_words // 2:
+            merged[-1] = merged[-1] + " " + chunk
+        else:
+            merged.append(chunk)
+    return merged
+
+
+class DossierIndex:
+    """
+    BM25 over dossier passages, stored column-wise (postings sorted by term) so a
+    query is a handful of numpy slices + one bincount, with no network and no model.
+    """
+
+    def __init__(self, chunks: List[str], vocab: List[str], term_ptr: np.ndarray,
+                 post_doc: np.ndarray, post_tf: np.ndarray, doc_len: np.ndarray):
+        self.chunks = chunks
+        self.vocab = {t: i for i, t in enumerate(vocab)}
+        self._vocab_list = vocab
+        self.term_ptr = term_ptr
+        self.post_doc = post_doc
+        self.post_tf = post_tf
+        self.doc_len = doc_len
+        n = len(chunks)
+        df = np.diff(term_ptr).astype(np.float64)
+        self.idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        self.avgdl = float(doc_len.mean()) if n else 0.0
+        self.chunk_tokens = np.array([estimate_tokens(c) for c in chunks], dtype=np.int64)
+
+    @classmethod
+    def build(cls, text: str) -> "DossierIndex":
+        return cls.from_chunks(chunk_dossier(text))
+
+    @classmethod
+    def from_chunks(cls, chunks: List[str]) -> "DossierIndex":
+        vocab: dict = {}
+        docs, terms, tfs = [], [], []
+        doc_len = np.zeros(len(chunks), dtype=np.float64)
+        for d, chunk in enumerate(chunks):
+            toks = tokenize(chunk)
+            doc_len[d] = len(toks)
+            ids = np.fromiter((vocab.setdefault(t, len(vocab)) for t in toks), dtype=np.int64, count=len(toks))
+            uniq, counts = np.unique(ids, return_counts=True)
+            docs.append(np.full(len(uniq), d, dtype=np.int32))
+            terms.append(uniq)
+            tfs.append(counts.astype(np.float32))
+
+        if chunks:
+            docs_a, terms_a, tfs_a = np.concatenate(docs), np.concatenate(terms), np.concatenate(tfs)
+        else:
+            docs_a, terms_a, tfs_a = (np.zeros(0, np.int32), np.zeros(0, np.int64), np.zeros(0, np.float32))
+        order = np.argsort(terms_a, kind="stable")
+        term_ptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms_a, minlength=len(vocab)), out=term_ptr[1:])
+        vocab_list = [None] * len(vocab)
+        for t, i in vocab.items():
+            vocab_list[i] = t
+        return cls(chunks, vocab_list, term_ptr, docs_a[order], tfs_a[order], doc_len)
+
+    def scores(self, query: str) -> np.ndarray:
+        out = np.zeros(len(self.chunks), dtype=np.float64)
+        q_terms = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        if not q_terms:
+            return out
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len / (self.avgdl or 1.0))
+        for t in q_terms:
+            lo, hi = self.term_ptr[t], self.term_ptr[t + 1]
+            docs, tf = self.post_doc[lo:hi], self.post_tf[lo:hi]
+            out += np.bincount(docs, weights=self.idf[t] * tf * (BM25_K1 + 1) / (tf + norm[docs]),
+                               minlength=len(self.chunks))
+        return out
+
+    def top_passages(self, query: str, k: int = 8, token_budget: Optional[int] = None) -> List[str]:
+        """Best-matching passages (at most k, within token_budget), returned in dossier order."""
+        if not self.chunks:
+            return []
+        s = self.scores(query)
+        ranked = np.argsort(-s, kind="stable")
+        ranked = ranked[s[ranked] > 0][:k] if s.any() else ranked[:k]
+        if token_budget is not None:
+            fits = np.cumsum(self.chunk_tokens[ranked]) <= token_budget
+            ranked = ranked[fits] if fits.any() else ranked[:1]
+        return [self.chunks[i] for i in np.sort(ranked)]
+
+    def excerpt(self, query: str, token_budget: int, k: int = 32) -> str:
+        return "\n...\n".join(self.top_passages(query, k=k, token_budget=token_budget))
+
+    # --- on-disk cache, one file per dossier hash ---
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            version=np.array(INDEX_VERSION),
+            chunks=np.array(json.dumps(self.chunks, ensure_ascii=False)),
+            vocab=np.array(json.dumps(self._vocab_list, ensure_ascii=False)),
+            term_ptr=self.term_ptr, post_doc=self.post_doc, post_tf=self.post_tf, doc_len=self.doc_len,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DossierIndex":
+        with np.load(path, allow_pickle=False) as z:
+            if int(z["version"]) != INDEX_VERSION:
+                raise ValueError(f"stale dossier index at {path}")
+            return cls(json.loads(str(z["chunks"])), json.loads(str(z["vocab"])),
+                       z["term_ptr"], z["post_doc"], z["post_tf"], z["doc_len"])
+
+
+def dossier_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=8)
+def get_index(dossier_text: str) -> DossierIndex:
+    """Load the index for this dossier from .cache/dossier_index/, building it once if needed."""
+    path = os.path.join(INDEX_DIR, dossier_hash(dossier_text)[:32] + ".npz")
+    if os.path.exists(path):
+        try:
+            return DossierIndex.load(path)
+        except Exception:
+            pass
+    index = DossierIndex.build(dossier_text)
+    index.save(path)
+    return index
+
+
+def brief_query(brief: dict) -> str:
+    """Ideation query: goal, values and what we know about each audience."""
+    parts = [brief.get("brand_name", ""), brief.get("goal", ""), " ".join(brief.get("brand_values") or [])]
+    for aud in brief.get("audiences") or []:
+        parts.append(aud.get("name", ""))
+        for key in ("motivations", "preferred_channels", "purchase_drivers", "behaviors"):
+            parts.append(" ".join(aud.get(key) or []))
+    return " ".join(p for p in parts if p)
+
+
+def idea_query(idea: dict) -> str:
+    return " ".join(str(idea.get(k) or "") for k in ("category", "title", "concept", "execution_notes"))
+
+
+CONTEXT_QUERY = (
+    "brand identity values mission tagline positioning pillars audience customers consumers demographics "
+    "gender age geography international markets income price psychographics behaviors pain points complaints "
+    "motivations purchase drivers channels social instagram tiktok retail budget timeline launch season"
+)
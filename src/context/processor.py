@@ -1,22 +1,180 @@
 
+import argparse
 import asyncio
 import os
 import json
-from agents import Runner
-from dotenv import load_dotenv
-from src.context.context_extractor import context_extractor
-from src.context.schemas import InputPayload
+import re
+from collections import Counter
+from typing import List
+from src.context.context_extractor import get_context_extractor, get_section_extractor
+from src.context.dossier_index import CONTEXT_QUERY, get_index
+from src.context.schemas import Audiences, Constraints, InputPayload
+from src.tools.clients import aclose_clients, build_runner, runner_report
+from src.tools.tokens import estimate_tokens, prompt_segments, stage_scope
+
+DOSSIER_FILE  = "examples/skims.txt"
+CAMPAIGN_GOAL = "Awareness for Fall 2025 international push"
+CONTEXT_DOSSIER_TOKENS = int(os.getenv("CONTEXT_DOSSIER_TOKENS", "12000"))
+# map-reduce extraction: "off", "on", or "auto" (only when the dossier exceeds CONTEXT_DOSSIER_TOKENS)
+CONTEXT_MAPREDUCE = os.getenv("CONTEXT_MAPREDUCE", "off").lower()
+SECTION_TOKENS = int(os.getenv("CONTEXT_SECTION_TOKENS", "2500"))   # sections are packed up to this size
+MAX_BRAND_VALUES = 6
+
+# "---" rules and "## N Heading" markdown headings (our dossiers are often a single line)
+_SECTION_BREAK = re.compile(r"\n\s*-{3,}\s*\n|\s-{3,}\s|\s(?=#{1,3}\s)")
+
+def select_context(dossier_text: str, campaign_goal: str, token_budget: int = CONTEXT_DOSSIER_TOKENS) -> str:
+    """Whole dossier when it fits the budget; otherwise the passages most relevant to brief extraction."""
+    if token_budget <= 0 or estimate_tokens(dossier_text) <= token_budget:
+        return dossier_text
+    return get_index(dossier_text).excerpt(CONTEXT_QUERY + " " + campaign_goal, token_budget)
+
+def build_brand_context(dossier_text: str, campaign_goal: str) -> str:
+    """Dossier (or its relevant passages) followed by the CAMPAIGN GOAL section the extractor echoes into `goal`."""
+    return f"""{select_context(dossier_text, campaign_goal)}
 
-load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("OPENAI_API_KEY not found in .env file")
+CAMPAIGN GOAL: {campaign_goal}
+"""
+
+def dump_brief(brief: InputPayload) -> str:
+    """Serialize exactly as outputs/brand_brief.json is written (downstream prompts embed this text)."""
+    return json.dumps(brief.model_dump(), ensure_ascii=False, indent=2)
 
 # 1) Return the structured object directly
-async def process_context(brand_context: str) -> InputPayload:
-    runner = Runner()
-    run_result = await runner.run(context_extractor, brand_context)
-    return run_result.final_output 
+async def process_context(brand_context: str, runner=None) -> InputPayload:
+    runner = runner or build_runner()
+    with prompt_segments(dossier=brand_context):
+        run_result = await runner.run(get_context_extractor(), brand_context)
+    return run_result.final_output
+
+# --- map-reduce extraction for long dossiers ---
+
+def split_sections(dossier_text: str, max_tokens: int = SECTION_TOKENS) -> List[str]:
+    """
+    Split on "---" rules and headings, then pack neighbouring sections into parts of
+    ≤ max_tokens (a single oversized section is cut by words), in dossier order.
+    """
+    pieces = []
+    for section in _SECTION_BREAK.split(dossier_text):
+        section = section.strip()
+        if not section:
+            continue
+        if estimate_tokens(section) <= max_tokens:
+            pieces.append(section)
+            continue
+        words = section.split()
+        step = max(1, max_tokens * 3 // 4)  # ~0.75 words per token
+        pieces += [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+
+    parts: List[str] = []
+    size = 0
+    for piece in pieces:
+        n = estimate_tokens(piece)
+        if parts and size + n <= max_tokens:
+            parts[-1] += "\n\n" + piece
+            size += n
+        else:
+            parts.append(piece)
+            size = n
+    return parts
+
+def _norm(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+def _union(lists) -> List[str]:
+    out, seen = [], set()
+    for values in lists:
+        for v in values:
+            if v and _norm(v) not in seen:
+                seen.add(_norm(v))
+                out.append(v)
+    return out
+
+def merge_briefs(partials: List[InputPayload], campaign_goal: str) -> InputPayload:
+    """
+    Deterministic reduce over per-section briefs (in dossier order):
+    - brand_name: most common across sections, earliest on ties
+    - brand_values: union ranked by how many sections state them, then first appearance; top MAX_BRAND_VALUES
+    - audiences: deduped by normalized name; scalar fields take the first non-empty value, list fields are unioned
+    - goal: the campaign goal
+    - constraints: each field's distinct stated values, joined in order ("; ") when sections disagree
+    """
+    names = Counter(_norm(p.brand_name) for p in partials if p.brand_name.strip())
+    brand_name = ""
+    if names:
+        top = max(names.values())
+        brand_name = next(p.brand_name.strip() for p in partials if names.get(_norm(p.brand_name)) == top)
+
+    mentions, first, label = Counter(), {}, {}
+    for p in partials:
+        for key, value in {_norm(v): v.strip() for v in p.brand_values if v.strip()}.items():
+            mentions[key] += 1
+            first.setdefault(key, len(first))
+            label.setdefault(key, value)
+    ranked = sorted(mentions, key=lambda k: (-mentions[k], first[k]))[:MAX_BRAND_VALUES]
+
+    groups = {}
+    for p in partials:
+        for a in p.audiences:
+            groups.setdefault(_norm(a.name) or a.name, []).append(a)
+    audiences = []
+    for group in groups.values():
+        merged = {}
+        for name, info in Audiences.model_fields.items():
+            values = [getattr(a, name) for a in group]
+            if info.annotation == List[str]:
+                merged[name] = _union(values)
+            else:
+                merged[name] = next((v for v in values if v and v.strip()), values[0])
+        audiences.append(Audiences.model_validate(merged))
+
+    constraints = None
+    stated = [p.constraints for p in partials if p.constraints is not None]
+    if stated:
+        fields = {name: _union([[getattr(c, name)] for c in stated if getattr(c, name)]) for name in Constraints.model_fields}
+        if any(fields.values()):
+            constraints = Constraints(**{name: "; ".join(v) or None for name, v in fields.items()})
+
+    return InputPayload(
+        brand_name=brand_name,
+        brand_values=[label[k] for k in ranked],
+        audiences=audiences,
+        goal=campaign_goal,
+        constraints=constraints,
+    )
+
+async def extract_brief_mapreduce(dossier_text: str, campaign_goal: str, runner=None,
+                                  max_tokens: int = SECTION_TOKENS) -> InputPayload:
+    """Extract a partial brief from every section concurrently, then merge_briefs. Failed sections are skipped."""
+    runner = runner or build_runner()
+    title = dossier_text.strip().split("\n", 1)[0][:200]
+    sections = split_sections(dossier_text, max_tokens)
+    agent = get_section_extractor()
+
+    async def _map(section: str) -> InputPayload:
+        prompt = f"DOSSIER TITLE: {title}\n\n{section}\n\nCAMPAIGN GOAL: {campaign_goal}\n"
+        with prompt_segments(dossier=section):
+            return (await runner.run(agent, prompt)).final_output
+
+    results = await asyncio.gather(*(_map(s) for s in sections), return_exceptions=True)
+    partials = [r for r in results if not isinstance(r, BaseException)]
+    if not partials:
+        raise next(r for r in results if isinstance(r, BaseException))
+    if len(partials) < len(results):
+        print(f"brief map-reduce: {len(results) - len(partials)}/{len(results)} sections failed and were skipped")
+    return merge_briefs(partials, campaign_goal)
+
+def use_mapreduce(dossier_text: str, mode: str = CONTEXT_MAPREDUCE) -> bool:
+    if mode == "auto":
+        return estimate_tokens(dossier_text) > CONTEXT_DOSSIER_TOKENS
+    return mode in ("1", "on", "true", "yes")
+
+async def extract_brief(dossier_text: str, campaign_goal: str, runner=None,
+                        mapreduce: str = CONTEXT_MAPREDUCE) -> InputPayload:
+    """Brief from a raw dossier: one extraction call, or map-reduce over sections (see CONTEXT_MAPREDUCE)."""
+    if use_mapreduce(dossier_text, mapreduce):
+        return await extract_brief_mapreduce(dossier_text, campaign_goal, runner)
+    return await process_context(build_brand_context(dossier_text, campaign_goal), runner)
 
 async def structure_output(result: InputPayload) -> None:
     print(f"Brand Name: {result.brand_name}")
@@ -46,32 +204,36 @@ async def structure_output(result: InputPayload) -> None:
         print(f"- Budget: {result.constraints.budget}, "
         f"- Timeline: {result.constraints.timeline}")
 
-async def main():
+async def main(mapreduce: str = CONTEXT_MAPREDUCE):
     base_dir = os.path.dirname(os.path.dirname(__file__))
-    file_path = os.path.join(base_dir, "examples", "skims.txt")
+    root_dir = os.path.abspath(os.path.join(base_dir, ".."))
+    file_path = os.path.join(root_dir, DOSSIER_FILE)
 
     with open(file_path, "r", encoding="utf-8") as f:
         dossier_text = f.read()
 
-    campaign_goal = "Awareness for Fall 2025 international push"
-    brand_context = f"""{dossier_text}
-
-CAMPAIGN GOAL: {campaign_goal}
-"""
     # 3) Run once, then print
-    structured = await process_context(brand_context)
+    runner = build_runner()
+    with stage_scope("brief"):
+        structured = await extract_brief(dossier_text, CAMPAIGN_GOAL, runner, mapreduce)
     print("Structured output:")
     await structure_output(structured)
 
     # Save the structured brief for the next stage
-    out_dir = os.path.join(base_dir, "outputs")
+    out_dir = os.path.join(root_dir, "outputs")
     os.makedirs(out_dir, exist_ok=True)
     out_path = os.path.join(out_dir, "brand_brief.json")
 
     with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(structured.model_dump(), f, ensure_ascii=False, indent=2)
+        f.write(dump_brief(structured))
 
     print("Saved structured brief → outputs/brand_brief.json")
+    print(runner_report(runner))
+    await aclose_clients()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Extract the brand brief from the example dossier.")
+    parser.add_argument("--mapreduce", choices=["off", "on", "auto"], default=CONTEXT_MAPREDUCE,
+                        help="extract per section concurrently and merge (auto: only for over-budget dossiers)")
+    args = parser.parse_args()
+    asyncio.run(main(args.mapreduce))
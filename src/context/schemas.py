@@ -1,15 +1,5 @@
-import os 
 from pydantic import BaseModel
 from typing import List, Optional
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Access your API key
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-   raise ValueError("OPENAI_API_KEY not found in .env file")
 
 
 # Define the constraints for the brand context + campaign goal
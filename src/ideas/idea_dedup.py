@@ -0,0 +1,289 @@
+# src/ideas/idea_dedup.py
+"""
+Local near-duplicate detection for ideas, run between ideation and scoring so that
+each near-identical concept costs one scoring call instead of several. Also checks
+the ideator's portfolio rule: no primary platform or mechanic more than twice.
+
+    python -m src.ideas.idea_dedup outputs/ideas.json --threshold 0.6
+"""
+import argparse, json, os, re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.context.dossier_index import tokenize
+
+DEDUP_THRESHOLD = float(os.getenv("IDEA_DEDUP_THRESHOLD", "0.6"))  # TF-IDF cosine
+DEDUP_MODE = os.getenv("IDEA_DEDUP_MODE", "merge")                  # merge | skip | off
+MAX_FEATURES = int(os.getenv("IDEA_DEDUP_MAX_FEATURES", "8192"))
+BLOCK_ROWS = 512
+MAX_REPEATS = 2  # "Avoid repeating the same primary platform or mechanic more than twice"
+
+TEXT_FIELDS = ("title", "concept", "execution_notes")
+
+# canonical name → surface forms (lower-case, matched on word boundaries)
+PLATFORMS: Dict[str, Tuple[str, ...]] = {
+    "TikTok": ("tiktok",),
+    "Instagram": ("instagram", "ig", "reels", "ig reels"),
+    "YouTube": ("youtube", "youtube shorts", "yt shorts"),
+    "Pinterest": ("pinterest", "idea pins"),
+    "Snapchat": ("snapchat", "snap"),
+    "X": ("twitter", "x.com"),
+    "Facebook": ("facebook", "fb"),
+    "Twitch": ("twitch",),
+    "Discord": ("discord",),
+    "Reddit": ("reddit",),
+    "LinkedIn": ("linkedin",),
+    "Spotify": ("spotify",),
+    "Podcast": ("podcast", "podcasts"),
+    "Email": ("email", "newsletter", "crm"),
+    "SMS": ("sms", "text message"),
+    "On-site": ("on-site", "website", "site", "landing page", "pdp"),
+    "App": ("app", "in-app"),
+    "Retail": ("in-store", "retail", "store", "stores", "flagship"),
+}
+MECHANICS: Dict[str, Tuple[str, ...]] = {
+    "Challenge": ("challenge", "challenges", "hashtag challenge"),
+    "Template": ("template", "templates", "remix", "stitch", "duet"),
+    "Quiz/tool": ("quiz", "quizzes", "fit finder", "calculator", "tool", "configurator"),
+    "AR/filter": ("ar", "filter", "lens", "try-on", "virtual try-on"),
+    "Giveaway": ("giveaway", "giveaways", "sweepstakes", "contest"),
+    "Pop-up": ("pop-up", "pop-ups", "popup", "pop up"),
+    "Livestream": ("livestream", "live stream", "live shopping", "live"),
+    "Drop": ("drop", "drops", "limited edition", "capsule"),
+    "UGC": ("ugc", "user-generated"),
+    "Ambassador": ("ambassador", "ambassadors", "affiliate"),
+    "Creator series": ("creator series", "series", "docuseries", "episodes"),
+    "Collab": ("collab", "collabs", "collaboration", "co-branded", "partnership"),
+    "Workshop": ("workshop", "workshops", "masterclass", "class"),
+    "Sampling": ("sampling", "samples", "trial"),
+}
+
+
+def _alias_pattern(table: Dict[str, Tuple[str, ...]]) -> Tuple[re.Pattern, Dict[str, str]]:
+    lookup = {alias: name for name, aliases in table.items() for alias in aliases}
+    alternation = "|".join(re.escape(a) for a in sorted(lookup, key=len, reverse=True))
+    return re.compile(rf"(?<![a-z0-9])(?:{alternation})(?![a-z0-9])"), lookup
+
+
+_PLATFORM_RE, _PLATFORM_OF = _alias_pattern(PLATFORMS)
+_MECHANIC_RE, _MECHANIC_OF = _alias_pattern(MECHANICS)
+
+
+def idea_text(idea: dict) -> str:
+    return " ".join(str(idea.get(k) or "") for k in TEXT_FIELDS)
+
+
+def _features(text: str) -> List[str]:
+    words = tokenize(text)
+    return words + [a + " " + b for a, b in zip(words, words[1:])]
+
+
+@dataclass
+class SparseRows:
+    """CSR rows: row i has values data[indptr[i]:indptr[i+1]] in columns indices[indptr[i]:indptr[i+1]]."""
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    n_cols: int
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.indptr) - 1, self.n_cols
+
+    def dense(self, lo: int, hi: int, cols: np.ndarray) -> np.ndarray:
+        """Rows lo:hi as a dense float32 array over `cols` (sorted column ids); other columns are dropped."""
+        s, e = self.indptr[lo], self.indptr[hi]
+        rows = np.repeat(np.arange(hi - lo), np.diff(self.indptr[lo:hi + 1]))
+        idx = self.indices[s:e]
+        pos = np.minimum(np.searchsorted(cols, idx), max(0, len(cols) - 1))
+        ok = cols[pos] == idx if len(cols) else np.zeros(len(idx), dtype=bool)
+        out = np.zeros((hi - lo, len(cols)), dtype=np.float32)
+        out[rows[ok], pos[ok]] = self.data[s:e][ok]
+        return out
+
+
+def tfidf_matrix(texts: List[str], max_features: int = MAX_FEATURES) -> SparseRows:
+    """
+    L2-normalised TF-IDF rows (sublinear tf, unigrams + bigrams), stored sparse and only
+    for terms shared by ≥2 texts: a term in one text never contributes to a dot product,
+    so dropping those columns after normalising leaves every cosine unchanged. That
+    holds as long as max_features truncates nothing; past it only the most common
+    shared terms are kept, and cosines through the dropped ones come out lower.
+    """
+    n = len(texts)
+    vocab: Dict[str, int] = {}
+    docs, terms, tfs = [], [], []
+    for d, text in enumerate(texts):
+        ids = np.fromiter((vocab.setdefault(t, len(vocab)) for t in _features(text)), dtype=np.int64)
+        uniq, counts = np.unique(ids, return_counts=True)
+        docs.append(np.full(len(uniq), d, dtype=np.int64))
+        terms.append(uniq)
+        tfs.append(counts)
+    if not vocab:
+        return SparseRows(np.zeros(n + 1, dtype=np.int64), np.zeros(0, dtype=np.int64),
+                          np.zeros(0, dtype=np.float32), 0)
+    docs_a, terms_a, tf_a = np.concatenate(docs), np.concatenate(terms), np.concatenate(tfs)
+
+    df = np.bincount(terms_a, minlength=len(vocab))
+    idf = np.log((1 + n) / (1 + df)) + 1.0
+    w = (1.0 + np.log(tf_a)) * idf[terms_a]
+    norms = np.sqrt(np.bincount(docs_a, weights=w * w, minlength=n))
+    norms[norms == 0] = 1.0
+
+    shared = np.flatnonzero(df >= 2)
+    if len(shared) > max_features:
+        shared = np.sort(shared[np.argsort(-df[shared], kind="stable")[:max_features]])
+    col = np.full(len(vocab), -1, dtype=np.int64)
+    col[shared] = np.arange(len(shared))
+    keep = col[terms_a] >= 0
+
+    # entries are already grouped by row (docs_a is non-decreasing)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(docs_a[keep], minlength=n))
+    return SparseRows(indptr, col[terms_a[keep]], (w[keep] / norms[docs_a[keep]]).astype(np.float32), len(shared))
+
+
+def similar_pairs(X: SparseRows, threshold: float, block_rows: int = BLOCK_ROWS) -> np.ndarray:
+    """
+    (i, j, cosine) for i < j with cosine ≥ threshold, one block × block tile at a time;
+    each tile is densified over the terms its row block contains, so memory is bounded
+    by the block size rather than by n × vocabulary.
+    """
+    out = []
+    n = X.shape[0]
+    for start in range(0, n, block_rows):
+        stop = min(n, start + block_rows)
+        used = np.unique(X.indices[X.indptr[start]:X.indptr[stop]])  # only the terms this block contains can score
+        if not len(used):
+            continue
+        block = X.dense(start, stop, used)
+        for other in range(start, n, block_rows):  # upper triangle only: row blocks from `start` on
+            S = block @ X.dense(other, min(n, other + block_rows), used).T
+            rows, cols = np.nonzero(S >= threshold)
+            upper = cols + other > rows + start
+            if upper.any():
+                out.append(np.column_stack([rows[upper] + start, cols[upper] + other, S[rows[upper], cols[upper]]]))
+    return np.concatenate(out) if out else np.zeros((0, 3))
+
+
+def _clusters(n: int, pairs: np.ndarray) -> List[List[int]]:
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j, _ in pairs:
+        ri, rj = find(int(i)), find(int(j))
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)  # the earliest idea stays the representative
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i in range(n):
+        groups[find(i)].append(i)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def primary_mention(text: str, pattern: re.Pattern, lookup: Dict[str, str]) -> Optional[str]:
+    """First platform/mechanic named in the text (title first, so the headline wins)."""
+    m = pattern.search(text.lower())
+    return lookup[m.group(0)] if m else None
+
+
+def diversity_violations(ideas: List[dict], max_repeats: int = MAX_REPEATS) -> List[dict]:
+    out = []
+    for kind, pattern, lookup in (("platform", _PLATFORM_RE, _PLATFORM_OF),
+                                  ("mechanic", _MECHANIC_RE, _MECHANIC_OF)):
+        by_value: Dict[str, List[str]] = defaultdict(list)
+        for idea in ideas:
+            value = primary_mention(f"{idea.get('title', '')} {idea.get('concept', '')}", pattern, lookup)
+            if value is not None:
+                by_value[value].append(idea.get("title", ""))
+        for value, titles in sorted(by_value.items(), key=lambda kv: -len(kv[1])):
+            if len(titles) > max_repeats:
+                out.append({"kind": kind, "value": value, "count": len(titles), "titles": titles})
+    return out
+
+
+@dataclass
+class DedupReport:
+    threshold: float
+    mode: str
+    ideas_in: int
+    ideas_out: int
+    clusters: List[dict] = field(default_factory=list)     # {"kept": title, "dropped": [{title, similarity}]}
+    violations: List[dict] = field(default_factory=list)
+
+    @property
+    def calls_saved(self) -> int:
+        return self.ideas_in - self.ideas_out
+
+    def summary(self) -> str:
+        lines = [f"dedup ({self.mode}, cos ≥ {self.threshold:.2f}): {self.ideas_in} → {self.ideas_out} ideas, "
+                 f"{self.calls_saved} scoring calls saved"]
+        for c in self.clusters:
+            dropped = ", ".join(f"{d['title']!r} ({d['similarity']:.2f})" for d in c["dropped"])
+            lines.append(f"  keep {c['kept']!r}; drop {dropped}")
+        for v in self.violations:
+            lines.append(f"  diversity: {v['kind']} {v['value']} used {v['count']}× (max {MAX_REPEATS})")
+        return "\n".join(lines)
+
+    def to_json(self) -> dict:
+        return {**vars(self), "calls_saved": self.calls_saved}
+
+
+def dedup_ideas(ideas: List[dict], threshold: float = DEDUP_THRESHOLD,
+                mode: str = DEDUP_MODE) -> Tuple[List[dict], DedupReport]:
+    """
+    Collapse near-duplicate ideas, keeping the first of each cluster in input order.
+    merge: the kept idea also takes the others' sources; skip: the others are just dropped.
+    Diversity violations are reported on what survives.
+    """
+    if mode == "off" or len(ideas) < 2:
+        return list(ideas), DedupReport(threshold, mode, len(ideas), len(ideas),
+                                        violations=diversity_violations(ideas))
+    if mode not in ("merge", "skip"):
+        raise ValueError(f"IDEA_DEDUP_MODE must be merge, skip or off (got {mode!r})")
+
+    X = tfidf_matrix([idea_text(i) for i in ideas])
+    pairs = similar_pairs(X, threshold)
+    best: Dict[int, float] = {}
+    for i, j, s in pairs:
+        best[int(j)] = max(best.get(int(j), 0.0), float(s))
+
+    kept = list(ideas)
+    dropped_idx = set()
+    clusters = []
+    for group in _clusters(len(ideas), pairs):
+        rep, rest = group[0], group[1:]
+        dropped_idx.update(rest)
+        if mode == "merge":
+            sources = list(ideas[rep].get("sources") or [])
+            for i in rest:
+                sources += [s for s in ideas[i].get("sources") or [] if s not in sources]
+            kept[rep] = {**ideas[rep], "sources": sources}
+        clusters.append({
+            "kept": ideas[rep].get("title", ""),
+            "dropped": [{"title": ideas[i].get("title", ""), "similarity": round(best.get(i, threshold), 3)}
+                        for i in rest],
+        })
+
+    out = [idea for i, idea in enumerate(kept) if i not in dropped_idx]
+    return out, DedupReport(threshold, mode, len(ideas), len(out), clusters, diversity_violations(out))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report near-duplicate ideas and diversity-rule violations.")
+    parser.add_argument("ideas_file", nargs="?", default=os.path.join(
+        os.path.dirname(__file__), "..", "..", "outputs", "ideas.json"))
+    parser.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD)
+    args = parser.parse_args()
+    with open(args.ideas_file, "r", encoding="utf-8") as f:
+        bundle = json.load(f)
+    ideas = bundle["ideas"] if isinstance(bundle, dict) else bundle
+    _, report = dedup_ideas(ideas, args.threshold, mode="skip")
+    print(report.summary())
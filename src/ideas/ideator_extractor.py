@@ -1,33 +1,10 @@
-import os
-from dotenv import load_dotenv
-from openai import AsyncOpenAI
-from agents import Agent
-from agents.models.openai_responses import OpenAIResponsesModel
-from agents import WebSearchTool
-from src.ideas.ideator_schemas import IdeasOutput
-
-load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("OPENAI_API_KEY not found in .env")
-
-# OpenAI async client for the Agents SDK Responses model
-async_client = AsyncOpenAI(api_key=api_key)
-
-# Use the Responses API model that supports deep research + tools
-responses_model = OpenAIResponsesModel(
-    model=os.getenv("OPENAI_MODEL_IDEATION", "o3-deep-research"),
-    openai_client=async_client,
-)
-
-# The ideation agent will call web search / code tools as needed
-ideator_agent = Agent(
-    name="Ideator Agent",
-    model=responses_model,
-    tools=[
-        WebSearchTool(),
-    ],
-    instructions="""
+from functools import lru_cache
+
+from src.ideas.ideator_schemas import CategoryIdeas, IdeasOutput
+from src.tools.clients import client_bound, get_responses_model, getenv
+from src.tools.search_cache import search_tools
+
+IDEATOR_INSTRUCTIONS = """
     ROLE
     You are an omnichannel marketing ideation engine that generates specific, high-utility ideas grounded in brand context and a campaign goal.
 
@@ -112,6 +89,47 @@ ideator_agent = Agent(
 
     EMIT NOW
     - Produce the JSON object per the contract above with ≥18 ideas and ≥3 per category, enforcing all guardrails and validations.
-    """,
-    output_type=IdeasOutput,
-)
\ No newline at end of file
+    """
+
+
+@client_bound
+@lru_cache(maxsize=1)
+def get_ideator_agent():
+    """Build the ideation agent on first use; it calls web search as needed."""
+    from agents import Agent
+
+    return Agent(
+        name="Ideator Agent",
+        model=get_responses_model(getenv("OPENAI_MODEL_IDEATION", "o3-deep-research")),
+        tools=search_tools(),
+        instructions=IDEATOR_INSTRUCTIONS,
+        output_type=IdeasOutput,
+    )
+
+
+# One category at a time: the per-category fan-out (ideator_processor.generate_ideas_fanout) and
+# top-ups for a slate that came back short. Same rules, no repeats, so only those ideas are paid for
+IDEATOR_CATEGORY_INSTRUCTIONS = IDEATOR_INSTRUCTIONS + """
+    CATEGORY MODE (OVERRIDES OUTPUT CONTRACT)
+    - You will receive BRAND BRIEF (JSON), a CATEGORY, a COUNT, EXISTING IDEAS (titles, possibly none) from this
+      campaign and optionally a SELECTED DOSSIER EXCERPT.
+    - Generate exactly COUNT new ideas, all in CATEGORY, that do not repeat or closely resemble any existing idea.
+    - Return ONLY JSON: {"category": CATEGORY, "ideas": [ ...IdeaItem... ]}.
+    """
+
+
+@client_bound
+@lru_cache(maxsize=1)
+def get_category_agent():
+    return get_ideator_agent().clone(
+        name="Ideator Category Agent",
+        instructions=IDEATOR_CATEGORY_INSTRUCTIONS,
+        output_type=CategoryIdeas,
+    )
+
+
+def __getattr__(name):
+    # keep `from src.ideas.ideator_extractor import ideator_agent` working, built lazily
+    if name == "ideator_agent":
+        return get_ideator_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
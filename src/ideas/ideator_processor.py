@@ -1,15 +1,166 @@
-import asyncio, os, json
-from dotenv import load_dotenv
-from agents import Runner
-from src.ideas.ideator_extractor import ideator_agent
-
-load_dotenv()
+import argparse, asyncio, os, json
+from typing import Dict, List
+from src.context.dossier_index import brief_query, get_index
+from src.ideas.idea_dedup import diversity_violations
+from src.ideas.ideator_extractor import get_category_agent, get_ideator_agent
+from src.ideas.ideator_schemas import IdeaItem, IdeasOutput
+from src.tools.clients import aclose_clients, build_runner, runner_report
+from src.tools.deadline import is_incomplete
+from src.tools.repair import CATEGORIES, MIN_PER_CATEGORY, get_repair_stats, missing_categories
+from src.tools.tokens import prompt_segments, stage_scope
 
 INPUT_FILE  = "outputs/brand_brief.json"
 OUTPUT_FILE = "outputs/ideas.json"
 DOSSIER_FILE = "examples/skims.txt"  # optional: pass to ideator for extra context
+DOSSIER_EXCERPT_TOKENS = int(os.getenv("IDEATION_DOSSIER_TOKENS", "1000"))
+# fan-out: one category-scoped call per IdeaCategory instead of one monolithic ideation call
+DEFAULT_FANOUT = os.getenv("IDEATION_FANOUT", "off").lower() in ("1", "on", "true", "yes")
+FANOUT_RETRIES = int(os.getenv("IDEATION_FANOUT_RETRIES", "2"))   # extra attempts per failed category
+
+def dossier_excerpt(brief_json: str, dossier_text: str, token_budget: int = DOSSIER_EXCERPT_TOKENS) -> str:
+    """Dossier passages most relevant to this brief (local BM25 index), within token_budget."""
+    if not dossier_text:
+        return ""
+    return get_index(dossier_text).excerpt(brief_query(json.loads(brief_json)), token_budget)
+
+def build_ideation_prompt(brief_json: str, dossier_text: str = "") -> str:
+    """Brief JSON plus an optional dossier excerpt for richer hooks."""
+    excerpt = dossier_excerpt(brief_json, dossier_text)
+    return (
+        "BRAND BRIEF (JSON):\n" + brief_json +
+        ("\n\nSELECTED DOSSIER EXCERPT:\n" + excerpt if excerpt else "") +
+        "\n\nGenerate ideas per spec."
+    )
+
+def build_category_prompt(brief_json: str, category: str, count: int, existing: list, excerpt: str = "") -> str:
+    titles = "\n".join(f"- [{i.category}] {i.title}" for i in existing) or "- (none)"
+    return (
+        "BRAND BRIEF (JSON):\n" + brief_json +
+        (f"\n\nSELECTED DOSSIER EXCERPT:\n{excerpt}" if excerpt else "") +
+        f"\n\nCATEGORY: {category}\nCOUNT: {count}" +
+        "\n\nEXISTING IDEAS (do not repeat):\n" + titles +
+        "\n\nGenerate the missing ideas per spec."
+    )
+
+async def complete_categories(runner, brief_json: str, ideas: IdeasOutput) -> IdeasOutput:
+    """
+    Top up categories that came back short (≥3 per category, ≥18 total) with one small
+    call per short category instead of re-running the whole ideation; brand_name is
+    set from the brief and total_ideas recomputed.
+    """
+    brief = json.loads(brief_json)
+    items = list(ideas.ideas)
+    missing = missing_categories([i.model_dump() for i in items])
+    if missing:
+        stats = get_repair_stats()
+        stats.topups += len(missing)
+        agent = get_category_agent()
+        with prompt_segments(brief=brief_json):
+            results = await asyncio.gather(*(
+                runner.run(agent, build_category_prompt(brief_json, cat, n, items)) for cat, n in missing.items()
+            ))
+        for (cat, n), res in zip(missing.items(), results):
+            items += [IdeaItem.model_validate({**i.model_dump(), "category": cat}) for i in res.final_output.ideas[:n]]
+    return IdeasOutput.model_validate({
+        "campaign_intent": ideas.campaign_intent,
+        "brand_name": brief.get("brand_name") or ideas.brand_name,
+        "ideas": [i.model_dump() for i in items],
+        "total_ideas": len(items),
+    })
+
+async def ideate_category(runner, brief_json: str, category: str, excerpt: str = "",
+                          count: int = MIN_PER_CATEGORY, retries: int = FANOUT_RETRIES) -> List[IdeaItem]:
+    """
+    ≥count ideas for one category. A failed call (error or invalid output) or a short
+    answer is retried on its own, asking only for what is still missing; a call cut
+    off by a deadline is not retried.
+    """
+    agent = get_category_agent()
+    items: List[IdeaItem] = []
+    last_error = None
+    for _ in range(1 + retries):
+        prompt = build_category_prompt(brief_json, category, count - len(items), items, excerpt)
+        try:
+            with prompt_segments(brief=brief_json, dossier=excerpt):
+                result = await runner.run(agent, prompt)
+        except Exception as e:
+            last_error = e
+            if is_incomplete(e):
+                break  # out of time: retrying cannot help
+            continue
+        seen = {i.title.strip().lower() for i in items}
+        for item in result.final_output.ideas:
+            if item.title.strip().lower() not in seen:
+                items.append(item if item.category == category else item.model_copy(update={"category": category}))
+                seen.add(item.title.strip().lower())
+        if len(items) >= count:
+            return items
+    if items:
+        return items  # short; the portfolio check tops it up
+    raise RuntimeError(f"ideation failed for category {category} after {1 + retries} attempts: {last_error}")
 
-async def main():
+
+def merge_categories(brief: dict, per_category: Dict[str, List[IdeaItem]]) -> tuple:
+    """
+    One IdeasOutput (not yet validated) from per-category results, in category order,
+    with the portfolio checks: titles repeated across categories are dropped (kept in
+    the first category), and platform/mechanic over-use is reported.
+    Returns (IdeasOutput via model_construct, {"duplicates": [...], "diversity": [...]}).
+    """
+    ideas, seen, duplicates = [], set(), []
+    for cat in CATEGORIES:
+        for item in per_category.get(cat, []):
+            key = item.title.strip().lower()
+            if key in seen:
+                duplicates.append(item.title)
+                continue
+            seen.add(key)
+            ideas.append(item)
+    checks = {"duplicates": duplicates, "diversity": diversity_violations([i.model_dump() for i in ideas])}
+    merged = IdeasOutput.model_construct(
+        campaign_intent=brief.get("goal", ""), brand_name=brief.get("brand_name", ""),
+        ideas=ideas, total_ideas=len(ideas),
+    )
+    return merged, checks
+
+
+async def generate_ideas_fanout(runner, brief_json: str, dossier_text: str = "") -> IdeasOutput:
+    """
+    Per-category fan-out: six concurrent category-scoped calls, merged and checked as
+    one slate; anything still short after the merge is topped up per category.
+    """
+    brief = json.loads(brief_json)
+    excerpt = dossier_excerpt(brief_json, dossier_text)
+    results = await asyncio.gather(*(ideate_category(runner, brief_json, cat, excerpt) for cat in CATEGORIES),
+                                   return_exceptions=True)
+    per_category, failed = {}, []
+    for cat, res in zip(CATEGORIES, results):
+        if isinstance(res, BaseException):
+            failed.append(f"{cat}: {res}")
+        else:
+            per_category[cat] = res
+    if len(failed) == len(CATEGORIES):
+        raise RuntimeError("ideation fan-out failed for every category: " + "; ".join(failed))
+    merged, checks = merge_categories(brief, per_category)
+    overused = [f"{v['value']} ×{v['count']}" for v in checks["diversity"]]
+    if failed or checks["duplicates"] or overused:
+        print(f"fan-out: {len(per_category)}/{len(CATEGORIES)} categories ok"
+              + (f"; failed: {'; '.join(failed)}" if failed else "")
+              + (f"; {len(checks['duplicates'])} cross-category duplicates dropped" if checks["duplicates"] else "")
+              + (f"; over-used: {', '.join(overused)}" if overused else ""))
+    return await complete_categories(runner, brief_json, merged)
+
+
+async def generate_ideas(runner, brief_json: str, dossier_text: str = "", fanout: bool = DEFAULT_FANOUT) -> IdeasOutput:
+    """Run the ideator on a serialized brief and return the validated (and if needed completed) IdeasOutput."""
+    if fanout:
+        return await generate_ideas_fanout(runner, brief_json, dossier_text)
+    prompt = build_ideation_prompt(brief_json, dossier_text)
+    with prompt_segments(brief=brief_json, dossier=dossier_excerpt(brief_json, dossier_text)):
+        result = await runner.run(get_ideator_agent(), prompt)
+    return await complete_categories(runner, brief_json, result.final_output)
+
+async def main(fanout: bool = DEFAULT_FANOUT):
     base_dir = os.path.dirname(os.path.dirname(__file__))
     root_dir = os.path.abspath(os.path.join(base_dir, ".."))
 
@@ -27,22 +178,21 @@ async def main():
         with open(dossier_path, "r", encoding="utf-8") as f:
             dossier_text = f.read()
 
-    # build prompt
-    ideation_prompt = (
-        "BRAND BRIEF (JSON):\n" + brief_json +
-        ("\n\nSELECTED DOSSIER EXCERPT:\n" + dossier_text[:4000] if dossier_text else "") +
-        "\n\nGenerate ideas per spec."
-    )
-
-    runner = Runner()
-    result = await runner.run(ideator_agent, ideation_prompt)
-    ideas = result.final_output
+    runner = build_runner()
+    with stage_scope("ideas"):
+        ideas = await generate_ideas(runner, brief_json, dossier_text, fanout)
 
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
     with open(out_path, "w", encoding="utf-8") as f:
         json.dump(ideas.model_dump(), f, indent=2, ensure_ascii=False)
 
     print(f"Saved ideas → {OUTPUT_FILE}")
+    print(runner_report(runner))
+    await aclose_clients()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate ideas from outputs/brand_brief.json.")
+    parser.add_argument("--fanout", action="store_true", default=DEFAULT_FANOUT,
+                        help="one concurrent call per category instead of one monolithic call")
+    args = parser.parse_args()
+    asyncio.run(main(args.fanout))
\ No newline at end of file
@@ -14,4 +14,9 @@ class IdeasOutput(BaseModel):
     campaign_intent: str
     brand_name: str
     ideas: List[IdeaItem]
-    total_ideas: int = Field(ge=18)
\ No newline at end of file
+    total_ideas: int = Field(ge=18)
+
+# Targeted re-request: new ideas for one category only (see ideator_processor.complete_categories)
+class CategoryIdeas(BaseModel):
+    category: IdeaCategory
+    ideas: List[IdeaItem]
@@ -0,0 +1,303 @@
+# src/ideas/ideator_stream.py
+import argparse, asyncio, os, json, time
+from typing import AsyncIterator, List, Optional
+from contextlib import nullcontext
+from src.ideas.ideator_extractor import get_ideator_agent
+from src.ideas.ideator_processor import build_ideation_prompt, complete_categories, DOSSIER_FILE, INPUT_FILE, OUTPUT_FILE
+from src.ideas.ideator_schemas import IdeaItem, IdeasOutput
+from src.score.score_processor import DEFAULT_CONCURRENCY, score_idea
+from src.score.score_processor import OUTPUT_FILE as SCORED_FILE
+from src.tools.cache import CachedRunResult, CachedRunner, _model_name, cache_key
+from src.tools.clients import aclose_clients, base_runner, build_runner, find_layer, runner_report
+from src.tools.deadline import CUTOFFS, DeadlineExceeded, DeadlineRunner
+from src.tools.pool import PooledRunner
+from src.tools.ratelimit import RateLimitedRunner
+from src.tools.repair import RepairingRunner, missing_categories, repair_output
+from src.tools.tokens import AccountingRunner, current_stage, stage_scope, usage_from_result
+from src.tools.tracing import add_event, span
+
+
+class IdeaStreamParser:
+    """
+    Incremental scanner over the ideator's streamed JSON text. Each element of the
+    top-level "ideas" array is emitted as a validated IdeaItem the moment its
+    closing brace arrives; nothing waits for the rest of the document.
+    """
+
+    def __init__(self):
+        self.buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_key = None      # last string closed directly inside the top-level object
+        self._ideas_depth = None   # depth inside the "ideas" array, once it opens
+        self._obj_start = -1
+        self.invalid: List[str] = []
+
+    def feed(self, delta: str) -> List[IdeaItem]:
+        self.buf += delta
+        items = []
+        buf = self.buf
+        for i in range(self._pos, len(buf)):
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = buf[self._string_start + 1:i]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                if ch == "[" and self._depth == 1 and self._last_key == "ideas" and self._ideas_depth is None:
+                    self._ideas_depth = self._depth + 1
+                elif ch == "{" and self._ideas_depth is not None and self._depth == self._ideas_depth:
+                    self._obj_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if ch == "}" and self._ideas_depth is not None and self._depth == self._ideas_depth and self._obj_start >= 0:
+                    raw = buf[self._obj_start:i + 1]
+                    self._obj_start = -1
+                    try:
+                        items.append(IdeaItem.model_validate(json.loads(raw)))
+                    except Exception:
+                        self.invalid.append(raw)
+                elif ch == "]" and self._ideas_depth is not None and self._depth == self._ideas_depth - 1:
+                    self._ideas_depth = -1  # array closed; ignore any later arrays
+        self._pos = len(buf)
+        return items
+
+
+async def streamed_events(runner, agent, prompt: str, out: list) -> AsyncIterator:
+    """
+    Raw events of one streamed call, with the runner stack's run() bookkeeping done
+    here since streaming goes past it: a trace span, the deadline budget, the RPM/TPM
+    budget with its retries, a pool slot, the repair layer's lenient schema and one
+    ledger row. A failure is retried only before the first event; once events have
+    been handed out the call can't be replayed. The finished result is appended to `out`.
+    """
+    deadline = find_layer(runner, DeadlineRunner)
+    limited = find_layer(runner, RateLimitedRunner)
+    pooled = find_layer(runner, PooledRunner)
+    repairing = find_layer(runner, RepairingRunner)
+    accounting = find_layer(runner, AccountingRunner)
+    lenient = repairing._lenient(agent) if repairing is not None else agent
+
+    budget = cause = None
+    if deadline is not None:
+        budget, cause = deadline.budget(), deadline.cause()
+        deadline.stats.calls += 1
+        if budget is not None and budget <= 0:
+            deadline.stats.expired += 1
+            raise DeadlineExceeded(f"{agent.name}: run deadline passed before the call started", cause)
+    until = None if budget is None else time.monotonic() + budget
+    reserved = limited.estimate(agent, prompt) if limited is not None else 0
+
+    with span(agent.name, "agent", agent=agent.name, stage=current_stage(), model=_model_name(agent)) as s:
+        t = time.perf_counter()
+        attempt = 0
+        while True:
+            if limited is not None:
+                await limited.reserve(reserved)
+            started = False
+            try:
+                async with pooled.slot() if pooled is not None else nullcontext():
+                    streamed = base_runner(runner).run_streamed(lenient, prompt)
+                    events = streamed.stream_events().__aiter__()
+                    while True:
+                        try:
+                            timeout = None if until is None else until - time.monotonic()
+                            event = await asyncio.wait_for(events.__anext__(), timeout)
+                        except StopAsyncIteration:
+                            break
+                        except asyncio.TimeoutError:
+                            if until is None:
+                                raise
+                            if hasattr(streamed, "cancel"):
+                                streamed.cancel()
+                            deadline.stats.timeouts += 1
+                            add_event("deadline", seconds=round(budget, 3))
+                            raise DeadlineExceeded(f"{agent.name}: no result within {budget:.1f}s "
+                                                   f"({CUTOFFS[cause]})", cause) from None
+                        started = True
+                        yield event
+            except (DeadlineExceeded, asyncio.CancelledError):
+                if limited is not None:
+                    limited.limiter.refund(reserved)
+                raise
+            except Exception as e:
+                if limited is None:
+                    raise
+                if started:
+                    limited.limiter.refund(reserved)
+                    raise
+                await asyncio.sleep(limited.backoff(e, attempt, reserved))
+                attempt += 1
+                continue
+            break
+        if limited is not None:
+            limited.settle(reserved, streamed)
+        if accounting is not None:
+            accounting.record(agent, prompt, streamed, time.perf_counter() - t)
+        if s is not None:
+            s.attrs.update(usage_from_result(streamed), cache_hit=False)
+    out.append(streamed)
+
+
+async def stream_ideas(runner, agent, prompt: str, sink: Optional[list] = None) -> AsyncIterator[IdeaItem]:
+    """
+    Yield IdeaItems as the ideator streams them. The validated IdeasOutput is
+    appended to `sink` once the stream finishes. A CachedRunner hit replays the
+    cached ideas instantly; a miss streams through streamed_events and fills the cache.
+    """
+    accounting = find_layer(runner, AccountingRunner)
+    cached_layer = find_layer(runner, CachedRunner)
+    cache = cached_layer.cache if cached_layer is not None else None
+    key = cache_key(agent, prompt) if cache is not None else None
+    if cache is not None:
+        hit = cache.get(key, agent.output_type)
+        if hit is not None:
+            if accounting is not None:
+                accounting.record(agent, prompt, CachedRunResult(final_output=hit), 0.0)
+            for item in hit.ideas:
+                yield item
+            if sink is not None:
+                sink.append(hit)
+            return
+
+    parser = IdeaStreamParser()
+    streamed_titles = set()
+    done: list = []
+    async for event in streamed_events(runner, agent, prompt, done):
+        if event.type != "raw_response_event" or getattr(event.data, "type", "") != "response.output_text.delta":
+            continue
+        for item in parser.feed(event.data.delta):
+            streamed_titles.add(item.title)
+            yield item
+
+    final = done[0].final_output
+    if not isinstance(final, IdeasOutput):
+        final, _ = repair_output(IdeasOutput, parser.buf)
+    for item in final.ideas:  # ideas only valid after local repair (e.g. a normalized category)
+        if item.title not in streamed_titles:
+            yield item
+    if cache is not None:
+        cache.put(key, final, agent_name=agent.name)
+    if sink is not None:
+        sink.append(final)
+
+
+async def stream_and_score(runner, brief_obj: dict, prompt: str, concurrency: int = DEFAULT_CONCURRENCY) -> tuple:
+    """
+    Overlap ideation and scoring: ideas go through an asyncio.Queue to `concurrency`
+    scoring workers while the ideator is still generating.
+    Returns (IdeasOutput, scored ideas in ideation order, timings dict).
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    workers_n = max(1, concurrency)
+    scored = {}
+    final: list = []
+    started = time.perf_counter()
+    timings = {"first_idea": None, "first_scored": None, "ideation_done": None}
+
+    async def produce():
+        try:
+            idx = 0
+            with stage_scope("ideas"):
+                async for item in stream_ideas(runner, get_ideator_agent(), prompt, sink=final):
+                    if timings["first_idea"] is None:
+                        timings["first_idea"] = time.perf_counter() - started
+                    await queue.put((idx, item.model_dump()))
+                    idx += 1
+                ideas = final[0]
+                if missing_categories([i.model_dump() for i in ideas.ideas]):  # top up short categories, score them too
+                    final[0] = await complete_categories(runner, json.dumps(brief_obj), ideas)
+                    for item in final[0].ideas[len(ideas.ideas):]:
+                        await queue.put((idx, item.model_dump()))
+                        idx += 1
+        finally:
+            timings["ideation_done"] = time.perf_counter() - started
+            for _ in range(workers_n):
+                await queue.put(None)
+
+    async def consume():
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            idx, idea = job
+            try:
+                with stage_scope("scores"):
+                    scored[idx] = await score_idea(runner, brief_obj, idea)
+            except Exception as e:
+                scored[idx] = {**idea, "scores": None, "error": f"{type(e).__name__}: {e}"}
+            if timings["first_scored"] is None:
+                timings["first_scored"] = time.perf_counter() - started
+
+    results = await asyncio.gather(produce(), *(consume() for _ in range(workers_n)), return_exceptions=True)
+    timings["total"] = time.perf_counter() - started
+    for res in results:
+        if isinstance(res, BaseException):
+            raise res
+
+    return final[0], [scored[i] for i in sorted(scored)], timings
+
+
+async def main(concurrency: int = DEFAULT_CONCURRENCY):
+    base_dir = os.path.dirname(os.path.dirname(__file__))
+    root_dir = os.path.abspath(os.path.join(base_dir, ".."))
+
+    with open(os.path.join(root_dir, INPUT_FILE), "r", encoding="utf-8") as f:
+        brief_json = f.read()
+    brief_obj = json.loads(brief_json)
+
+    dossier_text = ""
+    dossier_path = os.path.join(root_dir, DOSSIER_FILE)
+    if os.path.exists(dossier_path):
+        with open(dossier_path, "r", encoding="utf-8") as f:
+            dossier_text = f.read()
+
+    runner = build_runner()
+    ideas, scored_ideas, timings = await stream_and_score(
+        runner, brief_obj, build_ideation_prompt(brief_json, dossier_text), concurrency
+    )
+
+    ideas_path = os.path.join(root_dir, OUTPUT_FILE)
+    os.makedirs(os.path.dirname(ideas_path), exist_ok=True)
+    with open(ideas_path, "w", encoding="utf-8") as f:
+        json.dump(ideas.model_dump(), f, indent=2, ensure_ascii=False)
+
+    out = {
+        "campaign_intent": ideas.campaign_intent,
+        "brand_name": ideas.brand_name,
+        "total_ideas": len(scored_ideas),
+        "ideas": scored_ideas,
+    }
+    with open(os.path.join(root_dir, SCORED_FILE), "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2, ensure_ascii=False)
+
+    def _fmt(t):
+        return "n/a" if t is None else f"{t:.1f}s"
+
+    print(f"Saved ideas → {OUTPUT_FILE}; scored ideas → {SCORED_FILE}")
+    print(f"first idea {_fmt(timings['first_idea'])}, first score {_fmt(timings['first_scored'])}, "
+          f"ideation done {_fmt(timings['ideation_done'])}, total {_fmt(timings['total'])}")
+    print(runner_report(runner))
+    await aclose_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream ideation straight into scoring.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="scoring workers consuming the idea queue")
+    args = parser.parse_args()
+    asyncio.run(main(concurrency=args.concurrency))
@@ -0,0 +1,198 @@
+# src/pipeline/batch.py
+"""
+Run brief → ideas → scores for many (dossier, goal) jobs in one process. All jobs
+share one bounded pool of model calls (and the response cache); each job writes to
+its own outputs/<job>/ directory and fails or times out on its own. --job-timeout is a
+deadline inside the job (src/tools/deadline.py): calls still running when it passes are
+cancelled and the job keeps whatever it scored, with status "incomplete".
+
+Manifest: a JSON list or JSONL file of {"dossier": path, "goal": str, "name": optional}.
+Relative dossier paths resolve against the manifest's directory.
+
+    python -m src.pipeline.batch manifests/nightly.jsonl --pool 16 --job-timeout 3600
+"""
+import argparse, asyncio, json, os, re, time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from src.pipeline.orchestrator import build_pipeline
+from src.score.score_processor import DEFAULT_CONCURRENCY
+from src.tools.clients import aclose_clients, build_runner, runner_report
+from src.tools.deadline import DeadlineExceeded, cutoff_note, deadline_scope
+from src.tools.pool import POOL_SIZE
+from src.tools.run_store import RunStore, get_run_store, store_enabled
+from src.tools.tokens import AccountingRunner
+from src.tools.tracing import span, start_tracing, stop_tracing
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+OUTPUT_ROOT = os.path.join(ROOT_DIR, "outputs")
+DEFAULT_MAX_JOBS = int(os.getenv("OMNI_BATCH_MAX_JOBS", "8"))
+DEADLINE_GRACE = float(os.getenv("OMNI_DEADLINE_GRACE", "30"))  # seconds past the deadline before a job is abandoned
+
+
+@dataclass
+class Job:
+    name: str
+    dossier: str
+    goal: str
+
+
+@dataclass
+class JobResult:
+    name: str
+    status: str                      # "ok" | "incomplete" | "failed" | "timeout"
+    seconds: float
+    out_dir: str
+    brand_name: Optional[str] = None
+    ideas: int = 0
+    failed_ideas: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    error: Optional[str] = None
+    stages: dict = field(default_factory=dict)
+
+
+def _slug(text: str, max_len: int = 40) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:max_len].rstrip("-") or "job"
+
+
+def load_manifest(path: str) -> List[Job]:
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        entries = json.loads(text)
+    except json.JSONDecodeError:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    jobs, names = [], set()
+    for i, entry in enumerate(entries):
+        if "dossier" not in entry or "goal" not in entry:
+            raise ValueError(f"manifest entry {i} needs 'dossier' and 'goal': {entry}")
+        dossier = entry["dossier"]
+        if not os.path.isabs(dossier):
+            dossier = os.path.join(base_dir, dossier)
+        name = _slug(entry.get("name") or
+                     f"{os.path.splitext(os.path.basename(dossier))[0]}-{_slug(entry['goal'], 30)}", 60)
+        unique, n = name, 2
+        while unique in names:
+            unique, n = f"{name}-{n}", n + 1
+        names.add(unique)
+        jobs.append(Job(unique, dossier, entry["goal"]))
+    return jobs
+
+
+async def run_job(job: Job, shared_runner, out_root: str, concurrency: int,
+                  timeout: Optional[float] = None, store: Optional[RunStore] = None) -> JobResult:
+    """One job on the shared runner; its own ledger, out dir and store run, and never raises."""
+    out_dir = os.path.join(out_root, job.name)
+    runner = AccountingRunner(shared_runner)
+    t = time.perf_counter()
+    result = JobResult(job.name, "ok", 0.0, out_dir)
+    run_id = store.start_run(job.goal, "batch", out_dir) if store is not None else None
+    pipeline = None
+    try:
+        with span(job.name, "run", goal=job.goal, run_id=run_id):
+            with open(job.dossier, "r", encoding="utf-8") as f:
+                dossier_text = f.read()
+            pipeline = build_pipeline(runner, dossier_text, job.goal, concurrency, out_dir, store=store, run_id=run_id)
+            with deadline_scope(timeout):
+                # the deadline stops model calls; the outer timeout only catches work that ignores it
+                outputs = await asyncio.wait_for(pipeline.run(), timeout and timeout + DEADLINE_GRACE)
+        scored = outputs["scores"]["ideas"]
+        result.brand_name = outputs["brief"].brand_name
+        result.ideas = len(scored)
+        result.failed_ideas = sum(1 for idea in scored if idea.get("error"))
+        cut_off = cutoff_note(scored)
+        if cut_off:
+            result.status, result.error = "incomplete", cut_off
+    except DeadlineExceeded as e:
+        result.status, result.error = "incomplete", f"{type(e).__name__}: {e}"
+        if pipeline.results.get("brief") is not None:
+            result.brand_name = pipeline.results["brief"].brand_name
+    except asyncio.TimeoutError as e:
+        result.status, result.error = "timeout", f"exceeded {timeout:.0f}s" if timeout else f"{type(e).__name__}: {e}"
+    except Exception as e:
+        result.status, result.error = "failed", f"{type(e).__name__}: {e}"
+    result.seconds = time.perf_counter() - t
+    if store is not None:
+        store.finish_run(run_id, result.status, result.error)
+
+    if pipeline is not None:
+        result.stages = {s.name: round(s.seconds, 3) for s in pipeline.timings}
+    result.input_tokens = sum(r.input_tokens for r in runner.ledger.records)
+    result.output_tokens = sum(r.output_tokens for r in runner.ledger.records)
+    if runner.ledger.records:
+        os.makedirs(out_dir, exist_ok=True)
+        runner.ledger.write_json(os.path.join(out_dir, "token_report.json"))
+    return result
+
+
+async def run_batch(jobs: List[Job], shared_runner, out_root: str = OUTPUT_ROOT,
+                    max_jobs: int = DEFAULT_MAX_JOBS, concurrency: int = DEFAULT_CONCURRENCY,
+                    timeout: Optional[float] = None, on_done=None,
+                    store: Optional[RunStore] = None) -> List[JobResult]:
+    """All jobs as independent tasks (max_jobs at a time); results in manifest order."""
+    gate = asyncio.Semaphore(max_jobs)
+
+    async def _bounded(job: Job) -> JobResult:
+        async with gate:
+            res = await run_job(job, shared_runner, out_root, concurrency, timeout, store)
+        if on_done is not None:
+            on_done(res)
+        return res
+
+    return list(await asyncio.gather(*(_bounded(job) for job in jobs)))
+
+
+def format_summary(results: List[JobResult]) -> str:
+    lines = [f"{'job':<40} {'status':<8} {'secs':>8} {'ideas':>5} {'fail':>4} {'input':>9} {'output':>8}"]
+    for r in results:
+        lines.append(f"{r.name[:40]:<40} {r.status:<8} {r.seconds:>8.1f} {r.ideas:>5} {r.failed_ideas:>4} "
+                     f"{r.input_tokens:>9,} {r.output_tokens:>8,}")
+    ok = sum(1 for r in results if r.status == "ok")
+    lines.append(f"{ok}/{len(results)} jobs ok")
+    return "\n".join(lines)
+
+
+async def main(manifest: str, out_root: str, pool_size: int, max_jobs: int, concurrency: int,
+               timeout: Optional[float], trace: Optional[str] = None):
+    jobs = load_manifest(manifest)
+    start_tracing(trace)
+    shared = build_runner(accounting=False, pool_size=pool_size)
+    t = time.perf_counter()
+
+    def _done(res: JobResult) -> None:
+        note = f" ({res.error})" if res.error else ""
+        print(f"[{time.perf_counter() - t:7.1f}s] {res.name}: {res.status}{note}")
+
+    with span("batch", "run", jobs=len(jobs)):
+        results = await run_batch(jobs, shared, out_root, max_jobs, concurrency, timeout, on_done=_done,
+                                  store=get_run_store() if store_enabled() else None)
+
+    os.makedirs(out_root, exist_ok=True)
+    with open(os.path.join(out_root, "batch_summary.json"), "w", encoding="utf-8") as f:
+        json.dump({"manifest": os.path.abspath(manifest), "seconds": time.perf_counter() - t,
+                   "jobs": [vars(r) for r in results]}, f, indent=2)
+    print(format_summary(results))
+    print(runner_report(shared))
+    trace_path = stop_tracing()
+    if trace_path:
+        print(f"Trace → {trace_path}")
+    await aclose_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the pipeline for every (dossier, goal) in a manifest.")
+    parser.add_argument("manifest", help="JSON list or JSONL of {dossier, goal, name?}")
+    parser.add_argument("--out", default=OUTPUT_ROOT, help="root for per-job output dirs (default: outputs/)")
+    parser.add_argument("--pool", type=int, default=POOL_SIZE, help="model calls in flight across all jobs")
+    parser.add_argument("--max-jobs", type=int, default=DEFAULT_MAX_JOBS, help="jobs running at once")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="scoring calls per job")
+    parser.add_argument("--job-timeout", type=float, default=None,
+                        help="deadline per job in seconds; unfinished work is cancelled and marked incomplete")
+    parser.add_argument("--trace", nargs="?", const="on", default=None, metavar="FILE",
+                        help="write a span trace (default file: outputs/traces/<timestamp>.jsonl; or OMNI_TRACE)")
+    args = parser.parse_args()
+    asyncio.run(main(args.manifest, args.out, args.pool, args.max_jobs, args.concurrency, args.job_timeout,
+                     args.trace))
@@ -0,0 +1,246 @@
+# src/pipeline/incremental.py
+"""
+Incremental re-run after a brief edit. The artifacts in an output directory
+(ideas.json, scored_ideas.json) were built from the brief snapshot kept in
+lineage.json; this diffs brand_brief.json (as edited) against that snapshot and
+redoes only what the changed fields can affect, per FIELD_DEPS:
+
+    constraints change  → ideas kept; each re-scored on feasibility alone (a feasibility-only
+                          prompt and schema), other dimensions and the rationale kept
+    audiences change    → ideas regenerated; audience/resonance/virality re-scored on
+                          ideas that come back unchanged
+    ...
+
+An idea that survives unchanged keeps the dimensions no changed field feeds (so
+rankings don't churn on sampling noise); anything new is scored in full. Ideas
+follow the ideator's own rule that constraints shape feasibility, not the slate:
+ideas that break a new constraint are caught by the scorer's feasibility cap.
+
+Only a constraints-only edit is actually cheap. The ideator has no per-audience or
+per-value mode, so an edit to brand_name, goal, brand_values or audiences regenerates
+the whole slate at full cost. The regenerated prompt differs, so few ideas come back
+identical, and most of the slate is then scored in full too; outside feasibility,
+re-scoring a kept idea is a full score call with only the affected dimensions taken.
+
+    python -m src.pipeline.orchestrator --persist        # writes lineage.json alongside the artifacts
+    # edit outputs/brand_brief.json
+    python -m src.pipeline.incremental --dry-run         # show the plan
+    python -m src.pipeline.incremental
+"""
+import argparse, asyncio, json, os, time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from src.context.processor import DOSSIER_FILE, dump_brief
+from src.context.schemas import InputPayload
+from src.ideas.idea_dedup import dedup_ideas
+from src.ideas.ideator_processor import DEFAULT_FANOUT, generate_ideas
+from src.score.score_extractor import get_feasibility_agent
+from src.score.score_processor import DEFAULT_CONCURRENCY, idea_id, score_ideas
+from src.score.score_ranking import DIMENSIONS
+from src.tools.clients import aclose_clients, build_runner, runner_report
+from src.tools.tokens import stage_scope
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+LINEAGE_FILE = "lineage.json"
+
+# brief field → what it feeds: whether the idea slate depends on it, and which score dimensions
+FIELD_DEPS: Dict[str, Dict[str, object]] = {
+    "brand_name":   {"ideas": True,  "scores": DIMENSIONS},
+    "goal":         {"ideas": True,  "scores": DIMENSIONS},
+    "brand_values": {"ideas": True,  "scores": ("brand_fit", "resonance")},
+    "audiences":    {"ideas": True,  "scores": ("audience", "resonance", "virality")},
+    "constraints":  {"ideas": False, "scores": ("feasibility",)},   # the scorer's feasibility cap
+}
+
+
+def write_lineage(out_dir: str, brief: dict, reused: Optional[dict] = None) -> None:
+    """Record the brief the artifacts in out_dir were built from (and what the last update reused)."""
+    record = {"brief": brief, "updated_at": time.time()}
+    if reused is not None:
+        record["last_update"] = reused
+    with open(os.path.join(out_dir, LINEAGE_FILE), "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2, ensure_ascii=False)
+
+
+def diff_brief(old: dict, new: dict) -> Dict[str, List[str]]:
+    """
+    {top-level field: [what changed]} for every field that differs. Audiences are
+    matched by name (added / removed / edited), constraints by sub-field.
+    """
+    changes: Dict[str, List[str]] = {}
+    for name in InputPayload.model_fields:
+        a, b = old.get(name), new.get(name)
+        if a == b:
+            continue
+        if name == "audiences":
+            before = {x.get("name"): x for x in a or []}
+            after = {x.get("name"): x for x in b or []}
+            changes[name] = ([f"+{n}" for n in after if n not in before] + [f"-{n}" for n in before if n not in after]
+                             + [f"~{n}" for n in after if n in before and after[n] != before[n]]) or ["reordered"]
+        elif name == "constraints" and isinstance(a, dict) and isinstance(b, dict):
+            changes[name] = [f"{k}: {a.get(k)!r} → {b.get(k)!r}" for k in sorted(set(a) | set(b)) if a.get(k) != b.get(k)]
+        elif name == "brand_values":
+            changes[name] = [f"+{v}" for v in b or [] if v not in (a or [])] + \
+                            [f"-{v}" for v in a or [] if v not in (b or [])] or ["reordered"]
+        else:
+            changes[name] = [f"{a!r} → {b!r}"]
+    return changes
+
+
+@dataclass
+class UpdatePlan:
+    changes: Dict[str, List[str]]
+    regenerate_ideas: bool
+    dimensions: Tuple[str, ...]          # score dimensions to refresh on ideas that are kept
+
+    @classmethod
+    def from_changes(cls, changes: Dict[str, List[str]]) -> "UpdatePlan":
+        deps = [FIELD_DEPS[f] for f in changes]
+        dims = {d for dep in deps for d in dep["scores"]}
+        return cls(changes, any(dep["ideas"] for dep in deps), tuple(d for d in DIMENSIONS if d in dims))
+
+    @property
+    def feasibility_only(self) -> bool:
+        """Kept ideas need just feasibility, so they go to the feasibility-only agent."""
+        return self.dimensions == ("feasibility",)
+
+    def describe(self) -> str:
+        if not self.changes:
+            return "brief unchanged: every artifact is reused"
+        lines = [f"  {f}: {', '.join(c)}" for f, c in self.changes.items()]
+        lines.append(f"  → ideas {'regenerated' if self.regenerate_ideas else 'reused'}; "
+                     f"re-score {', '.join(self.dimensions) or 'nothing'} on ideas that are kept"
+                     f"{' (feasibility-only calls)' if self.feasibility_only else ''}")
+        return "changed fields:\n" + "\n".join(lines)
+
+
+@dataclass
+class UpdateReport:
+    ideas: str = "reused"                                  # "reused" | "regenerated"
+    scores_reused: int = 0                                 # kept as-is
+    scores_partial: int = 0                                # re-scored, only the affected dimensions taken
+    scores_new: int = 0                                    # ideas with no earlier score
+    failed: int = 0
+    reused_artifacts: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return (f"incremental: ideas {self.ideas}; scores {self.scores_reused} reused, {self.scores_partial} "
+                f"partially re-scored, {self.scores_new} new, {self.failed} failed; "
+                f"reused artifacts: {', '.join(self.reused_artifacts) or 'none'}")
+
+
+def merge_scores(old: dict, new: dict, dimensions: Tuple[str, ...]) -> dict:
+    """
+    Earlier scores with `dimensions` taken from the fresh ones. The rationale is also
+    taken, if the fresh call wrote one; a feasibility-only score has none, so the
+    earlier rationale stays with the dimensions it explains.
+    """
+    return {**old, **{d: new[d] for d in dimensions}, "rationale": new.get("rationale", old.get("rationale"))}
+
+
+async def update(runner, out_dir: str, dossier_text: str = "", concurrency: int = DEFAULT_CONCURRENCY,
+                 fanout: bool = DEFAULT_FANOUT, dry_run: bool = False) -> Tuple[UpdatePlan, UpdateReport]:
+    """Bring ideas.json / scored_ideas.json in out_dir up to date with its (edited) brand_brief.json."""
+    def _load(name: str) -> Optional[dict]:
+        path = os.path.join(out_dir, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    brief_model = InputPayload.model_validate(_load("brand_brief.json"))
+    brief = brief_model.model_dump()
+    lineage, ideas_bundle, scored_bundle = _load(LINEAGE_FILE), _load("ideas.json"), _load("scored_ideas.json")
+    if lineage is None or ideas_bundle is None:
+        # nothing to diff against: treat every field as changed
+        plan = UpdatePlan.from_changes({f: ["no lineage"] for f in FIELD_DEPS})
+    else:
+        plan = UpdatePlan.from_changes(diff_brief(lineage["brief"], brief))
+    report = UpdateReport()
+    if dry_run:
+        return plan, report
+
+    def _persist(name: str, obj: dict) -> None:
+        with open(os.path.join(out_dir, name), "w", encoding="utf-8") as f:
+            json.dump(obj, f, indent=2, ensure_ascii=False)
+
+    if plan.regenerate_ideas:
+        with stage_scope("ideas"):
+            ideas = await generate_ideas(runner, dump_brief(brief_model), dossier_text, fanout)
+        ideas_bundle = ideas.model_dump()
+        _persist("ideas.json", ideas_bundle)
+        report.ideas = "regenerated"
+    else:
+        report.reused_artifacts.append("ideas.json")
+
+    unique, dedup = dedup_ideas(ideas_bundle["ideas"])
+    previous = {idea_id(i): i["scores"] for i in (scored_bundle or {}).get("ideas", []) if i.get("scores")}
+    new = [i for i in unique if idea_id(i) not in previous]
+    kept = [i for i in unique if idea_id(i) in previous] if plan.dimensions else []
+    full, partial = (new, kept) if plan.feasibility_only else (new + kept, [])
+    with stage_scope("scores"):
+        fresh = await score_ideas(runner, brief, full, concurrency, dossier_text=dossier_text) if full else []
+        if partial:
+            fresh += await score_ideas(runner, brief, partial, concurrency, dossier_text=dossier_text,
+                                       agent=get_feasibility_agent())
+    fresh_by_id = {idea_id(i): i for i in fresh}
+
+    scored = []
+    for idea in unique:
+        key = idea_id(idea)
+        res = fresh_by_id.get(key)
+        if res is None:
+            report.scores_reused += 1
+            scored.append({**idea, "scores": previous[key]})
+        elif res.get("scores") is None:
+            report.failed += 1  # unscored, so the next update scores it in full
+            scored.append(res)
+        elif key in previous:
+            report.scores_partial += 1
+            scored.append({**idea, "scores": merge_scores(previous[key], res["scores"], plan.dimensions)})
+        else:
+            report.scores_new += 1
+            scored.append(res)
+    if report.scores_reused:
+        report.reused_artifacts.append(f"scores of {report.scores_reused}/{len(unique)} ideas")
+    if report.scores_partial:
+        report.reused_artifacts.append(f"{len(DIMENSIONS) - len(plan.dimensions)}/{len(DIMENSIONS)} score dimensions "
+                                       f"of {report.scores_partial} ideas")
+
+    _persist("dedup_report.json", dedup.to_json())
+    _persist("scored_ideas.json", {
+        "campaign_intent": ideas_bundle.get("campaign_intent"),
+        "brand_name": ideas_bundle.get("brand_name"),
+        "total_ideas": len(scored),
+        "complete": not any(i.get("incomplete") for i in scored),
+        "ideas": scored,
+    })
+    write_lineage(out_dir, brief, {"changes": plan.changes, **vars(report)})
+    return plan, report
+
+
+async def main(out_dir: str, dossier_path: str, concurrency: int, fanout: bool, dry_run: bool):
+    dossier_text = ""
+    if os.path.exists(dossier_path):
+        with open(dossier_path, "r", encoding="utf-8") as f:
+            dossier_text = f.read()
+    runner = build_runner()
+    plan, report = await update(runner, out_dir, dossier_text, concurrency, fanout, dry_run)
+    print(plan.describe())
+    if not dry_run:
+        print(report.summary())
+        print(runner_report(runner))
+    await aclose_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-ideate / re-score only what an edited brand_brief.json affects.")
+    parser.add_argument("--dir", default=os.path.join(ROOT_DIR, "outputs"),
+                        help="output dir holding brand_brief.json, ideas.json, scored_ideas.json and lineage.json")
+    parser.add_argument("--dossier", default=os.path.join(ROOT_DIR, DOSSIER_FILE))
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--fanout", action="store_true", default=DEFAULT_FANOUT)
+    parser.add_argument("--dry-run", action="store_true", help="print the changed fields and the plan only")
+    args = parser.parse_args()
+    asyncio.run(main(args.dir, args.dossier, args.concurrency, args.fanout, args.dry_run))
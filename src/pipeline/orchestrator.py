@@ -0,0 +1,258 @@
+# src/pipeline/orchestrator.py
+import argparse, asyncio, os, json, time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from src.context.processor import CAMPAIGN_GOAL, CONTEXT_MAPREDUCE, DOSSIER_FILE, dump_brief, extract_brief
+from src.ideas.idea_dedup import dedup_ideas
+from src.ideas.ideator_processor import DEFAULT_FANOUT, generate_ideas
+from src.pipeline.incremental import write_lineage
+from src.score.score_cascade import score_cascade
+from src.score.score_processor import DEFAULT_CASCADE, DEFAULT_CONCURRENCY, DEFAULT_SAMPLING, score_ideas
+from src.score.score_sampling import score_sampled
+from src.tools.clients import aclose_clients, build_runner, find_layer, runner_report
+from src.tools.deadline import RUN_DEADLINE, DeadlineExceeded, cutoff_note, deadline_scope
+from src.tools.run_store import RunStore, get_run_store, store_enabled
+from src.tools.tokens import AccountingRunner, stage_scope
+from src.tools.tracing import span, start_tracing, stop_tracing
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[Dict[str, Any]], Awaitable[Any]]   # receives {dep_name: dep_result}
+    deps: List[str] = field(default_factory=list)
+
+
+@dataclass
+class StageTiming:
+    name: str
+    start: float
+    end: float
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+class Pipeline:
+    """
+    Tiny DAG runner: every stage becomes a task that awaits its dependencies'
+    tasks, so independent stages overlap and dependent ones chain in one event loop.
+    Finished stages' results stay on .results, so a run that fails later (say, past its
+    deadline) still hands back what it got done.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = {s.name: s for s in stages}
+        for s in stages:
+            missing = [d for d in s.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {s.name!r} depends on unknown stage(s): {missing}")
+        self.timings: List[StageTiming] = []
+        self.results: Dict[str, Any] = {}
+
+    async def run(self) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def _run_stage(stage: Stage) -> Any:
+            inputs = {d: await tasks[d] for d in stage.deps}
+            start = time.perf_counter() - t0
+            try:
+                with stage_scope(stage.name), span(stage.name, "stage"):
+                    self.results[stage.name] = await stage.fn(inputs)
+                    return self.results[stage.name]
+            finally:
+                self.timings.append(StageTiming(stage.name, start, time.perf_counter() - t0))
+
+        for name in self._topo_order():
+            tasks[name] = asyncio.ensure_future(_run_stage(self.stages[name]))
+        try:
+            return {name: await task for name, task in tasks.items()}
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    def _topo_order(self) -> List[str]:
+        order, seen, visiting = [], set(), set()
+
+        def visit(name: str) -> None:
+            if name in seen:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle in pipeline at stage {name!r}")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            seen.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def report(self) -> str:
+        total = max((t.end for t in self.timings), default=0.0)
+        lines = [f"{'stage':<10} {'start':>8} {'end':>8} {'secs':>8} {'share':>6}"]
+        for t in sorted(self.timings, key=lambda t: t.start):
+            share = t.seconds / total if total else 0.0
+            lines.append(f"{t.name:<10} {t.start:>8.2f} {t.end:>8.2f} {t.seconds:>8.2f} {share:>6.0%}")
+        lines.append(f"{'total':<10} {'':>8} {total:>8.2f}")
+        return "\n".join(lines)
+
+
+def build_pipeline(runner, dossier_text: str, campaign_goal: str,
+                   concurrency: int = DEFAULT_CONCURRENCY, out_dir: Optional[str] = None,
+                   cascade: bool = DEFAULT_CASCADE, store: Optional[RunStore] = None,
+                   run_id: Optional[int] = None, fanout: bool = DEFAULT_FANOUT,
+                   mapreduce: str = CONTEXT_MAPREDUCE, sampling: bool = DEFAULT_SAMPLING) -> Pipeline:
+    """
+    brief → ideas → scores, passing pydantic objects in memory. Each stage's rows go to
+    `store` under run_id (one transaction per stage); out_dir also persists the JSON files.
+    """
+
+    def _persist(filename: str, text: str) -> None:
+        if out_dir is None:
+            return
+        with span(f"write {filename}", "io", bytes=len(text)):
+            os.makedirs(out_dir, exist_ok=True)
+            with open(os.path.join(out_dir, filename), "w", encoding="utf-8") as f:
+                f.write(text)
+
+    def _store(what: str, *args) -> None:
+        if store is None:
+            return
+        with span(f"store {what}", "io"):
+            getattr(store, f"save_{what}")(run_id, *args)
+
+    async def brief_stage(_):
+        brief = await extract_brief(dossier_text, campaign_goal, runner, mapreduce)
+        _persist("brand_brief.json", dump_brief(brief))
+        _store("brief", brief.model_dump())
+        return brief
+
+    async def ideas_stage(inputs):
+        ideas = await generate_ideas(runner, dump_brief(inputs["brief"]), dossier_text, fanout)
+        _persist("ideas.json", json.dumps(ideas.model_dump(), indent=2, ensure_ascii=False))
+        _store("ideas", [i.model_dump() for i in ideas.ideas], ideas.campaign_intent)
+        return ideas
+
+    async def scores_stage(inputs):
+        ideas = inputs["ideas"]
+        unique, dedup = dedup_ideas([idea.model_dump() for idea in ideas.ideas])
+        _persist("dedup_report.json", json.dumps(dedup.to_json(), indent=2, ensure_ascii=False))
+        if cascade:
+            scored, cascade_report = await score_cascade(runner, inputs["brief"].model_dump(), unique, concurrency,
+                                                         dossier_text=dossier_text)
+            print(cascade_report.summary())
+        elif sampling:
+            scored, sampling_report = await score_sampled(runner, inputs["brief"].model_dump(), unique, concurrency,
+                                                          dossier_text=dossier_text)
+            print(sampling_report.summary())
+        else:
+            scored = await score_ideas(runner, inputs["brief"].model_dump(), unique, concurrency,
+                                       dossier_text=dossier_text)
+        out = {
+            "campaign_intent": ideas.campaign_intent,
+            "brand_name": ideas.brand_name,
+            "total_ideas": len(scored),
+            "complete": not any(idea.get("incomplete") for idea in scored),
+            "ideas": scored,
+        }
+        _persist("scored_ideas.json", json.dumps(out, indent=2, ensure_ascii=False))
+        if out_dir is not None:
+            write_lineage(out_dir, inputs["brief"].model_dump())  # lets src/pipeline/incremental.py diff later edits
+        _store("scores", scored)
+        return out
+
+    return Pipeline([
+        Stage("brief", brief_stage),
+        Stage("ideas", ideas_stage, deps=["brief"]),
+        Stage("scores", scores_stage, deps=["brief", "ideas"]),
+    ])
+
+
+async def main(dossier_path: str, campaign_goal: str, concurrency: int = DEFAULT_CONCURRENCY,
+               out_dir: Optional[str] = None, cascade: bool = DEFAULT_CASCADE, trace: Optional[str] = None,
+               fanout: bool = DEFAULT_FANOUT, mapreduce: str = CONTEXT_MAPREDUCE, deadline: float = RUN_DEADLINE,
+               hedge: Optional[bool] = None, sampling: bool = DEFAULT_SAMPLING):
+    start_tracing(trace)
+    try:
+        runner = build_runner(hedge=hedge)
+        store = get_run_store() if store_enabled() else None
+        run_id = store.start_run(campaign_goal, "orchestrator", out_dir) if store is not None else None
+        with span("pipeline", "run", goal=campaign_goal, cascade=cascade, run_id=run_id):
+            with span(f"read {os.path.basename(dossier_path)}", "io"):
+                with open(dossier_path, "r", encoding="utf-8") as f:
+                    dossier_text = f.read()
+            pipeline = build_pipeline(runner, dossier_text, campaign_goal, concurrency, out_dir, cascade, store,
+                                      run_id, fanout, mapreduce, sampling)
+            try:
+                with deadline_scope(deadline):
+                    results = await pipeline.run()
+            except DeadlineExceeded as e:
+                # a stage that cannot go on without the model (brief, ideas) ran out of time
+                results, status, error = pipeline.results, "incomplete", f"{type(e).__name__}: {e}"
+            except BaseException as e:
+                if store is not None:
+                    store.finish_run(run_id, "failed", f"{type(e).__name__}: {e}")
+                raise
+            else:
+                cut_off = cutoff_note(results["scores"]["ideas"])
+                status, error = ("incomplete", cut_off) if cut_off else ("ok", None)
+        if store is not None:
+            store.finish_run(run_id, status, error)
+
+        if "scores" in results:
+            scored = results["scores"]["ideas"]
+            failed = sum(1 for idea in scored if idea.get("error"))
+            print(f"{results['brief'].brand_name}: {len(scored)} ideas scored ({failed} failed)"
+                  + (f"; stored as run {run_id} in {store.path}" if store is not None else ""))
+        if status != "ok":
+            print(f"INCOMPLETE ({error}); finished stages: {', '.join(results) or 'none'}")
+        accounting = find_layer(runner, AccountingRunner)
+        if out_dir:
+            if accounting is not None:
+                os.makedirs(out_dir, exist_ok=True)  # not there yet if the brief stage never finished
+                accounting.ledger.write_json(os.path.join(out_dir, "token_report.json"))
+            if results:
+                print(f"Saved artifacts → {out_dir}")
+            elif accounting is not None:
+                print(f"Saved token report → {out_dir} (no stage finished)")
+        print(pipeline.report())
+        print(runner_report(runner))
+    finally:
+        await aclose_clients()
+        trace_path = stop_tracing()  # flushes buffered spans, a failed run's included
+        if trace_path:
+            print(f"Trace → {trace_path} (python -m src.tools.tracing {trace_path})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run brief → ideas → scores in one process.")
+    parser.add_argument("--dossier", default=os.path.join(ROOT_DIR, DOSSIER_FILE))
+    parser.add_argument("--goal", default=CAMPAIGN_GOAL)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--persist", nargs="?", const=os.path.join(ROOT_DIR, "outputs"), default=None,
+                        metavar="DIR", help="also write brand_brief/ideas/scored_ideas/token_report JSON (default dir: outputs/)")
+    parser.add_argument("--cascade", action="store_true", default=DEFAULT_CASCADE,
+                        help="triage-then-deep scoring (see src/score/score_cascade.py)")
+    parser.add_argument("--trace", nargs="?", const="on", default=None, metavar="FILE",
+                        help="write a span trace (default file: outputs/traces/<timestamp>.jsonl; or OMNI_TRACE)")
+    parser.add_argument("--sampling", action="store_true", default=DEFAULT_SAMPLING,
+                        help="score each idea several times until its spread settles (see src/score/score_sampling.py)")
+    parser.add_argument("--fanout", action="store_true", default=DEFAULT_FANOUT,
+                        help="ideate one category per call, concurrently (see ideator_processor.generate_ideas_fanout)")
+    parser.add_argument("--mapreduce", choices=["off", "on", "auto"], default=CONTEXT_MAPREDUCE,
+                        help="brief extraction per dossier section, merged (see context/processor.extract_brief)")
+    parser.add_argument("--deadline", type=float, default=RUN_DEADLINE,
+                        help="seconds for the whole run; calls still going are cancelled and the results are "
+                             "marked incomplete (0 = none; or OMNI_RUN_DEADLINE)")
+    parser.add_argument("--hedge", action="store_true", default=None,
+                        help="re-send calls slower than their agent's p95 and keep the first answer (or OMNI_HEDGE)")
+    args = parser.parse_args()
+    asyncio.run(main(args.dossier, args.goal, args.concurrency, args.persist, args.cascade, args.trace, args.fanout,
+                     args.mapreduce, args.deadline, args.hedge, args.sampling))
@@ -0,0 +1,234 @@
+# src/pipeline/service.py
+"""
+Long-running local pipeline service: one process keeps the agents, the HTTP pool, the
+response cache and the rate limiter warm, and serves the stages over plain HTTP/1.1
+(stdlib asyncio server, JSON in and out, keep-alive):
+
+    POST /brief   {"dossier": str, "goal": str, "mapreduce"?: "off"|"on"|"auto"}  → InputPayload
+    POST /ideate  {"brief": InputPayload, "dossier"?: str, "fanout"?: bool}       → IdeasOutput
+    POST /score   {"brief": InputPayload, "idea": IdeaItem | "ideas": [...], "dossier"?: str, "cascade"?: bool,
+                   "sampling"?: bool}
+    GET  /health, GET /stats
+
+Any POST body may carry "deadline": seconds. Model calls still running when it passes
+are cancelled; /score returns the ideas it finished plus "incomplete" ones, a stage
+that cannot finish answers 504.
+
+Identical in-flight model calls from different requests (two callers scoring the same
+idea against the same brief) share one upstream Runner.run via SingleFlightRunner.
+
+    python -m src.pipeline.service --port 8765
+    OMNI_BACKEND=fake python -m src.tools.loadtest
+"""
+import argparse, asyncio, json, os, time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from urllib.parse import urlsplit
+
+from pydantic import ValidationError
+
+from src.context.processor import CONTEXT_MAPREDUCE, dump_brief, extract_brief
+from src.context.schemas import InputPayload
+from src.ideas.ideator_processor import DEFAULT_FANOUT, generate_ideas
+from src.score.score_cascade import score_cascade
+from src.score.score_processor import DEFAULT_CASCADE, DEFAULT_CONCURRENCY, DEFAULT_SAMPLING, score_idea, score_ideas
+from src.score.score_sampling import score_sampled
+from src.tools.clients import aclose_clients, build_runner, find_layer, get_http_client, runner_report
+from src.tools.coalesce import SingleFlightRunner
+from src.tools.deadline import DeadlineExceeded, deadline_scope
+from src.tools.tokens import stage_scope
+
+HOST = os.getenv("OMNI_SERVICE_HOST", "127.0.0.1")
+PORT = int(os.getenv("OMNI_SERVICE_PORT", "8765"))
+MAX_BODY = int(os.getenv("OMNI_SERVICE_MAX_BODY", str(8 * 1024 * 1024)))
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 504: "Gateway Timeout"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _field(body: dict, name: str, kind=str):
+    value = body.get(name)
+    if not isinstance(value, kind):
+        raise HTTPError(400, f"'{name}' is required ({kind.__name__})")
+    return value
+
+
+def _brief(body: dict) -> InputPayload:
+    try:
+        return InputPayload.model_validate(_field(body, "brief", dict))
+    except ValidationError as e:
+        raise HTTPError(400, f"invalid brief: {e}")
+
+
+class PipelineService:
+    """Request handlers over one shared, coalescing runner stack; warm() builds every agent up front."""
+
+    def __init__(self, runner=None, concurrency: int = DEFAULT_CONCURRENCY):
+        # no AccountingRunner: its per-call ledger would grow for the life of the process
+        self.runner = runner or build_runner(accounting=False, coalesce=True)
+        self.concurrency = concurrency
+        self.started = time.time()
+        self.requests: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.in_flight = 0
+        self.routes: Dict[Tuple[str, str], Callable[[dict], Awaitable[Any]]] = {
+            ("POST", "/brief"): self.brief,
+            ("POST", "/ideate"): self.ideate,
+            ("POST", "/score"): self.score,
+            ("GET", "/health"): self.health,
+            ("GET", "/stats"): self.stats,
+        }
+
+    def warm(self) -> None:
+        from src.context.context_extractor import get_context_extractor, get_section_extractor
+        from src.ideas.ideator_extractor import get_category_agent, get_ideator_agent
+        from src.score.score_extractor import get_score_agent, get_triage_agent
+
+        for build in (get_context_extractor, get_section_extractor, get_ideator_agent, get_category_agent,
+                      get_score_agent, get_triage_agent):
+            build()
+        get_http_client()
+
+    # --- handlers ---
+
+    async def brief(self, body: dict) -> dict:
+        with stage_scope("brief"):
+            brief = await extract_brief(_field(body, "dossier"), _field(body, "goal"), self.runner,
+                                        body.get("mapreduce", CONTEXT_MAPREDUCE))
+        return brief.model_dump()
+
+    async def ideate(self, body: dict) -> dict:
+        brief = _brief(body)
+        with stage_scope("ideas"):
+            ideas = await generate_ideas(self.runner, dump_brief(brief), body.get("dossier", ""),
+                                         bool(body.get("fanout", DEFAULT_FANOUT)))
+        return ideas.model_dump()
+
+    async def score(self, body: dict) -> Any:
+        brief = _brief(body).model_dump()
+        dossier = body.get("dossier", "")
+        sampling = bool(body.get("sampling", DEFAULT_SAMPLING))
+        with stage_scope("scores"):
+            if "idea" in body and not sampling:
+                return await score_idea(self.runner, brief, _field(body, "idea", dict), dossier)
+            ideas = [_field(body, "idea", dict)] if "idea" in body else _field(body, "ideas", list)
+            if sampling:
+                scored, report = await score_sampled(self.runner, brief, ideas, self.concurrency, dossier_text=dossier)
+                return scored[0] if "idea" in body else {"ideas": scored, "sampling": report.summary()}
+            if body.get("cascade", DEFAULT_CASCADE):
+                scored, report = await score_cascade(self.runner, brief, ideas, self.concurrency, dossier_text=dossier)
+                return {"ideas": scored, "cascade": report.summary()}
+            return {"ideas": await score_ideas(self.runner, brief, ideas, self.concurrency, dossier_text=dossier)}
+
+    async def health(self, _: dict) -> dict:
+        return {"status": "ok", "uptime": round(time.time() - self.started, 1), "in_flight": self.in_flight}
+
+    async def stats(self, _: dict) -> dict:
+        coalescing = find_layer(self.runner, SingleFlightRunner)
+        return {
+            "requests": dict(self.requests),
+            "errors": dict(self.errors),
+            "in_flight": self.in_flight,
+            "single_flight": vars(coalescing.stats) if coalescing is not None else None,
+            "report": runner_report(self.runner),
+        }
+
+    async def dispatch(self, method: str, path: str, raw: bytes) -> Tuple[int, Any]:
+        handler = self.routes.get((method, path))
+        if handler is None:
+            known = {m for m, p in self.routes if p == path}
+            return (405, {"error": f"use {', '.join(sorted(known))}"}) if known else (404, {"error": "not found"})
+        self.requests[path] += 1
+        self.in_flight += 1
+        try:
+            try:
+                body = json.loads(raw) if raw else {}
+            except ValueError as e:
+                raise HTTPError(400, f"invalid JSON: {e}")
+            if not isinstance(body, dict):
+                raise HTTPError(400, "request body must be a JSON object")
+            deadline = body.get("deadline")
+            if deadline is not None and not isinstance(deadline, (int, float)):
+                raise HTTPError(400, "'deadline' must be a number of seconds")
+            with deadline_scope(deadline):
+                return 200, await handler(body)
+        except HTTPError as e:
+            self.errors[path] += 1
+            return e.status, {"error": str(e)}
+        except DeadlineExceeded as e:
+            self.errors[path] += 1
+            return 504, {"error": str(e)}
+        except Exception as e:
+            self.errors[path] += 1
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+        finally:
+            self.in_flight -= 1
+
+    # --- HTTP/1.1 ---
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                method, target, version = line.decode("latin-1").split(None, 2)
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = h.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                keep_alive = version.strip() == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                if length > MAX_BODY:
+                    status, payload, keep_alive = 413, {"error": f"body over {MAX_BODY} bytes"}, False
+                else:
+                    raw = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch(method.upper(), urlsplit(target).path, raw)
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write((f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                              f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = HOST, port: int = PORT) -> asyncio.AbstractServer:
+        self.warm()
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def main(host: str, port: int, concurrency: int):
+    service = PipelineService(concurrency=concurrency)
+    server = await service.start(host, port)
+    print(f"omni-agent service on http://{host}:{port} (POST /brief /ideate /score, GET /health /stats)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        print(runner_report(service.runner))
+        await aclose_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve brief / ideate / score over HTTP with warm agents and clients.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="scoring calls per /score request")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.host, args.port, args.concurrency))
+    except KeyboardInterrupt:
+        pass
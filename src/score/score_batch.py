@@ -0,0 +1,169 @@
+# src/score/score_batch.py
+import asyncio, json
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from src.score.score_extractor import SCORE_BATCH_INSTRUCTIONS, SCORE_INSTRUCTIONS, get_score_batch_agent
+from src.score.score_processor import brief_block, build_idea_payload, idea_id, score_idea
+from src.tools.deadline import incomplete_flags, is_incomplete
+from src.tools.tokens import estimate_tokens, prompt_segments
+
+
+def ideas_block(ideas: List[dict]) -> str:
+    return json.dumps([
+        {
+            "idea_id": idea_id(idea),
+            "category": idea.get("category"),
+            "title": idea.get("title"),
+            "concept": idea.get("concept"),
+            "execution_notes": idea.get("execution_notes"),
+            "sources": idea.get("sources", []),
+        }
+        for idea in ideas
+    ], indent=2)
+
+
+def build_batch_payload(brief_obj: dict, ideas: List[dict]) -> str:
+    """Brief once, then every idea tagged with its idea_id."""
+    return (
+        "BRAND_BRIEF (JSON):\n" + brief_block(brief_obj) +
+        "\n\nIDEAS (JSON):\n" + ideas_block(ideas) +
+        "\n\nReturn IdeaScoreBatch JSON only: one entry per idea_id."
+    )
+
+
+@dataclass
+class BatchReport:
+    calls: int = 0
+    splits: int = 0
+    fallbacks: int = 0                # single ideas rescored with the per-idea agent
+    batch_input_tokens: int = 0       # estimated input tokens actually sent
+    per_idea_input_tokens: int = 0    # estimated input tokens per-idea scoring would send
+    errors: List[str] = field(default_factory=list)     # batch calls that raised / failed validation
+    failed: Dict[str, str] = field(default_factory=dict)  # idea_id -> error when per-idea scoring also failed
+    cut_off: Dict[str, str] = field(default_factory=dict)  # idea_id -> DeadlineExceeded.cause, for failed ideas
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.per_idea_input_tokens - self.batch_input_tokens
+
+    def summary(self) -> str:
+        pct = self.tokens_saved / self.per_idea_input_tokens if self.per_idea_input_tokens else 0.0
+        return (f"batch scoring: {self.calls} calls ({self.splits} splits, {self.fallbacks} per-idea fallbacks); "
+                f"~{self.batch_input_tokens:,} input tokens vs ~{self.per_idea_input_tokens:,} per-idea "
+                f"→ ~{self.tokens_saved:,} saved ({pct:.0%})")
+
+
+def invalid_output(exc: BaseException) -> bool:
+    """True for output that failed validation, the one batch failure that splitting can fix."""
+    from agents.exceptions import ModelBehaviorError
+    from pydantic import ValidationError
+    return isinstance(exc, (ModelBehaviorError, ValidationError))
+
+
+async def score_batch(runner, brief_obj: dict, ideas: List[dict], report: BatchReport,
+                      semaphore: Optional[asyncio.Semaphore] = None) -> Dict[str, dict]:
+    """
+    Score a batch in one call and return {idea_id: score_dict}.
+    Ideas missing from the batch output, or all of them if it failed validation, are
+    re-sent in two halves; a batch of one falls back to the per-idea score_agent. Any
+    other error (429s the rate limiter gave up on, transport errors, DeadlineExceeded)
+    propagates: a smaller batch would not fix it. `semaphore` bounds each call, sub-calls
+    included.
+    """
+    slot = semaphore or nullcontext()
+    if len(ideas) == 1:
+        report.fallbacks += 1
+        report.batch_input_tokens += estimate_tokens(SCORE_INSTRUCTIONS + build_idea_payload(brief_obj, ideas[0]))
+        try:
+            async with slot:
+                scored = await score_idea(runner, brief_obj, ideas[0])
+        except Exception as e:
+            if is_incomplete(e):
+                raise
+            report.failed[idea_id(ideas[0])] = f"{type(e).__name__}: {e}"
+            return {}
+        return {idea_id(ideas[0]): scored["scores"]}
+
+    prompt = build_batch_payload(brief_obj, ideas)
+    report.calls += 1
+    report.batch_input_tokens += estimate_tokens(SCORE_BATCH_INSTRUCTIONS + prompt)
+
+    wanted = {idea_id(idea) for idea in ideas}
+    scores: Dict[str, dict] = {}
+    try:
+        async with slot:
+            with prompt_segments(brief=brief_block(brief_obj), ideas=ideas_block(ideas)):
+                res = await runner.run(get_score_batch_agent(), prompt)
+        for item in res.final_output.scores:
+            if item.idea_id in wanted:
+                scores[item.idea_id] = item.model_dump(exclude={"idea_id"})
+    except Exception as e:
+        if not invalid_output(e):
+            raise
+        report.errors.append(f"{type(e).__name__}: {e}")
+
+    missing = [idea for idea in ideas if idea_id(idea) not in scores]
+    if missing:
+        report.splits += 1
+        mid = max(1, len(missing) // 2)
+        halves = [missing[:mid], missing[mid:]] if len(missing) > 1 else [missing]
+        halves = [h for h in halves if h]
+        parts = await asyncio.gather(*(score_batch(runner, brief_obj, h, report, semaphore) for h in halves),
+                                     return_exceptions=True)
+        for half, part in zip(halves, parts):
+            if isinstance(part, dict):
+                scores.update(part)
+                continue
+            if not isinstance(part, Exception):
+                raise part
+            # keep the other half's scores; this half's ideas fail (cut off, if it ran out of time)
+            for idea in half:
+                report.failed[idea_id(idea)] = f"{type(part).__name__}: {part}"
+                if is_incomplete(part):
+                    report.cut_off[idea_id(idea)] = part.cause
+    return scores
+
+
+async def score_ideas_batched(runner, brief_obj: dict, ideas_list: list, batch_size: int,
+                              concurrency: int = 4, on_scored=None) -> tuple:
+    """
+    Batched counterpart of score_processor.score_ideas: same output shape and order,
+    K ideas per call, at most `concurrency` calls in flight. on_scored(idea) fires
+    for each successfully scored idea as soon as its batch completes.
+    """
+    report = BatchReport()
+    report.per_idea_input_tokens = sum(
+        estimate_tokens(SCORE_INSTRUCTIONS + build_idea_payload(brief_obj, idea)) for idea in ideas_list
+    )
+
+    batches = [ideas_list[i:i + batch_size] for i in range(0, len(ideas_list), max(1, batch_size))]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _bounded(batch: list) -> Dict[str, dict]:
+        scores = await score_batch(runner, brief_obj, batch, report, semaphore)
+        if on_scored is not None:
+            for idea in batch:
+                if idea_id(idea) in scores:
+                    on_scored({**idea, "scores": scores[idea_id(idea)]})
+        return scores
+
+    results = await asyncio.gather(*(_bounded(b) for b in batches), return_exceptions=True)
+
+    scored = []
+    for batch, res in zip(batches, results):
+        for idea in batch:
+            if isinstance(res, Exception):
+                scored.append({**idea, "scores": None, "error": f"{type(res).__name__}: {res}",
+                               **incomplete_flags(res)})
+            elif isinstance(res, BaseException):
+                raise res
+            elif idea_id(idea) in res:
+                scored.append({**idea, "scores": res[idea_id(idea)]})
+            else:
+                error = report.failed.get(idea_id(idea), "missing from batch output")
+                cut_off = {"incomplete": True, "cutoff": report.cut_off[idea_id(idea)]} \
+                    if idea_id(idea) in report.cut_off else {}
+                scored.append({**idea, "scores": None, "error": error, **cut_off})
+    return scored, report
@@ -0,0 +1,137 @@
+# src/score/score_cascade.py
+import math, os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.score.score_extractor import get_score_agent, get_triage_agent
+from src.score.score_processor import DEFAULT_CONCURRENCY, score_ideas
+from src.score.score_ranking import DIMENSIONS, parse_weights
+
+CASCADE_TOP_K = int(os.getenv("SCORE_CASCADE_TOP_K", "5"))                 # always re-scored by the deep agent
+CASCADE_BAND = float(os.getenv("SCORE_CASCADE_BAND", "0.15"))              # composite distance to the top-k cutoff
+CASCADE_MIN_CONFIDENCE = float(os.getenv("SCORE_CASCADE_MIN_CONFIDENCE", "0.6"))
+CASCADE_MAX_FRACTION = float(os.getenv("SCORE_CASCADE_MAX_FRACTION", "0.35"))  # cap on escalations (≥ top_k)
+
+# escalation reasons, in the order they claim the capped deep budget
+REASONS = ("top_k", "triage_failed", "boundary", "uncertain")
+
+
+@dataclass
+class CascadeConfig:
+    top_k: int = CASCADE_TOP_K
+    band: float = CASCADE_BAND
+    min_confidence: float = CASCADE_MIN_CONFIDENCE
+    max_fraction: float = CASCADE_MAX_FRACTION
+
+
+@dataclass
+class CascadeReport:
+    ideas: int = 0
+    triage_failed: int = 0
+    escalated: Dict[str, int] = field(default_factory=dict)   # reason → count
+    deep_failed: int = 0
+    cutoff: Optional[float] = None
+
+    @property
+    def deep_calls(self) -> int:
+        return sum(self.escalated.values())
+
+    def summary(self) -> str:
+        reasons = ", ".join(f"{n} {r}" for r, n in self.escalated.items() if n) or "none"
+        saved = self.ideas - self.deep_calls
+        cutoff = f", top-k cutoff {self.cutoff:.2f}" if self.cutoff is not None else ""
+        return (f"cascade: {self.ideas} triaged ({self.triage_failed} failed), {self.deep_calls} escalated "
+                f"({reasons}){cutoff}; {saved} deep calls avoided, {self.deep_failed} deep failures")
+
+
+def composite(scores: Optional[dict], weights: Dict[str, float]) -> float:
+    if not scores:
+        return math.nan
+    w = np.array([weights[d] for d in DIMENSIONS])
+    return float(np.dot([scores[d] for d in DIMENSIONS], w) / w.sum())
+
+
+def select_escalations(triaged: List[dict], cfg: CascadeConfig,
+                       weights: Optional[Dict[str, float]] = None) -> Tuple[Dict[int, str], Optional[float]]:
+    """
+    {index: reason} for ideas the deep agent should re-score: the triage top-k, failed
+    triage calls, ideas within `band` of the top-k cutoff (could swap in or out), and
+    low-confidence triage scores. Capped at max_fraction of the slate (never below top_k).
+    """
+    weights = weights or parse_weights()
+    comp = np.array([composite(i.get("scores"), weights) for i in triaged])
+    conf = np.array([(i.get("scores") or {}).get("confidence", 0.0) for i in triaged])
+    ok = ~np.isnan(comp)
+
+    ranked = np.flatnonzero(ok)[np.argsort(-comp[ok], kind="stable")]
+    top = ranked[:cfg.top_k]
+    cutoff = float(comp[top[-1]]) if len(top) else None
+
+    candidates: Dict[str, List[int]] = {r: [] for r in REASONS}
+    candidates["top_k"] = list(top)
+    candidates["triage_failed"] = list(np.flatnonzero(~ok))
+    if cutoff is not None:
+        near = ranked[cfg.top_k:]
+        near = near[np.abs(comp[near] - cutoff) <= cfg.band]
+        candidates["boundary"] = list(near[np.argsort(np.abs(comp[near] - cutoff), kind="stable")])
+    unsure = np.flatnonzero(ok & (conf < cfg.min_confidence))
+    candidates["uncertain"] = list(unsure[np.argsort(conf[unsure], kind="stable")])
+
+    budget = max(cfg.top_k, math.ceil(cfg.max_fraction * len(triaged)))
+    chosen: Dict[int, str] = {}
+    for reason in REASONS:
+        for i in candidates[reason]:
+            if len(chosen) >= budget:
+                break
+            chosen.setdefault(int(i), reason)
+    return chosen, cutoff
+
+
+async def score_cascade(runner, brief_obj: dict, ideas_list: list, concurrency: int = DEFAULT_CONCURRENCY,
+                        on_scored=None, dossier_text: str = "",
+                        cfg: Optional[CascadeConfig] = None) -> Tuple[list, CascadeReport]:
+    """
+    Triage every idea on the cheap agent, then re-score the selected ones on the deep
+    agent. Each result carries "tier" ("triage" | "deep"); escalated ideas also keep
+    their "triage" scores and "escalation" reason. A failed deep call falls back to
+    the triage score (marked "incomplete" if a deadline cut the deep call off).
+    on_scored fires once per idea with its final result.
+    """
+    cfg = cfg or CascadeConfig()
+    report = CascadeReport(ideas=len(ideas_list))
+
+    triaged = await score_ideas(runner, brief_obj, ideas_list, concurrency, dossier_text=dossier_text,
+                                agent=get_triage_agent())
+    report.triage_failed = sum(1 for i in triaged if i.get("scores") is None)
+    chosen, report.cutoff = select_escalations(triaged, cfg)
+    report.escalated = {r: sum(1 for v in chosen.values() if v == r) for r in REASONS}
+
+    results: List[dict] = []
+    for i, (idea, tri) in enumerate(zip(ideas_list, triaged)):
+        if i not in chosen:
+            results.append({**tri, "tier": "triage"})
+            if on_scored is not None and tri.get("scores") is not None:
+                on_scored(results[-1])
+        else:
+            results.append(None)
+
+    order = sorted(chosen)
+    deep = await score_ideas(runner, brief_obj, [ideas_list[i] for i in order], concurrency,
+                             dossier_text=dossier_text, agent=get_score_agent())
+    for i, res in zip(order, deep):
+        tri_scores = triaged[i].get("scores")
+        if res.get("scores") is not None:
+            final = {**res, "tier": "deep", "triage": tri_scores, "escalation": chosen[i]}
+        elif tri_scores is not None:
+            report.deep_failed += 1
+            final = {**triaged[i], "tier": "triage", "escalation": chosen[i], "escalation_error": res.get("error"),
+                     **{k: res[k] for k in ("incomplete", "cutoff") if k in res}}
+        else:
+            report.deep_failed += 1
+            final = {**res, "tier": None, "escalation": chosen[i]}
+        results[i] = final
+        if on_scored is not None and final.get("scores") is not None:
+            on_scored(final)
+    return results, report
@@ -1,32 +1,10 @@
-import os
-from dotenv import load_dotenv
-from openai import AsyncOpenAI
-from agents import Agent
-from agents.models.openai_responses import OpenAIResponsesModel
-from agents import WebSearchTool
-
-from src.score.score_schemas import IdeaScore
-
-load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("OPENAI_API_KEY not found in .env")
-
-# OpenAI async client for the Agents SDK Responses model
-async_client = AsyncOpenAI(api_key=api_key)
-
-# Use the Responses API model that supports deep research + tools
-responses_model = OpenAIResponsesModel(
-    model=os.getenv("OPENAI_MODEL_IDEATION", "o3-deep-research"),
-    openai_client=async_client,
-)
-
-# The ideation agent will call web search / code tools as needed
-score_agent = Agent(
-    name="Score Agent",
-    model=responses_model,
-    tools=[WebSearchTool()],
-    instructions="""
+from functools import lru_cache
+
+from src.score.score_schemas import FeasibilityScore, IdeaScore, IdeaScoreBatch, TriageScore
+from src.tools.clients import client_bound, get_responses_model, getenv
+from src.tools.search_cache import search_tools
+
+SCORE_INSTRUCTIONS = """
     ROLE
     You are an expert creative strategist and evaluator.
 
@@ -220,6 +198,91 @@ score_agent = Agent(
     - Select the closest anchor; adjust ±0.25–0.50 for nuances.
     - Apply penalties/boosts; enforce 5.00 Scarcity Rule and partial-adherence caps; clamp 0.00–5.00.
     - Output strict IdeaScore JSON only.
-    """,
-    output_type=IdeaScore,
-)
\ No newline at end of file
+    """
+
+# Batch variant: same rubric, several ideas per call so the ~10KB instructions and
+# the brief are sent once per batch instead of once per idea
+SCORE_BATCH_INSTRUCTIONS = SCORE_INSTRUCTIONS + """
+    BATCH MODE (OVERRIDES OUTPUT SHAPE ONLY)
+    - You will receive IDEAS (JSON): a list of { idea_id, category, title, concept, execution_notes, sources[] }.
+    - Score every idea independently with the rubric above; do not compare ideas to each other.
+    - Return {"scores": [ ... ]} with exactly one IdeaScore object per idea, each carrying the idea's "idea_id" verbatim.
+    - Never invent, drop, or merge idea_ids.
+    """
+
+# Triage variant for cascade scoring: same rubric on a fast model with no tools; the
+# deep agent re-scores only the ideas this tier cannot settle
+SCORE_TRIAGE_INSTRUCTIONS = SCORE_INSTRUCTIONS + """
+    TRIAGE MODE (OVERRIDES TOOLS AND OUTPUT SHAPE)
+    - You have NO web search. Judge only from BRAND_BRIEF and IDEA; do not assume facts you cannot see.
+    - Where a score depends on facts you could not verify, keep it mid-range and lower your confidence.
+    - Add "confidence": a float 0.00–1.00 for how likely a full, researched review would land within ±0.50 of your scores on every dimension.
+    - Return TriageScore JSON: the IdeaScore fields plus "confidence".
+    """
+
+# Feasibility-only variant for incremental updates: a constraints edit can only move
+# feasibility (the hard cap above), so the other dimensions and the rationale are kept
+SCORE_FEASIBILITY_INSTRUCTIONS = SCORE_INSTRUCTIONS + """
+    FEASIBILITY-ONLY MODE (OVERRIDES OUTPUT SHAPE)
+    - Judge FEASIBILITY only, against the constraints in BRAND_BRIEF, with its anchors, checklist and caps above.
+    - Do not score the other dimensions and do not write a rationale.
+    - Return {"feasibility": <float 0–5 with 2 decimals>} only.
+    """
+
+
+@client_bound
+@lru_cache(maxsize=1)
+def get_score_agent():
+    """Build the scoring agent on first use (Responses model on the shared client + web search)."""
+    from agents import Agent
+
+    return Agent(
+        name="Score Agent",
+        model=get_responses_model(getenv("OPENAI_MODEL_IDEATION", "o3-deep-research")),
+        tools=search_tools(),
+        instructions=SCORE_INSTRUCTIONS,
+        output_type=IdeaScore,
+    )
+
+
+@client_bound
+@lru_cache(maxsize=1)
+def get_score_batch_agent():
+    return get_score_agent().clone(
+        name="Score Batch Agent",
+        instructions=SCORE_BATCH_INSTRUCTIONS,
+        output_type=IdeaScoreBatch,
+    )
+
+
+@client_bound
+@lru_cache(maxsize=1)
+def get_feasibility_agent():
+    return get_score_agent().clone(
+        name="Feasibility Score Agent",
+        instructions=SCORE_FEASIBILITY_INSTRUCTIONS,
+        output_type=FeasibilityScore,
+    )
+
+
+@client_bound
+@lru_cache(maxsize=1)
+def get_triage_agent():
+    """Cheap first tier for cascade scoring: OPENAI_MODEL_TRIAGE, no web search."""
+    from agents import Agent
+
+    return Agent(
+        name="Triage Score Agent",
+        model=get_responses_model(getenv("OPENAI_MODEL_TRIAGE", "gpt-4o-mini")),
+        instructions=SCORE_TRIAGE_INSTRUCTIONS,
+        output_type=TriageScore,
+    )
+
+
+def __getattr__(name):
+    # keep `from src.score.score_extractor import score_agent` working, built lazily
+    if name == "score_agent":
+        return get_score_agent()
+    if name == "score_batch_agent":
+        return get_score_batch_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
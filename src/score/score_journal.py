@@ -0,0 +1,63 @@
+# src/score/score_journal.py
+import hashlib, json, os, time
+from typing import Dict, Optional
+
+
+def content_hash(obj) -> str:
+    """sha256 of the canonical (sorted, compact) JSON form of obj."""
+    blob = json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def score_key(brief_hash: str, idea_id: str, scorer_hash: str = "") -> str:
+    """Journal key: a score is reusable only for the same brief, idea and scorer."""
+    return hashlib.sha256(f"{brief_hash}:{idea_id}:{scorer_hash}".encode("utf-8")).hexdigest()
+
+
+class ScoreJournal:
+    """
+    Append-only JSONL log of completed scores. Each line is written and fsynced as
+    soon as an idea is scored, so a crash or rate-limit abort loses at most the
+    calls that were still in flight. Later lines win when a key repeats.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Optional[Dict[str, dict]] = None
+        self._meta: Dict[str, dict] = {}
+
+    def load(self) -> Dict[str, dict]:
+        """Return {key: scores} for every intact line; a torn last line is ignored."""
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if entry.get("key") and entry.get("scores") is not None:
+                        self._entries[entry["key"]] = entry["scores"]
+                        self._meta[entry["key"]] = {k: v for k, v in entry.items() if k not in ("key", "ts", "scores")}
+        return self._entries
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.load().get(key)
+
+    def meta(self, key: str) -> dict:
+        """The extra fields journaled with a score (idea_id, title, tier, ...)."""
+        self.load()
+        return self._meta.get(key, {})
+
+    def append(self, key: str, scores: dict, **meta) -> None:
+        line = json.dumps({"key": key, "ts": time.time(), **meta, "scores": scores},
+                          ensure_ascii=False, separators=(",", ":"))
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.load()[key] = scores
+        self._meta[key] = meta
@@ -1,36 +1,111 @@
 # src/score/score_processor.py
-import asyncio, os, json
-from dotenv import load_dotenv
-from agents import Runner
-from src.score.score_extractor import score_agent
-
-load_dotenv()
+import argparse, asyncio, hashlib, os, json
+from typing import Optional
+from src.context.dossier_index import get_index, idea_query
+from src.ideas.idea_dedup import dedup_ideas
+from src.score.score_extractor import get_score_agent
+from src.score.score_journal import ScoreJournal, content_hash, score_key
+from src.tools.cache import agent_fingerprint
+from src.tools.clients import aclose_clients, build_runner, runner_report
+from src.tools.deadline import RUN_DEADLINE, cutoff_note, deadline_scope, incomplete_flags
+from src.tools.tokens import prompt_segments, stage_scope
 
 BRIEF_FILE   = "outputs/brand_brief.json"      # from extractor step
 IDEAS_FILE   = "outputs/ideas.json"            # from ideator step
 OUTPUT_FILE  = "outputs/scored_ideas.json"     # we write this
+JOURNAL_FILE = "outputs/score_journal.jsonl"   # append-only checkpoint of finished scores
+DEDUP_REPORT_FILE = "outputs/dedup_report.json"  # near-duplicate clusters + diversity-rule violations
+DEFAULT_CONCURRENCY = int(os.getenv("SCORE_CONCURRENCY", "4"))
+DEFAULT_BATCH_SIZE  = int(os.getenv("SCORE_BATCH_SIZE", "1"))   # 1 = one idea per call
+DEFAULT_CASCADE = os.getenv("SCORE_CASCADE", "off").lower() in ("1", "on", "true", "yes")  # triage → deep
+DEFAULT_SAMPLING = os.getenv("SCORE_SAMPLING", "off").lower() in ("1", "on", "true", "yes")  # mean of N samples
+DOSSIER_FILE = "examples/skims.txt"
+DOSSIER_EVIDENCE_TOKENS = int(os.getenv("SCORE_DOSSIER_TOKENS", "0"))  # 0 = no per-idea evidence
+
+SCORE_FIELDS = ("category", "title", "concept", "execution_notes", "sources")
+
+def idea_id(idea_obj: dict) -> str:
+    """Stable short id derived from the idea's scoring fields (same idea → same id across runs)."""
+    blob = json.dumps({k: idea_obj.get(k) for k in SCORE_FIELDS}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:12]
+
+def brief_block(brief_obj: dict) -> str:
+    return json.dumps(brief_obj, indent=2)
+
+def idea_block(idea_obj: dict) -> str:
+    return json.dumps({
+        "category": idea_obj.get("category"),
+        "title": idea_obj.get("title"),
+        "concept": idea_obj.get("concept"),
+        "execution_notes": idea_obj.get("execution_notes"),
+        "sources": idea_obj.get("sources", []),
+    }, indent=2)
 
-def build_idea_payload(brief_obj: dict, idea_obj: dict) -> str:
-    """Compose a simple per-idea scoring prompt (two JSON blocks)."""
+def idea_evidence(idea_obj: dict, dossier_text: str, token_budget: int = DOSSIER_EVIDENCE_TOKENS) -> str:
+    """Dossier passages most relevant to this idea, or "" when evidence is off."""
+    if not dossier_text or token_budget <= 0:
+        return ""
+    return get_index(dossier_text).excerpt(idea_query(idea_obj), token_budget)
+
+def build_idea_payload(brief_obj: dict, idea_obj: dict, evidence: str = "", output: str = "IdeaScore") -> str:
+    """Compose a simple per-idea scoring prompt (two JSON blocks, plus optional dossier evidence)."""
     return (
-        "BRAND_BRIEF (JSON):\n" + json.dumps(brief_obj, indent=2) +
-        "\n\nIDEA (JSON):\n" + json.dumps({
-            "category": idea_obj.get("category"),
-            "title": idea_obj.get("title"),
-            "concept": idea_obj.get("concept"),
-            "execution_notes": idea_obj.get("execution_notes"),
-            "sources": idea_obj.get("sources", []),
-        }, indent=2) +
-        "\n\nReturn IdeaScore JSON only."
+        "BRAND_BRIEF (JSON):\n" + brief_block(brief_obj) +
+        "\n\nIDEA (JSON):\n" + idea_block(idea_obj) +
+        ("\n\nDOSSIER EVIDENCE:\n" + evidence if evidence else "") +
+        f"\n\nReturn {output} JSON only."
     )
 
-async def main():
+async def score_idea(runner, brief_obj: dict, idea_obj: dict, dossier_text: str = "", agent=None) -> dict:
+    """Score a single idea and return it with its IdeaScore under 'scores' (agent defaults to the score agent)."""
+    agent = agent or get_score_agent()
+    evidence = idea_evidence(idea_obj, dossier_text)
+    prompt = build_idea_payload(brief_obj, idea_obj, evidence, agent.output_type.__name__)
+    with prompt_segments(brief=brief_block(brief_obj), idea=idea_block(idea_obj), dossier=evidence):
+        res = await runner.run(agent, prompt)
+    return {**idea_obj, "scores": res.final_output.model_dump()}
+
+async def score_ideas(runner, brief_obj: dict, ideas_list: list, concurrency: int = DEFAULT_CONCURRENCY,
+                      on_scored=None, dossier_text: str = "", agent=None) -> list:
+    """
+    Score ideas with at most `concurrency` calls in flight.
+    Output order matches ideas_list; a failed idea is kept with scores=None and an
+    'error' message instead of aborting the whole run; one cut off by a deadline
+    (src/tools/deadline.py) is also marked "incomplete". on_scored(idea) fires as
+    soon as each idea is scored (used for checkpointing).
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _bounded(idea_obj: dict) -> dict:
+        async with semaphore:
+            scored = await score_idea(runner, brief_obj, idea_obj, dossier_text, agent)
+        if on_scored is not None:
+            on_scored(scored)
+        return scored
+
+    results = await asyncio.gather(*(_bounded(idea) for idea in ideas_list), return_exceptions=True)
+
+    scored = []
+    for idea, res in zip(ideas_list, results):
+        if isinstance(res, Exception):
+            scored.append({**idea, "scores": None, "error": f"{type(res).__name__}: {res}",
+                           **incomplete_flags(res)})
+        elif isinstance(res, BaseException):
+            raise res
+        else:
+            scored.append(res)
+    return scored
+
+async def main(concurrency: int = DEFAULT_CONCURRENCY, use_cache: bool = True,
+               batch_size: int = DEFAULT_BATCH_SIZE, resume: bool = True, cascade: bool = DEFAULT_CASCADE,
+               deadline: float = RUN_DEADLINE, hedge: Optional[bool] = None, sampling: bool = DEFAULT_SAMPLING):
     base = os.path.dirname(os.path.dirname(__file__))
     root_dir = os.path.abspath(os.path.join(base, ".."))
 
     brief_path = os.path.join(root_dir, "outputs", "brand_brief.json")
     ideas_path = os.path.join(root_dir, "outputs", "ideas.json")
     out_path   = os.path.join(root_dir, "outputs", "scored_ideas.json")
+    journal_path = os.path.join(root_dir, JOURNAL_FILE)
 
     # 1) load brief + ideas
     with open(brief_path, "r", encoding="utf-8") as f:
@@ -43,21 +118,93 @@ async def main():
     if not isinstance(ideas_list, list) or not ideas_list:
         raise ValueError("No ideas found in outputs/ideas.json under key 'ideas'.")
 
-    runner = Runner()
+    # near-duplicates are scored once (see src/ideas/idea_dedup.py)
+    ideas_list, dedup = dedup_ideas(ideas_list)
+    print(dedup.summary())
+    with open(os.path.join(root_dir, DEDUP_REPORT_FILE), "w", encoding="utf-8") as f:
+        json.dump(dedup.to_json(), f, indent=2, ensure_ascii=False)
+
+    runner = build_runner(cache=use_cache, hedge=hedge)
+
+    dossier_text = ""
+    dossier_path = os.path.join(root_dir, DOSSIER_FILE)
+    if DOSSIER_EVIDENCE_TOKENS > 0 and os.path.exists(dossier_path):
+        with open(dossier_path, "r", encoding="utf-8") as f:
+            dossier_text = f.read()
+
+    # 2) resume: reuse journaled scores for (brief, idea, scorer) hashes we have already seen
+    journal = ScoreJournal(journal_path)
+    brief_hash = content_hash(brief_obj)
+    scorer = agent_fingerprint(get_score_agent())
+    if dossier_text:
+        # evidence changes the prompt, so journaled scores only hold for the same dossier + budget
+        scorer = {**scorer, "evidence": [DOSSIER_EVIDENCE_TOKENS, content_hash(dossier_text)]}
+    if cascade:
+        from src.score.score_cascade import CascadeConfig
+        from src.score.score_extractor import get_triage_agent
+        # a cascade score may come from either tier, so it is keyed by both agents + the escalation policy
+        scorer = {**scorer, "cascade": [agent_fingerprint(get_triage_agent()), vars(CascadeConfig())]}
+    elif sampling:
+        from src.score.score_sampling import SamplingConfig
+        # a sampled score is a mean whose precision depends on the stopping rule
+        scorer = {**scorer, "sampling": vars(SamplingConfig())}
+    elif batch_size > 1:
+        from src.score.score_extractor import get_score_batch_agent
+        # batched scores come from the batch agent's instructions, with batch_size ideas in context
+        scorer = {**scorer, "batch": [agent_fingerprint(get_score_batch_agent()), batch_size]}
+    scorer_hash = content_hash(scorer)
+    keys = {idea_id(idea): score_key(brief_hash, idea_id(idea), scorer_hash) for idea in ideas_list}
 
-    # 2) score ideas
-    scored_ideas = []
-    for idea in ideas_list:
-        prompt = build_idea_payload(brief_obj, idea)
-        res = await runner.run(score_agent, prompt)
-        score_dict = res.final_output.model_dump()
-        scored_ideas.append({**idea, "scores": score_dict})
+    done = journal.load() if resume else {}
+    pending = [idea for idea in ideas_list if keys[idea_id(idea)] not in done]
+    print(f"journal: {len(ideas_list) - len(pending)} scores reused, {len(pending)} ideas to score")
 
-    # 3) write output
+    def checkpoint(scored: dict) -> None:
+        meta = {k: scored[k] for k in ("tier", "score_std", "samples") if k in scored}
+        journal.append(keys[idea_id(scored)], scored["scores"], idea_id=idea_id(scored), title=scored.get("title"),
+                       **meta)
+
+    # 3) score the rest (bounded fan-out; results stay in ideas_list order)
+    batch_report = cascade_report = sampling_report = None
+    with stage_scope("scores"), deadline_scope(deadline):
+        if cascade:
+            from src.score.score_cascade import score_cascade
+            fresh, cascade_report = await score_cascade(runner, brief_obj, pending, concurrency,
+                                                        on_scored=checkpoint, dossier_text=dossier_text)
+        elif sampling:
+            from src.score.score_sampling import score_sampled
+            fresh, sampling_report = await score_sampled(runner, brief_obj, pending, concurrency,
+                                                         on_scored=checkpoint, dossier_text=dossier_text)
+        elif batch_size > 1:
+            from src.score.score_batch import score_ideas_batched
+            fresh, batch_report = await score_ideas_batched(runner, brief_obj, pending, batch_size, concurrency,
+                                                            on_scored=checkpoint)
+        else:
+            fresh = await score_ideas(runner, brief_obj, pending, concurrency, on_scored=checkpoint,
+                                      dossier_text=dossier_text)
+
+    fresh_by_id = {idea_id(idea): idea for idea in fresh}
+    scored_ideas = [
+        fresh_by_id[idea_id(idea)] if idea_id(idea) in fresh_by_id
+        else {**idea, "scores": done[keys[idea_id(idea)]],
+              **{k: v for k, v in journal.meta(keys[idea_id(idea)]).items() if k in ("tier", "score_std", "samples")}}
+        for idea in ideas_list
+    ]
+    failed = [i for i in scored_ideas if i.get("error")]
+    if failed:
+        print(f"{len(failed)}/{len(scored_ideas)} ideas failed to score:")
+        for idea in failed:
+            print(f"- {idea.get('title')}: {idea['error']}")
+    cut_off = cutoff_note(scored_ideas)
+    if cut_off:
+        print(f"INCOMPLETE: {cut_off}; rerun to resume from the journal")
+
+    # 4) write output
     out = {
         "campaign_intent": ideas_bundle.get("campaign_intent"),
         "brand_name": ideas_bundle.get("brand_name"),
         "total_ideas": len(scored_ideas),
+        "complete": cut_off is None,
         "ideas": scored_ideas,
     }
 
@@ -66,6 +213,38 @@ async def main():
         json.dump(out, f, indent=2, ensure_ascii=False)
 
     print(f"Saved scored ideas → {OUTPUT_FILE}")
+    if batch_report is not None:
+        print(batch_report.summary())
+    if cascade_report is not None:
+        print(cascade_report.summary())
+    if sampling_report is not None:
+        print(sampling_report.summary())
+    print(runner_report(runner))
+    await aclose_clients()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Score ideas from outputs/ideas.json.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="max scoring calls in flight (1 = sequential)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="ideas scored per model call (1 = per-idea scoring)")
+    parser.add_argument("--cascade", action="store_true", default=DEFAULT_CASCADE,
+                        help="triage every idea on OPENAI_MODEL_TRIAGE; deep-score only the top/borderline/uncertain ones")
+    parser.add_argument("--sampling", action="store_true", default=DEFAULT_SAMPLING,
+                        help="score each idea several times, stopping once its per-dimension spread settles "
+                             "(see src/score/score_sampling.py)")
+    parser.add_argument("--fresh", action="store_true",
+                        help=f"ignore {JOURNAL_FILE} and rescore every idea (still appends to it)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always call the model; skip the on-disk response cache")
+    parser.add_argument("--deadline", type=float, default=RUN_DEADLINE,
+                        help="seconds for the whole scoring run; unfinished ideas are marked incomplete (0 = none)")
+    parser.add_argument("--hedge", action="store_true", default=None,
+                        help="re-send calls slower than their agent's p95 and keep the first answer (or OMNI_HEDGE)")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    asyncio.run(main(concurrency=args.concurrency, use_cache=not args.no_cache, batch_size=args.batch_size,
+                     resume=not args.fresh, cascade=args.cascade, deadline=args.deadline, hedge=args.hedge,
+                     sampling=args.sampling))
@@ -0,0 +1,192 @@
+# src/score/score_ranking.py
+"""
+Rank scored ideas from any number of runs without re-looping over nested JSON:
+everything is loaded once into a NumPy structured array (one row per idea) and
+composites, per-category top-k, the Pareto frontier and percentile ranks are
+vector operations over it.
+
+    python -m src.score.score_ranking outputs/*/scored_ideas.json --top 3 --weights brand_fit=2,virality=1.5
+"""
+import argparse, glob, json, os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from numpy.lib import recfunctions as rfn
+
+DIMENSIONS = ("brand_fit", "audience", "resonance", "virality", "feasibility")
+CATEGORIES = ("Digital", "Influencer", "Events", "Partnerships", "PR", "Community")
+DEFAULT_WEIGHTS = os.getenv("SCORE_WEIGHTS", "")  # e.g. "brand_fit=2,feasibility=1.5"; unset dims weigh 1
+
+SCORE_DTYPE = np.dtype(
+    [("run", np.uint32), ("pos", np.uint32), ("category", np.int8)] +
+    [(d, np.float32) for d in DIMENSIONS]
+)
+_UNKNOWN_CATEGORY = -1
+
+
+def parse_weights(spec: Optional[str] = None) -> Dict[str, float]:
+    weights = {d: 1.0 for d in DIMENSIONS}
+    for part in filter(None, (spec if spec is not None else DEFAULT_WEIGHTS).split(",")):
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name not in weights:
+            raise ValueError(f"unknown score dimension {name!r}; expected one of {DIMENSIONS}")
+        weights[name] = float(value)
+    return weights
+
+
+@dataclass
+class ScoreTable:
+    """One row per idea. Failed ideas (no scores) are kept with NaN scores so positions line up."""
+    rows: np.ndarray        # SCORE_DTYPE
+    titles: np.ndarray      # object array, parallel to rows
+    runs: List[str]         # run index → source path
+    brands: List[str]       # run index → brand_name
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """(n, 5) float32 view-copy of the score dimensions."""
+        return rfn.structured_to_unstructured(self.rows[list(DIMENSIONS)], dtype=np.float32)
+
+    @property
+    def valid(self) -> np.ndarray:
+        return ~np.isnan(self.matrix).any(axis=1)
+
+    def composite(self, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Weighted mean of the dimensions (same 0–5 scale); NaN for failed ideas."""
+        w = np.array([(weights or parse_weights())[d] for d in DIMENSIONS], dtype=np.float32)
+        if w.sum() <= 0:
+            raise ValueError("weights must sum to a positive number")
+        return self.matrix @ (w / w.sum())
+
+    def percentile_ranks(self, values: np.ndarray, by_category: bool = False) -> np.ndarray:
+        """Percent of (scored) ideas at or below each value, overall or within the idea's category."""
+        out = np.full(len(values), np.nan, dtype=np.float32)
+        ok = ~np.isnan(values)
+        groups = [ok] if not by_category else [ok & (self.rows["category"] == c) for c in np.unique(self.rows["category"])]
+        for mask in groups:
+            ref = np.sort(values[mask])
+            if len(ref):
+                out[mask] = 100.0 * np.searchsorted(ref, values[mask], side="right") / len(ref)
+        return out
+
+    def top_k_per_category(self, k: int, scores: np.ndarray) -> np.ndarray:
+        """Row indices of the k best ideas in each category, category by category, best first."""
+        ok = np.flatnonzero(~np.isnan(scores))
+        cat = self.rows["category"][ok]
+        order = ok[np.lexsort((-scores[ok], cat))]            # by category, then score desc
+        cat_sorted = self.rows["category"][order]
+        starts = np.flatnonzero(np.r_[True, cat_sorted[1:] != cat_sorted[:-1]])
+        rank_in_cat = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        return order[rank_in_cat < k]
+
+    def pareto_frontier(self, dims: Sequence[str] = DIMENSIONS) -> np.ndarray:
+        """
+        Row indices of ideas no other idea beats on every dimension (≥ on all, > on one).
+        Candidates are visited in descending sum order, so a point can only be dominated by
+        one visited before it, and each visit culls everything it dominates in one pass.
+        """
+        idx = np.flatnonzero(self.valid)
+        pts = rfn.structured_to_unstructured(self.rows[list(dims)][idx], dtype=np.float32)
+        order = np.argsort(-pts.sum(axis=1), kind="stable")
+        pts, idx = pts[order], idx[order]
+        i = 0
+        while i < len(pts):
+            dominated = (pts <= pts[i]).all(axis=1) & (pts < pts[i]).any(axis=1)
+            keep = ~dominated
+            i = int(keep[:i].sum()) + 1
+            pts, idx = pts[keep], idx[keep]
+        return np.sort(idx)
+
+    def describe(self, i: int, composite: Optional[np.ndarray] = None) -> dict:
+        row = self.rows[i]
+        cat = int(row["category"])
+        out = {
+            "run": self.runs[row["run"]],
+            "brand_name": self.brands[row["run"]],
+            "position": int(row["pos"]),
+            "category": CATEGORIES[cat] if cat != _UNKNOWN_CATEGORY else None,
+            "title": self.titles[i],
+            **{d: float(row[d]) for d in DIMENSIONS},
+        }
+        if composite is not None:
+            out["composite"] = round(float(composite[i]), 3)
+        return out
+
+
+def load_scored(paths: Sequence[str]) -> ScoreTable:
+    """Read scored_ideas.json files (or lists of scored ideas) into a single ScoreTable."""
+    cat_code = {c: i for i, c in enumerate(CATEGORIES)}
+    columns = {name: [] for name in SCORE_DTYPE.names}
+    titles: List[str] = []
+    runs, brands = [], []
+    for run, path in enumerate(paths):
+        with open(path, "r", encoding="utf-8") as f:
+            bundle = json.load(f)
+        ideas = bundle.get("ideas", []) if isinstance(bundle, dict) else bundle
+        runs.append(path)
+        brands.append(bundle.get("brand_name", "") if isinstance(bundle, dict) else "")
+        for pos, idea in enumerate(ideas):
+            scores = idea.get("scores") or {}
+            columns["run"].append(run)
+            columns["pos"].append(pos)
+            columns["category"].append(cat_code.get(idea.get("category"), _UNKNOWN_CATEGORY))
+            for d in DIMENSIONS:
+                v = scores.get(d)
+                columns[d].append(np.nan if v is None else v)
+            titles.append(idea.get("title", ""))
+
+    rows = np.empty(len(titles), dtype=SCORE_DTYPE)
+    for name in SCORE_DTYPE.names:
+        rows[name] = columns[name]
+    return ScoreTable(rows, np.array(titles, dtype=object), runs, brands)
+
+
+def main(patterns: List[str], top: int, weights_spec: Optional[str], pareto: bool, out_path: Optional[str]):
+    paths = sorted({p for pattern in patterns for p in glob.glob(pattern)})
+    if not paths:
+        raise SystemExit(f"No scored idea files match {patterns}")
+    table = load_scored(paths)
+    weights = parse_weights(weights_spec)
+    comp = table.composite(weights)
+    pct = table.percentile_ranks(comp)
+
+    print(f"{len(table)} ideas from {len(paths)} run(s); {int(table.valid.sum())} scored; "
+          f"weights {', '.join(f'{d}={w:g}' for d, w in weights.items())}")
+    print(f"{'category':<13} {'comp':>5} {'pctl':>5}  title")
+    top_rows = table.top_k_per_category(top, comp)
+    for i in top_rows:
+        d = table.describe(i)
+        print(f"{(d['category'] or '?'):<13} {comp[i]:>5.2f} {pct[i]:>5.1f}  {d['title']}")
+
+    frontier = table.pareto_frontier() if pareto or out_path else np.zeros(0, dtype=np.int64)
+    if pareto:
+        print(f"\nPareto frontier ({len(frontier)} ideas):")
+        for i in frontier[np.argsort(-comp[frontier])]:
+            print(f"  {comp[i]:>5.2f}  {table.titles[i]}")
+
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "runs": paths,
+                "weights": weights,
+                "top_k": [{**table.describe(i, comp), "percentile": float(pct[i])} for i in top_rows],
+                "pareto": [table.describe(i, comp) for i in frontier],
+            }, f, indent=2, ensure_ascii=False)
+        print(f"Saved → {out_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Composite, top-k per category and Pareto frontier over scored ideas.")
+    parser.add_argument("files", nargs="*", default=["outputs/scored_ideas.json", "outputs/*/scored_ideas.json"],
+                        help="scored_ideas.json paths or glob patterns")
+    parser.add_argument("--top", type=int, default=3, help="ideas per category")
+    parser.add_argument("--weights", default=None, help="e.g. brand_fit=2,feasibility=1.5 (default: SCORE_WEIGHTS or equal)")
+    parser.add_argument("--pareto", action="store_true", help="also print the Pareto frontier")
+    parser.add_argument("--out", default=None, help="write top-k and frontier as JSON")
+    args = parser.parse_args()
+    main(args.files, args.top, args.weights, args.pareto, args.out)
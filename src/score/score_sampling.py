@@ -0,0 +1,149 @@
+# src/score/score_sampling.py
+import asyncio, math, os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.score.score_extractor import get_score_agent
+from src.score.score_processor import (DEFAULT_CONCURRENCY, brief_block, build_idea_payload, idea_block,
+                                       idea_evidence)
+from src.score.score_ranking import DIMENSIONS
+from src.tools.deadline import incomplete_flags, is_incomplete
+from src.tools.tokens import prompt_segments
+
+SAMPLES_MIN = int(os.getenv("SCORE_SAMPLES_MIN", "2"))            # drawn for every idea, concurrently
+SAMPLES_MAX = int(os.getenv("SCORE_SAMPLES_MAX", "6"))            # cap per idea
+SAMPLE_TOLERANCE = float(os.getenv("SCORE_SAMPLE_TOLERANCE", "0.15"))  # std error of the mean, every dimension (0–5)
+
+
+@dataclass
+class SamplingConfig:
+    min_samples: int = SAMPLES_MIN
+    max_samples: int = SAMPLES_MAX
+    tolerance: float = SAMPLE_TOLERANCE
+
+
+@dataclass
+class SamplingReport:
+    ideas: int = 0
+    calls: int = 0
+    failed_calls: int = 0
+    settled: int = 0        # stopped once every dimension's std error was within tolerance
+    capped: int = 0         # stopped still uncertain (max_samples, failed calls or the deadline)
+    failed: int = 0         # not a single sample came back
+    max_samples: int = 0
+
+    def summary(self) -> str:
+        fixed = self.ideas * self.max_samples
+        saved = fixed - self.calls
+        pct = saved / fixed if fixed else 0.0
+        return (f"sampling: {self.ideas} ideas, {self.calls} score calls ({self.failed_calls} failed); "
+                f"{self.settled} settled, {self.capped} still uncertain, {self.failed} unscored; "
+                f"{saved} calls fewer than fixed {self.max_samples}× resampling ({pct:.0%})")
+
+
+def sample_prompt(prompt: str, k: int) -> str:
+    """Sample 0 is the plain prompt (shares the cache with single scoring); later ones get a distinct nonce."""
+    return prompt if k == 0 else f"{prompt}\n\nSAMPLE: {k}"
+
+
+def spread(samples: List[dict]) -> np.ndarray:
+    """Per-dimension sample std (ddof=1), in DIMENSIONS order; zeros for a single sample."""
+    m = np.array([[s[d] for d in DIMENSIONS] for s in samples], dtype=np.float64)
+    return m.std(axis=0, ddof=1) if len(m) > 1 else np.zeros(len(DIMENSIONS))
+
+
+def samples_needed(samples: List[dict], cfg: SamplingConfig) -> int:
+    """
+    Total samples this idea should end up with: enough for the widest dimension's std
+    error (std / sqrt(n)) to fall within tolerance, between min_samples and max_samples.
+    """
+    n = len(samples)
+    if n < max(2, cfg.min_samples):
+        return min(cfg.max_samples, max(2, cfg.min_samples))
+    needed = math.ceil((spread(samples).max() / cfg.tolerance) ** 2) if cfg.tolerance > 0 else cfg.max_samples
+    return min(cfg.max_samples, max(n, needed))
+
+
+def settled(samples: List[dict], cfg: SamplingConfig) -> bool:
+    n = len(samples)
+    return n >= max(2, cfg.min_samples) and spread(samples).max() / math.sqrt(n) <= cfg.tolerance
+
+
+def aggregate(samples: List[dict]) -> Tuple[dict, Dict[str, float]]:
+    """
+    (scores, std): the mean of every numeric field (the IdeaScore dimensions, plus e.g.
+    triage confidence) with the rationale of the sample closest to that mean, and the
+    per-dimension spread.
+    """
+    numeric = [k for k, v in samples[0].items() if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    mean = {k: round(float(np.mean([s[k] for s in samples])), 2) for k in numeric}
+    closest = min(samples, key=lambda s: sum((s[d] - mean[d]) ** 2 for d in DIMENSIONS))
+    std = spread(samples)
+    return {**mean, "rationale": closest.get("rationale", "")}, {d: round(float(x), 3) for d, x in zip(DIMENSIONS, std)}
+
+
+async def score_sampled(runner, brief_obj: dict, ideas_list: list, concurrency: int = DEFAULT_CONCURRENCY,
+                        on_scored=None, dossier_text: str = "", agent=None,
+                        cfg: Optional[SamplingConfig] = None) -> Tuple[list, SamplingReport]:
+    """
+    Multi-sample scoring with early stopping. Every idea gets min_samples concurrent
+    scores; an idea whose per-dimension std error is still above tolerance draws as
+    many more as its spread says it needs (up to max_samples), the rest stop there.
+    Each result's "scores" holds the per-dimension means, plus "score_std" (sample std
+    per dimension) and "samples". Output order and failure handling match score_ideas;
+    at most `concurrency` calls are in flight across all ideas.
+    """
+    cfg = cfg or SamplingConfig()
+    agent = agent or get_score_agent()
+    report = SamplingReport(ideas=len(ideas_list), max_samples=cfg.max_samples)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    brief = brief_block(brief_obj)
+
+    async def _sample(prompt: str, k: int, segments: dict) -> dict:
+        async with semaphore:
+            with prompt_segments(**segments):
+                res = await runner.run(agent, sample_prompt(prompt, k))
+        return res.final_output.model_dump()
+
+    async def _idea(idea_obj: dict) -> dict:
+        evidence = idea_evidence(idea_obj, dossier_text)
+        prompt = build_idea_payload(brief_obj, idea_obj, evidence, agent.output_type.__name__)
+        segments = {"brief": brief, "idea": idea_block(idea_obj), "dossier": evidence}
+        samples: List[dict] = []
+        error: Optional[Exception] = None
+        drawn = 0
+        while True:
+            target = samples_needed(samples, cfg)
+            if target <= len(samples) or drawn >= cfg.max_samples:
+                break
+            batch = range(drawn, drawn + min(target - len(samples), cfg.max_samples - drawn))
+            drawn += len(batch)
+            report.calls += len(batch)
+            for res in await asyncio.gather(*(_sample(prompt, k, segments) for k in batch), return_exceptions=True):
+                if isinstance(res, Exception):
+                    report.failed_calls += 1
+                    error = res
+                elif isinstance(res, BaseException):
+                    raise res
+                else:
+                    samples.append(res)
+            if error is not None and is_incomplete(error):
+                break  # out of time: keep what came back
+
+        if not samples:
+            report.failed += 1
+            return {**idea_obj, "scores": None, "error": f"{type(error).__name__}: {error}",
+                    **incomplete_flags(error)}
+        if settled(samples, cfg):
+            report.settled += 1
+        else:
+            report.capped += 1
+        scores, std = aggregate(samples)
+        scored = {**idea_obj, "scores": scores, "score_std": std, "samples": len(samples)}
+        if on_scored is not None:
+            on_scored(scored)
+        return scored
+
+    return list(await asyncio.gather(*(_idea(idea) for idea in ideas_list))), report
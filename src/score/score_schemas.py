@@ -1,4 +1,4 @@
-from typing import Annotated
+from typing import Annotated, List
 from pydantic import BaseModel, Field, field_validator
 
 # Reusable constrained float type
@@ -16,3 +16,22 @@ class IdeaScore(BaseModel):
     @field_validator('brand_fit', 'audience', 'resonance', 'virality', 'feasibility', mode='after')
     def round_to_2dp(cls, v: float) -> float:
         return round(v, 2)
+
+# Batch mode: one call scores several ideas, each echoed back by its stable id
+class IdeaScoreItem(IdeaScore):
+    idea_id: str
+
+class IdeaScoreBatch(BaseModel):
+    scores: List[IdeaScoreItem]
+
+# Incremental mode: after a constraints-only brief edit just feasibility is re-judged
+class FeasibilityScore(BaseModel):
+    feasibility: Score
+
+    @field_validator('feasibility', mode='after')
+    def round_to_2dp(cls, v: float) -> float:
+        return round(v, 2)
+
+# Cascade mode: the cheap triage tier also says how much it trusts its own scores
+class TriageScore(IdeaScore):
+    confidence: Annotated[float, Field(ge=0, le=1)]
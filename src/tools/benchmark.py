@@ -0,0 +1,204 @@
+# src/tools/benchmark.py
+"""
+Offline pipeline benchmark on the fake backend (src/tools/fake_backend.py): runs
+brief → ideas → scores for a grid of concurrency levels × idea counts and records
+throughput, per-agent call latency percentiles and tail ratios. Results go to a
+JSON file so two versions can be compared:
+
+    python -m src.tools.benchmark --label before
+    python -m src.tools.benchmark --label after --compare outputs/benchmarks/before.json
+    python -m src.tools.benchmark --label hedged --hedge --compare outputs/benchmarks/after.json
+"""
+import argparse, asyncio, json, os, platform, statistics, subprocess, sys, time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.context.processor import CAMPAIGN_GOAL, DOSSIER_FILE
+from src.pipeline.orchestrator import build_pipeline
+from src.tools.deadline import DeadlineRunner
+from src.tools.fake_backend import FakeConfig, FakeRunner
+from src.tools.ratelimit import RateLimitedRunner, RateLimiter
+from src.tools.tokens import AccountingRunner
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+RESULTS_DIR = os.path.join(ROOT_DIR, "outputs", "benchmarks")
+PERCENTILES = (50, 95, 99)
+
+
+def latency_stats(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    arr = np.asarray(samples, dtype=np.float64)
+    out = {f"p{p}": float(np.percentile(arr, p)) for p in PERCENTILES}
+    out["max"] = float(arr.max())
+    out["mean"] = float(arr.mean())
+    out["tail_ratio"] = out["p99"] / out["p50"] if out["p50"] else 0.0
+    return out
+
+
+async def run_once(dossier_text: str, config: FakeConfig, concurrency: int, hedge: bool = False) -> dict:
+    # production retry layer (no RPM/TPM budget), with backoff on the same time scale as the fake latencies
+    limited = RateLimitedRunner(FakeRunner(config), RateLimiter(rpm=0, tpm=0), retry_base=config.time_scale)
+    hedging = DeadlineRunner(limited, hedge=hedge)
+    runner = AccountingRunner(hedging)
+    pipeline = build_pipeline(runner, dossier_text, CAMPAIGN_GOAL, concurrency)
+    t = time.perf_counter()
+    error = None
+    scored: list = []
+    try:
+        results = await pipeline.run()
+        scored = results["scores"]["ideas"]
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - t
+
+    per_agent = defaultdict(list)
+    for rec in runner.ledger.records:
+        per_agent[rec.agent].append(rec.seconds)
+    return {
+        "wall": wall,
+        "ideas": len(scored),
+        "failed": sum(1 for idea in scored if idea.get("error")),
+        "error": error,
+        "stages": {t.name: t.seconds for t in pipeline.timings},
+        "calls": {agent: secs for agent, secs in per_agent.items()},
+        "input_tokens": sum(r.input_tokens for r in runner.ledger.records),
+        "output_tokens": sum(r.output_tokens for r in runner.ledger.records),
+        "retries": limited.stats.retries,
+        "hedges": hedging.stats.hedges,
+    }
+
+
+async def run_scenario(dossier_text: str, base: FakeConfig, concurrency: int, ideas_per_category: int,
+                       repeat: int, hedge: bool = False) -> dict:
+    runs = []
+    for i in range(repeat):
+        config = FakeConfig(**{**vars(base), "ideas_per_category": ideas_per_category, "seed": base.seed + i})
+        runs.append(await run_once(dossier_text, config, concurrency, hedge))
+
+    calls = defaultdict(list)
+    for r in runs:
+        for agent, secs in r["calls"].items():
+            calls[agent].extend(secs)
+    wall = statistics.median(r["wall"] for r in runs)
+    ideas = statistics.median(r["ideas"] for r in runs)
+    return {
+        "concurrency": concurrency,
+        "n_ideas": ideas_per_category * 6,
+        "repeat": repeat,
+        "wall": wall,
+        "wall_all": [r["wall"] for r in runs],
+        "throughput": ideas / wall if wall else 0.0,   # scored ideas per second, end to end
+        "stages": {name: statistics.median(r["stages"].get(name, 0.0) for r in runs)
+                   for name in ("brief", "ideas", "scores")},
+        "latency": {agent: latency_stats(secs) for agent, secs in calls.items()},
+        "failed_ideas": sum(r["failed"] for r in runs),
+        "failed_runs": [r["error"] for r in runs if r["error"]],
+        "retries": sum(r["retries"] for r in runs),
+        "hedges": sum(r["hedges"] for r in runs),
+        "input_tokens": statistics.median(r["input_tokens"] for r in runs),
+        "output_tokens": statistics.median(r["output_tokens"] for r in runs),
+    }
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except Exception:
+        return None
+
+
+def format_results(results: List[dict]) -> str:
+    lines = [f"{'conc':>4} {'ideas':>5} {'wall s':>8} {'ideas/s':>8} {'score p50':>10} {'p95':>8} "
+             f"{'p99':>8} {'p99/p50':>8} {'failed':>6}"]
+    for r in results:
+        lat = r["latency"].get("Score Agent", {})
+        lines.append(f"{r['concurrency']:>4} {r['n_ideas']:>5} {r['wall']:>8.2f} {r['throughput']:>8.1f} "
+                     f"{lat.get('p50', 0):>10.3f} {lat.get('p95', 0):>8.3f} {lat.get('p99', 0):>8.3f} "
+                     f"{lat.get('tail_ratio', 0):>8.1f} {r['failed_ideas'] + len(r['failed_runs']):>6}")
+    return "\n".join(lines)
+
+
+def compare(old: dict, new: dict) -> str:
+    """Throughput and wall-time deltas for every (concurrency, n_ideas) cell present in both files."""
+    before = {(r["concurrency"], r["n_ideas"]): r for r in old["results"]}
+    lines = [f"{old['meta'].get('label')} → {new['meta'].get('label')}",
+             f"{'conc':>4} {'ideas':>5} {'ideas/s':>17} {'Δ':>7} {'wall s':>15} {'Δ':>7}"]
+    for r in new["results"]:
+        o = before.get((r["concurrency"], r["n_ideas"]))
+        if o is None:
+            continue
+        d_tp = r["throughput"] / o["throughput"] - 1 if o["throughput"] else 0.0
+        d_wall = r["wall"] / o["wall"] - 1 if o["wall"] else 0.0
+        lines.append(f"{r['concurrency']:>4} {r['n_ideas']:>5} {o['throughput']:>8.1f}→{r['throughput']:<8.1f} "
+                     f"{d_tp:>+7.0%} {o['wall']:>7.2f}→{r['wall']:<7.2f} {d_wall:>+7.0%}")
+    return "\n".join(lines)
+
+
+async def main(args):
+    with open(args.dossier, "r", encoding="utf-8") as f:
+        dossier_text = f.read()
+
+    base = FakeConfig(
+        latency_median=args.latency, latency_sigma=args.sigma, tail_prob=args.tail_prob,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, time_scale=args.time_scale,
+        seed=args.seed, duplicate_rate=args.duplicate_rate,
+        # deep-research calls dominate; the brief extractor is a mini model
+        agent_latency={"Brand Context Extractor": args.latency / 4},
+    )
+    await run_once(dossier_text, FakeConfig(latency_median=0.0, latency_sigma=0.0), 1)  # warm imports/index
+
+    results = []
+    for n_ideas in args.ideas:
+        for conc in args.concurrency:
+            results.append(await run_scenario(dossier_text, base, conc, max(1, n_ideas // 6), args.repeat, args.hedge))
+            print(f"  concurrency={conc:<3} ideas={n_ideas:<4} wall={results[-1]['wall']:.2f}s", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "label": args.label,
+            "git_rev": _git_rev(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "config": vars(base),
+            "hedge": args.hedge,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(format_results(results))
+    print(f"Saved → {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print(compare(json.load(f), report))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline offline on the fake backend.")
+    parser.add_argument("--dossier", default=os.path.join(ROOT_DIR, DOSSIER_FILE))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--ideas", type=int, nargs="+", default=[18, 54, 180], help="ideas per run (rounded to 6 categories)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=30.0, help="median model call seconds (before --time-scale)")
+    parser.add_argument("--sigma", type=float, default=0.5, help="lognormal latency spread")
+    parser.add_argument("--tail-prob", type=float, default=0.02, help="share of straggler calls (10× latency)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of calls failing with 429")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="share of near-copy ideas (dedup load)")
+    parser.add_argument("--time-scale", type=float, default=0.001, help="wall seconds per simulated second")
+    parser.add_argument("--hedge", action="store_true", help="hedge calls slower than their agent's p95")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default=time.strftime("%Y%m%d-%H%M%S"))
+    parser.add_argument("--out", default=None, help="results file (default: outputs/benchmarks/<label>.json)")
+    parser.add_argument("--compare", metavar="OLD_JSON", help="print deltas against an earlier results file")
+    args = parser.parse_args()
+    os.environ["OMNI_BACKEND"] = "fake"  # agents are built without an API key or client
+    args.out = args.out or os.path.join(RESULTS_DIR, f"{args.label}.json")
+    asyncio.run(main(args))
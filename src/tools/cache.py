@@ -0,0 +1,215 @@
+# src/tools/cache.py
+import hashlib, json, os, time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CACHE_DIR = os.getenv("OMNI_CACHE_DIR", os.path.join(ROOT_DIR, ".cache", "responses"))
+CACHE_MAX_ENTRIES = int(os.getenv("OMNI_CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_BYTES = int(os.getenv("OMNI_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+CACHE_MAX_AGE = float(os.getenv("OMNI_CACHE_MAX_AGE", str(7 * 24 * 3600)))  # seconds
+
+
+def _model_name(agent) -> str:
+    model = getattr(agent, "model", None)
+    if model is None or isinstance(model, str):
+        return model or ""
+    # OpenAIResponsesModel and friends keep the model id on .model
+    return str(getattr(model, "model", type(model).__name__))
+
+
+def _output_schema(output_type) -> Any:
+    if output_type is None:
+        return None
+    if hasattr(output_type, "model_json_schema"):
+        return output_type.model_json_schema()
+    return repr(output_type)
+
+
+def agent_fingerprint(agent) -> dict:
+    """Everything about an agent that changes what the model would return."""
+    instructions = getattr(agent, "instructions", "")
+    if not isinstance(instructions, str):
+        instructions = getattr(instructions, "__qualname__", repr(instructions))
+    return {
+        "name": agent.name,
+        "instructions": instructions,
+        "model": _model_name(agent),
+        "output_type": _output_schema(getattr(agent, "output_type", None)),
+    }
+
+
+def cache_key(agent, prompt: str) -> str:
+    """Content address for one Runner.run call: sha256 over agent fingerprint + prompt."""
+    blob = json.dumps({"agent": agent_fingerprint(agent), "prompt": prompt},
+                      sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def summary(self) -> str:
+        return (f"cache: {self.hits} hits, {self.misses} misses "
+                f"({self.hit_rate:.0%} hit rate), {self.writes} writes, {self.evictions} evictions")
+
+
+class ResponseCache:
+    """
+    On-disk cache of validated agent outputs, one JSON file per key.
+    Entries older than max_age are dropped on read; when the cache grows past
+    max_entries / max_bytes the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_entries: int = CACHE_MAX_ENTRIES,
+                 max_bytes: int = CACHE_MAX_BYTES, max_age: float = CACHE_MAX_AGE):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats = CacheStats()
+        os.makedirs(cache_dir, exist_ok=True)
+        # key -> [size_bytes, created_at, last_used]; file mtime is the write time,
+        # atime is bumped on hits so LRU order survives restarts
+        self._index = {}
+        for fname in os.listdir(cache_dir):
+            if fname.endswith(".json"):
+                st = os.stat(os.path.join(cache_dir, fname))
+                self._index[fname[:-5]] = [st.st_size, st.st_mtime, max(st.st_atime, st.st_mtime)]
+        self.evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def _drop(self, key: str) -> None:
+        self._index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def get(self, key: str, output_type=None) -> Optional[Any]:
+        """Return the cached output for key (re-validated into output_type) or None."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.stats.misses += 1
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.max_age:
+            self._drop(key)
+            self.stats.evictions += 1
+            self.stats.misses += 1
+            return None
+
+        output = entry.get("output")
+        if output_type is not None and hasattr(output_type, "model_validate"):
+            try:
+                output = output_type.model_validate(output)
+            except Exception:
+                # a partial output stored by RepairingRunner (completed downstream) still loads;
+                # anything else means the schema drifted under the same key: treat as stale
+                from src.tools.repair import RepairStats, repair_output
+                try:
+                    output, _ = repair_output(output_type, json.dumps(output), RepairStats())
+                except ValueError:
+                    self._drop(key)
+                    self.stats.misses += 1
+                    return None
+
+        now = time.time()
+        created_at = entry.get("created_at", now)
+        os.utime(path, (now, created_at))
+        self._index[key] = [os.path.getsize(path), created_at, now]
+        self.stats.hits += 1
+        return output
+
+    def put(self, key: str, output: Any, agent_name: str = "") -> None:
+        if hasattr(output, "model_dump"):
+            payload = output.model_dump(mode="json")
+        else:
+            payload = output
+        entry = {
+            "key": key,
+            "agent": agent_name,
+            "output_type": type(output).__name__,
+            "created_at": time.time(),
+            "output": payload,
+        }
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self._index[key] = [os.path.getsize(path), entry["created_at"], entry["created_at"]]
+        self.stats.writes += 1
+        self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then LRU entries until under the size limits."""
+        now = time.time()
+        removed = 0
+        for key, (_, created_at, _) in list(self._index.items()):
+            if now - created_at > self.max_age:
+                self._drop(key)
+                removed += 1
+
+        total_bytes = sum(size for size, _, _ in self._index.values())
+        if len(self._index) > self.max_entries or total_bytes > self.max_bytes:
+            for key, (size, _, _) in sorted(self._index.items(), key=lambda kv: kv[1][2]):
+                if len(self._index) <= self.max_entries and total_bytes <= self.max_bytes:
+                    break
+                self._drop(key)
+                total_bytes -= size
+                removed += 1
+
+        self.stats.evictions += removed
+        return removed
+
+    def clear(self) -> None:
+        for key in list(self._index):
+            self._drop(key)
+
+
+@dataclass
+class CachedRunResult:
+    final_output: Any
+    cached: bool = True
+
+
+class CachedRunner:
+    """Drop-in wrapper for agents.Runner that serves repeated calls from a ResponseCache."""
+
+    def __init__(self, runner, cache: Optional[ResponseCache] = None):
+        self.runner = runner
+        self.cache = cache or ResponseCache()
+
+    async def run(self, agent, prompt: str):
+        key = cache_key(agent, prompt)
+        output_type = getattr(agent, "output_type", None)
+        hit = self.cache.get(key, output_type)
+        if hit is not None:
+            return CachedRunResult(final_output=hit)
+
+        result = await self.runner.run(agent, prompt)
+        self.cache.put(key, result.final_output, agent_name=agent.name)
+        return result
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.cache.stats
+
+
+def cache_enabled() -> bool:
+    return os.getenv("OMNI_CACHE", "on").lower() not in ("0", "off", "false", "no")
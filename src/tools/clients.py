@@ -0,0 +1,197 @@
+# src/tools/clients.py
+import os
+from functools import lru_cache
+from typing import Optional
+
+import httpx
+
+from src.tools.cache import CachedRunner, cache_enabled
+from src.tools.coalesce import SingleFlightRunner
+from src.tools.deadline import DeadlineRunner
+from src.tools.pool import PooledRunner
+from src.tools.ratelimit import RateLimitedRunner, rate_limit_enabled
+from src.tools.repair import RepairingRunner, get_repair_stats
+from src.tools.tokens import AccountingRunner
+from src.tools.tracing import TracingRunner, tracing_enabled
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("OMNI_HTTP_MAX_CONNECTIONS", "32"))
+HTTP_MAX_KEEPALIVE   = int(os.getenv("OMNI_HTTP_MAX_KEEPALIVE", "16"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("OMNI_HTTP_KEEPALIVE_EXPIRY", "90"))  # seconds
+HTTP_TIMEOUT = float(os.getenv("OMNI_HTTP_TIMEOUT", "900"))                   # deep research is slow
+HTTP_CONNECT_TIMEOUT = float(os.getenv("OMNI_HTTP_CONNECT_TIMEOUT", "10"))
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+@lru_cache(maxsize=1)
+def load_env() -> None:
+    """Load .env once per process, on first use rather than on import."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def getenv(name: str, default: Optional[str] = None) -> Optional[str]:
+    load_env()
+    return os.getenv(name, default)
+
+
+@lru_cache(maxsize=1)
+def get_api_key() -> str:
+    api_key = getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found in .env")
+    return api_key
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Process-wide pooled async HTTP client with keep-alive, shared by every agent."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        )
+    return _http_client
+
+
+@lru_cache(maxsize=1)
+def get_openai_client():
+    """
+    Single AsyncOpenAI client on top of the shared HTTP pool. With the rate limiter on,
+    the SDK's own retries are off: RateLimitedRunner retries against the shared budget.
+    """
+    from openai import AsyncOpenAI
+
+    retries = {"max_retries": 0} if rate_limit_enabled() else {}
+    return AsyncOpenAI(api_key=get_api_key(), http_client=get_http_client(), **retries)
+
+
+def backend() -> str:
+    """OMNI_BACKEND: "openai" (default) or "fake" for the offline stand-in in src/tools/fake_backend.py."""
+    return (getenv("OMNI_BACKEND", "openai") or "openai").lower()
+
+
+_client_bound: list = []  # lru_cache'd factories whose results hold a model on the shared client
+
+
+def client_bound(factory):
+    """Register a cached agent factory so aclose_clients() drops its agents along with the client."""
+    _client_bound.append(factory)
+    return factory
+
+
+@lru_cache(maxsize=None)
+def get_responses_model(model: str):
+    """One OpenAIResponsesModel per model id, all on the shared OpenAI client."""
+    if backend() == "fake":
+        return model  # never reaches the API, so no key or client needed
+    from agents.models.openai_responses import OpenAIResponsesModel
+
+    return OpenAIResponsesModel(model=model, openai_client=get_openai_client())
+
+
+def get_runner():
+    """A Runner for the OpenAI Agents SDK; imported here so that importing a processor stays cheap."""
+    if backend() == "fake":
+        from src.tools.fake_backend import FakeRunner
+
+        return FakeRunner.from_env()
+    from agents import Runner
+
+    return Runner()
+
+
+def build_runner(cache: bool = True, accounting: bool = True, pool_size: Optional[int] = None,
+                 rate_limit: bool = True, coalesce: bool = False, hedge: Optional[bool] = None):
+    """
+    The runner stack every entry point uses. Each layer wraps the next and keeps it on .runner:
+    TracingRunner (if tracing is on) → AccountingRunner → SingleFlightRunner (if coalesce) → CachedRunner → DeadlineRunner
+    → RateLimitedRunner → PooledRunner (if pool_size) → RepairingRunner → agents.Runner (or FakeRunner with
+    OMNI_BACKEND=fake). Pool and limiter sit under the cache so cache hits never wait for a slot or spend
+    quota; retries back off outside the pool so they don't hold a slot; the deadline covers queueing and
+    retries, and hedges (hedge, default OMNI_HEDGE) are never answered from the cache; repair is innermost
+    so every layer above it sees the original agents.
+    """
+    runner = RepairingRunner(get_runner())
+    if pool_size:
+        runner = PooledRunner(runner, pool_size)
+    if rate_limit and rate_limit_enabled():
+        runner = RateLimitedRunner(runner)
+    runner = DeadlineRunner(runner) if hedge is None else DeadlineRunner(runner, hedge=hedge)
+    if cache and cache_enabled():
+        runner = CachedRunner(runner)
+    if coalesce:
+        runner = SingleFlightRunner(runner)
+    if accounting:
+        runner = AccountingRunner(runner)
+    if tracing_enabled():
+        runner = TracingRunner(runner)
+    return runner
+
+
+def find_layer(runner, cls):
+    """Walk a runner stack (.runner links) to the first layer that is an instance of cls."""
+    while runner is not None:
+        if isinstance(runner, cls):
+            return runner
+        runner = getattr(runner, "runner", None)
+    return None
+
+
+def base_runner(runner):
+    """Innermost runner of a stack (the one that actually talks to the model)."""
+    while getattr(runner, "runner", None) is not None:
+        runner = runner.runner
+    return runner
+
+
+def runner_report(runner) -> str:
+    """End-of-run summary from whichever layers are present in the stack."""
+    parts = []
+    coalescing = find_layer(runner, SingleFlightRunner)
+    if coalescing is not None:
+        parts.append(coalescing.stats.summary())
+    cached = find_layer(runner, CachedRunner)
+    if cached is not None:
+        parts.append(cached.stats.summary())
+    deadline = find_layer(runner, DeadlineRunner)
+    if deadline is not None and (deadline.stats.timeouts or deadline.stats.expired or deadline.stats.hedges):
+        parts.append(deadline.stats.summary())
+    limited = find_layer(runner, RateLimitedRunner)
+    if limited is not None:
+        parts.append(limited.stats.summary())
+    pooled = find_layer(runner, PooledRunner)
+    if pooled is not None:
+        parts.append(pooled.stats.summary())
+    from src.tools.search_cache import search_report
+
+    searched = search_report()
+    if searched:
+        parts.append(searched)
+    repair = get_repair_stats()
+    if repair.outputs or repair.topups:
+        parts.append(repair.summary())
+    accounting = find_layer(runner, AccountingRunner)
+    if accounting is not None and accounting.ledger.records:
+        parts.append(accounting.ledger.summary())
+    return "\n".join(parts)
+
+
+async def aclose_clients() -> None:
+    """
+    Close the shared pool (call once at process shutdown). Cached agents go too: they
+    hold models bound to the closed client, so the next run builds fresh ones.
+    """
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+    get_openai_client.cache_clear()
+    get_responses_model.cache_clear()
+    for factory in _client_bound:
+        factory.cache_clear()
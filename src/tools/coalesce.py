@@ -0,0 +1,82 @@
+# src/tools/coalesce.py
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from src.tools.cache import cache_key
+from src.tools.deadline import DeadlineExceeded
+
+
+@dataclass
+class CoalesceStats:
+    calls: int = 0
+    leaders: int = 0       # calls that went upstream
+    coalesced: int = 0     # identical calls that waited on a leader instead
+    in_flight: int = 0
+
+    def summary(self) -> str:
+        share = self.coalesced / self.calls if self.calls else 0.0
+        return (f"single-flight: {self.calls} calls, {self.leaders} upstream, "
+                f"{self.coalesced} coalesced ({share:.0%})")
+
+
+@dataclass
+class SharedRunResult:
+    """What a coalesced caller gets: the leader's output, flagged so accounting counts no tokens for it."""
+    final_output: Any
+    cached: bool = True
+    coalesced: bool = True
+
+
+class SingleFlightRunner:
+    """
+    Runner layer that collapses identical in-flight calls (same cache_key(agent, prompt))
+    into one upstream run; followers await the leader's result. Sits above the cache,
+    so two callers missing the cache at the same moment still cost one call. A leader's
+    failure is re-raised to its followers only for that attempt; if the leader was
+    cancelled or ran out of its own deadline, followers try again under theirs.
+    """
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.stats = CoalesceStats()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def run(self, agent, prompt: str):
+        stats = self.stats
+        stats.calls += 1
+        key = cache_key(agent, prompt)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            stats.coalesced += 1
+            try:
+                result = await asyncio.shield(pending)
+            except (asyncio.CancelledError, DeadlineExceeded):
+                if not pending.done():
+                    raise  # the leader is still running, so it was this follower that got cancelled
+                gave_up = pending.cancelled() or isinstance(pending.exception(), DeadlineExceeded)
+                if not gave_up:
+                    raise
+                stats.calls -= 1
+                stats.coalesced -= 1
+                return await self.run(agent, prompt)
+            return SharedRunResult(final_output=result.final_output)
+
+        stats.leaders += 1
+        stats.in_flight += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self.runner.run(agent, prompt)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            stats.in_flight -= 1
+            del self._inflight[key]
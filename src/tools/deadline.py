@@ -0,0 +1,205 @@
+# src/tools/deadline.py
+"""
+Deadlines, per-call timeouts and hedged requests.
+
+A run deadline is an absolute time in a contextvar: deadline_scope(seconds) sets it for
+everything awaited inside (tasks created there inherit it), nested scopes can only
+tighten it. DeadlineRunner bounds every Runner.run by min(per-call timeout, time left
+in the run) and cancels the call when it runs out, raising DeadlineExceeded; callers
+that already keep per-item errors (score_ideas, the cascade) then return partial
+results marked "incomplete" instead of waiting on a straggler.
+
+With hedging on, a call still running after its agent's p95 latency gets one duplicate
+request; whichever finishes first wins and the other is cancelled. That trades roughly
+5% more calls for a much shorter p99. Hedges sit under the cache and above the rate
+limiter, so a duplicate spends RPM/TPM budget like any call; a cancelled loser reports
+no usage, so the ledger only counts the winner.
+
+    OMNI_RUN_DEADLINE=600 OMNI_CALL_TIMEOUT=240 OMNI_HEDGE=on python -m src.pipeline.orchestrator
+"""
+import asyncio, os, time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+import numpy as np
+
+from src.tools.tracing import add_event
+
+RUN_DEADLINE = float(os.getenv("OMNI_RUN_DEADLINE", "0"))      # seconds per run; 0 = none
+CALL_TIMEOUT = float(os.getenv("OMNI_CALL_TIMEOUT", "0"))      # seconds per Runner.run; 0 = none
+HEDGE = os.getenv("OMNI_HEDGE", "off").lower() in ("1", "on", "true", "yes")
+HEDGE_QUANTILE = float(os.getenv("OMNI_HEDGE_QUANTILE", "95"))  # hedge calls slower than this percentile
+HEDGE_MIN_SAMPLES = int(os.getenv("OMNI_HEDGE_MIN_SAMPLES", "20"))  # per agent, before hedging starts
+HEDGE_WINDOW = 200                                               # latest latencies kept per agent
+
+_deadline: ContextVar[Optional[float]] = ContextVar("omni_deadline", default=None)  # time.monotonic()
+CUTOFFS = {"call_timeout": "the per-call timeout", "run_deadline": "the run deadline"}  # DeadlineExceeded.cause
+
+
+class DeadlineExceeded(TimeoutError):
+    """A model call was cut off by its per-call timeout or the run deadline (cause: a CUTOFFS key)."""
+
+    def __init__(self, message: str, cause: str = "run_deadline"):
+        super().__init__(message)
+        self.cause = cause
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """Everything awaited inside must finish within `seconds` (None / <= 0: no new limit)."""
+    if not seconds or seconds <= 0:
+        yield
+        return
+    current = _deadline.get()
+    until = time.monotonic() + seconds
+    token = _deadline.set(until if current is None else min(current, until))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (may be negative), or None if there is none."""
+    until = _deadline.get()
+    return None if until is None else until - time.monotonic()
+
+
+def is_incomplete(exc: BaseException) -> bool:
+    return isinstance(exc, DeadlineExceeded)
+
+
+def incomplete_flags(exc: BaseException) -> dict:
+    """Fields for a result item that a deadline cut off: {"incomplete": True, "cutoff": cause}, else {}."""
+    if not is_incomplete(exc):
+        return {}
+    return {"incomplete": True, "cutoff": exc.cause}
+
+
+def cutoff_note(items: list) -> Optional[str]:
+    """"3 ideas cut off by the per-call timeout, 2 by the run deadline", or None if none were."""
+    counts: Dict[str, int] = defaultdict(int)
+    for item in items:
+        if item.get("incomplete"):
+            counts[item.get("cutoff", "run_deadline")] += 1
+    if not counts:
+        return None
+    parts = [f"{n} by {CUTOFFS.get(cause, cause)}" for cause, n in counts.items()]
+    return f"{sum(counts.values())} ideas cut off: " + ", ".join(parts)
+
+
+@dataclass
+class DeadlineStats:
+    calls: int = 0
+    timeouts: int = 0       # calls cut off (per-call timeout or run deadline)
+    expired: int = 0        # calls refused because the run deadline had already passed
+    hedges: int = 0         # duplicate requests sent
+    hedge_wins: int = 0     # ... that finished before the original
+
+    def summary(self) -> str:
+        return (f"deadline: {self.calls} calls, {self.timeouts} timed out, {self.expired} past deadline, "
+                f"{self.hedges} hedged ({self.hedge_wins} hedge wins)")
+
+
+class DeadlineRunner:
+    """
+    Runner layer that enforces the per-call timeout and the run deadline, and hedges
+    stragglers once an agent has HEDGE_MIN_SAMPLES latencies to take a percentile of.
+    """
+
+    def __init__(self, runner, call_timeout: float = CALL_TIMEOUT, hedge: bool = HEDGE,
+                 quantile: float = HEDGE_QUANTILE, min_samples: int = HEDGE_MIN_SAMPLES):
+        self.runner = runner
+        self.call_timeout = call_timeout if call_timeout > 0 else None
+        self.hedge = hedge
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.stats = DeadlineStats()
+        self._latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=HEDGE_WINDOW))
+
+    def budget(self) -> Optional[float]:
+        left = remaining()
+        if left is None:
+            return self.call_timeout
+        return left if self.call_timeout is None else min(left, self.call_timeout)
+
+    def cause(self) -> str:
+        """The CUTOFFS key for whichever of the run deadline and the per-call timeout binds now."""
+        left = remaining()
+        return "run_deadline" if left is not None and (self.call_timeout is None or left <= self.call_timeout) \
+            else "call_timeout"
+
+    def hedge_after(self, agent_name: str) -> Optional[float]:
+        """Seconds after which a call to this agent gets a hedge, or None (hedging off / too few samples)."""
+        samples = self._latencies[agent_name]
+        if not self.hedge or len(samples) < self.min_samples:
+            return None
+        return float(np.percentile(samples, self.quantile))
+
+    async def run(self, agent, prompt: str):
+        stats = self.stats
+        stats.calls += 1
+        budget = self.budget()
+        cause = self.cause()
+        if budget is not None and budget <= 0:
+            stats.expired += 1
+            raise DeadlineExceeded(f"{agent.name}: run deadline passed before the call started", cause)
+        try:
+            if self.hedge:
+                return await self._hedged(agent, prompt, budget)
+            t = time.perf_counter()
+            result = await asyncio.wait_for(self.runner.run(agent, prompt), budget)
+            self._latencies[agent.name].append(time.perf_counter() - t)
+            return result
+        except asyncio.TimeoutError as e:
+            if isinstance(e, DeadlineExceeded) or budget is None:
+                raise  # not ours: a timeout from below with no budget set here
+            stats.timeouts += 1
+            add_event("deadline", seconds=round(budget, 3))
+            raise DeadlineExceeded(f"{agent.name}: no result within {budget:.1f}s ({CUTOFFS[cause]})", cause) from None
+
+    async def _attempt(self, agent, prompt: str):
+        t = time.perf_counter()
+        result = await self.runner.run(agent, prompt)
+        self._latencies[agent.name].append(time.perf_counter() - t)
+        return result
+
+    async def _hedged(self, agent, prompt: str, budget: Optional[float]):
+        start = time.perf_counter()
+        threshold = self.hedge_after(agent.name)
+        primary = asyncio.ensure_future(self._attempt(agent, prompt))
+        pending = {primary}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                elapsed = time.perf_counter() - start
+                timeout = None if budget is None else budget - elapsed
+                hedge_due = threshold is not None and primary in pending and len(pending) == 1
+                if hedge_due:
+                    timeout = threshold - elapsed if timeout is None else min(timeout, threshold - elapsed)
+                if timeout is not None and timeout <= 0 and not hedge_due:
+                    raise asyncio.TimeoutError
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, timeout) if timeout is not None else None,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+                if done:
+                    continue  # an attempt failed; keep waiting on the other one if there is one
+                if hedge_due and (budget is None or time.perf_counter() - start < budget):
+                    self.stats.hedges += 1
+                    add_event("hedge", after=round(threshold, 3))
+                    pending.add(asyncio.ensure_future(self._attempt(agent, prompt)))
+                    threshold = None
+                    continue
+                raise asyncio.TimeoutError
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,390 @@
+# src/tools/fake_backend.py
+"""
+Deterministic offline stand-in for the Agents SDK Runner. It returns schema-valid
+outputs for the pipeline's output types, with configurable latency, 429/5xx
+injection and token usage, so the pipeline can be run and benchmarked without
+network or API key:
+
+    OMNI_BACKEND=fake python -m src.pipeline.orchestrator
+"""
+import asyncio, hashlib, json, math, os, random, re
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, get_args, get_origin
+
+from src.tools.tokens import estimate_tokens
+
+CATEGORIES = ["Digital", "Influencer", "Events", "Partnerships", "PR", "Community"]
+PLATFORMS = ["TikTok", "Instagram Reels", "YouTube Shorts", "Pinterest", "Snapchat", "email", "on-site", "Discord"]
+MECHANICS = ["challenge", "template", "quiz", "pop-up", "live shopping", "creator series", "drop", "ambassador program"]
+
+
+class FakeAPIError(Exception):
+    """Injected upstream failure. Mirrors openai.APIStatusError's status_code / response.headers shape."""
+
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        headers = {"retry-after": f"{retry_after:.3f}"} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+
+@dataclass
+class FakeConfig:
+    latency_median: float = 0.05                 # seconds, per call, before time_scale
+    latency_sigma: float = 0.5                   # lognormal spread; 0 = fixed latency
+    agent_latency: Dict[str, float] = field(default_factory=dict)  # agent name → median override
+    tail_prob: float = 0.0                       # chance a call is a straggler
+    tail_multiplier: float = 10.0
+    error_rate: float = 0.0                      # 5xx
+    rate_limit_rate: float = 0.0                 # 429 with Retry-After
+    retry_after: float = 1.0
+    time_scale: float = 1.0
+    ideas_per_category: int = 3
+    duplicate_rate: float = 0.0                  # share of ideas that near-copy an earlier one
+    malformed_rate: float = 0.0                  # share of structured outputs with repairable defects
+    seed: int = 0
+
+    @classmethod
+    def from_env(cls) -> "FakeConfig":
+        env = os.getenv
+        return cls(
+            latency_median=float(env("FAKE_LATENCY", "0.05")),
+            latency_sigma=float(env("FAKE_LATENCY_SIGMA", "0.5")),
+            tail_prob=float(env("FAKE_TAIL_PROB", "0")),
+            error_rate=float(env("FAKE_ERROR_RATE", "0")),
+            rate_limit_rate=float(env("FAKE_429_RATE", "0")),
+            retry_after=float(env("FAKE_RETRY_AFTER", "1.0")),
+            time_scale=float(env("FAKE_TIME_SCALE", "1.0")),
+            ideas_per_category=int(env("FAKE_IDEAS_PER_CATEGORY", "3")),
+            duplicate_rate=float(env("FAKE_DUPLICATE_RATE", "0")),
+            malformed_rate=float(env("FAKE_MALFORMED_RATE", "0")),
+            seed=int(env("FAKE_SEED", "0")),
+        )
+
+
+def _rng(*parts: Any) -> random.Random:
+    digest = hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _json_after(label: str, prompt: str) -> Optional[Any]:
+    """Parse the JSON block that follows a 'LABEL (JSON):' header in one of our prompts."""
+    idx = prompt.find(label)
+    if idx < 0:
+        return None
+    start = prompt.find("\n", idx) + 1
+    try:
+        obj, _ = json.JSONDecoder().raw_decode(prompt[start:])
+        return obj
+    except ValueError:
+        return None
+
+
+# --- output generators, keyed by output_type.__name__ ---
+
+FAKE_AUDIENCES = [("Gen Z trend seekers", "18-24", "US, UK"), ("Millennial professionals", "25-40", "US, EU, AU"),
+                  ("New mothers", "25-38", "US"), ("Plus-size shoppers", "20-45", "US, UK, CA")]
+
+
+def _fake_input_payload(output_type, prompt: str, rng: random.Random):
+    goal = re.search(r"CAMPAIGN GOAL:\s*(.+)", prompt)
+    brand = re.search(r"\b(?!DOSSIER\b|TITLE\b|CAMPAIGN\b|GOAL\b)([A-Z][A-Z0-9&]{2,})\b", prompt)
+    return output_type.model_validate({
+        "brand_name": brand.group(1) if brand else "BRAND",
+        "brand_values": rng.sample(["inclusivity", "comfort", "innovation", "quality", "sustainability",
+                                    "confidence", "accessibility"], 4),
+        "audiences": [
+            {
+                "name": name, "age_group": age, "gender_distribution": "mixed", "geography": geo,
+                "income_level": "middle to upper-middle", "psycographics": "trend-aware, value-conscious",
+                "behaviors": ["shops online", "follows creators"], "pain_points": ["fit", "price"],
+                "motivations": ["comfort", "self-expression"], "purchase_drivers": ["reviews", "drops"],
+                "preferred_channels": rng.sample(PLATFORMS[:5], 2),
+            }
+            for name, age, geo in rng.sample(FAKE_AUDIENCES, 2)
+        ],
+        "goal": goal.group(1).strip() if goal else "",
+        "constraints": {"budget": None, "timeline": None},
+    })
+
+
+HOOKS = ["back-to-school", "holiday gifting", "summer travel", "fashion week", "Pride month", "New Year reset",
+         "festival season", "Black Friday", "Valentine's Day", "spring refresh", "award season", "game day"]
+AUDIENCE_ANGLES = ["first-time buyers", "loyal members", "students", "new parents", "athletes", "stylists",
+                   "local artists", "college campuses", "travel creators", "fitness coaches", "size-inclusive advocates"]
+KPIS = ["saves", "shares", "CTR", "sign-ups", "UGC volume", "store visits", "earned media", "add-to-cart rate"]
+
+
+def _fake_idea(category: str, n: int, rng: random.Random, brand: str) -> dict:
+    platform, mechanic = rng.choice(PLATFORMS), rng.choice(MECHANICS)
+    hook, angle, kpi = rng.choice(HOOKS), rng.choice(AUDIENCE_ANGLES), rng.choice(KPIS)
+    return {
+        "category": category,
+        "title": f"{brand} {platform} {mechanic} #{n}",
+        "concept": f"A {hook} {mechanic} on {platform} built with {angle}, inviting them to co-create with {brand}.",
+        "execution_notes": f"Launch on {platform} around {hook}; seed with {angle}; track {kpi}.",
+        "sources": [],
+    }
+
+
+def _near_copy(idea: dict, rng: random.Random) -> dict:
+    """Same concept, lightly reworded: what the dedup stage is meant to catch."""
+    return {**idea, "title": idea["title"] + " (remix)", "concept": idea["concept"].replace("A ", "An updated ", 1)}
+
+
+def _brand_from_prompt(prompt: str) -> str:
+    brief = _json_after("BRAND BRIEF (JSON)", prompt) or _json_after("BRAND_BRIEF (JSON)", prompt) or {}
+    return brief.get("brand_name") or "BRAND"
+
+
+def _fake_ideas_output(output_type, prompt: str, rng: random.Random, cfg: FakeConfig):
+    brand = _brand_from_prompt(prompt)
+    ideas = []
+    for cat in CATEGORIES:
+        for i in range(cfg.ideas_per_category):
+            same_cat = [x for x in ideas if x["category"] == cat]
+            if same_cat and rng.random() < cfg.duplicate_rate:
+                ideas.append(_near_copy(rng.choice(same_cat), rng))
+            else:
+                ideas.append(_fake_idea(cat, i + 1, rng, brand))
+    return output_type.model_validate({
+        "campaign_intent": "Grow awareness with platform-native, on-brand activations.",
+        "brand_name": brand,
+        "ideas": ideas,
+        "total_ideas": len(ideas),
+    })
+
+
+def _fake_scores(rng: random.Random) -> dict:
+    base = rng.uniform(2.0, 4.2)
+    dims = {d: round(min(5.0, max(0.0, rng.gauss(base, 0.45))), 2)
+            for d in ("brand_fit", "audience", "resonance", "virality", "feasibility")}
+    return {**dims, "rationale": "Strong brand fit, but execution detail limits feasibility."}
+
+
+def _fake_category_ideas(output_type, prompt: str, rng: random.Random, cfg: FakeConfig):
+    category = re.search(r"CATEGORY:\s*(\w+)", prompt)
+    count = re.search(r"COUNT:\s*(\d+)", prompt)
+    category = category.group(1) if category else rng.choice(CATEGORIES)
+    brand = _brand_from_prompt(prompt)
+    n = int(count.group(1)) if count else cfg.ideas_per_category
+    return output_type.model_validate({
+        "category": category,
+        "ideas": [_fake_idea(category, 100 * (CATEGORIES.index(category) + 1) + i, rng, brand) for i in range(n)],
+    })
+
+
+def _fake_idea_score(output_type, prompt: str, rng: random.Random, cfg: FakeConfig):
+    # the idea sets the score "centre"; the rest of the prompt adds sampling noise
+    idea = _json_after("IDEA (JSON)", prompt) or {}
+    centre = _fake_scores(_rng(cfg.seed, json.dumps(idea, sort_keys=True)))
+    noisy = {k: (round(min(5.0, max(0.0, v + rng.gauss(0, 0.15))), 2) if isinstance(v, float) else v)
+             for k, v in centre.items()}
+    return output_type(noisy) if output_type is dict else output_type.model_validate(noisy)
+
+
+def _fake_feasibility_score(output_type, prompt: str, rng: random.Random, cfg: FakeConfig):
+    return output_type.model_validate({"feasibility": _fake_idea_score(dict, prompt, rng, cfg)["feasibility"]})
+
+
+def _fake_triage_score(output_type, prompt: str, rng: random.Random, cfg: FakeConfig):
+    # cheap tier: noisier than the deep agent, and it knows it
+    deep = _fake_idea_score(dict, prompt, rng, cfg)
+    noise = rng.uniform(0.1, 0.6)
+    rough = {k: (round(min(5.0, max(0.0, v + rng.gauss(0, noise))), 2) if isinstance(v, float) else v)
+             for k, v in deep.items()}
+    return output_type.model_validate({**rough, "confidence": round(1.0 - noise, 2)})
+
+
+def _fake_idea_score_batch(output_type, prompt: str, rng: random.Random, cfg: FakeConfig):
+    ideas = _json_after("IDEAS (JSON)", prompt) or []
+    items = []
+    for idea in ideas:
+        scored = {k: v for k, v in idea.items() if k != "idea_id"}
+        items.append({"idea_id": idea.get("idea_id"), **_fake_scores(_rng(cfg.seed, json.dumps(scored, sort_keys=True)))})
+    return output_type.model_validate({"scores": items})
+
+
+GENERATORS: Dict[str, Callable] = {
+    "InputPayload": lambda t, p, r, c: _fake_input_payload(t, p, r),
+    "IdeasOutput": _fake_ideas_output,
+    "CategoryIdeas": _fake_category_ideas,
+    "IdeaScore": _fake_idea_score,
+    "IdeaScoreBatch": _fake_idea_score_batch,
+    "TriageScore": _fake_triage_score,
+    "FeasibilityScore": _fake_feasibility_score,
+}
+
+
+def register_generator(type_name: str, fn: Callable) -> None:
+    """fn(output_type, prompt, rng, cfg) -> instance; for output types added later."""
+    GENERATORS[type_name] = fn
+
+
+def _fake_value(annotation, rng: random.Random, metadata=()):
+    """Schema-driven fallback for output types without a dedicated generator."""
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin is not None and str(origin).endswith("Literal"):
+        return rng.choice(args)
+    if origin in (list, List):
+        return [_fake_value(args[0] if args else str, rng) for _ in range(3)]
+    if origin is not None and type(None) in args:  # Optional[X]
+        return _fake_value(next(a for a in args if a is not type(None)), rng)
+    if origin is not None and args and str(origin).endswith("Annotated"):
+        return _fake_value(args[0], rng, args[1:])
+    if hasattr(annotation, "model_fields"):
+        return {name: _fake_value(f.annotation, rng, f.metadata) for name, f in annotation.model_fields.items()}
+    lo = next((getattr(m, "ge", None) for m in metadata if getattr(m, "ge", None) is not None), 0)
+    hi = next((getattr(m, "le", None) for m in metadata if getattr(m, "le", None) is not None), 5)
+    if annotation is float:
+        return round(rng.uniform(lo, hi), 2)
+    if annotation is int:
+        return int(lo)
+    if annotation is bool:
+        return rng.random() < 0.5
+    return f"fake-{rng.randrange(1 << 30):x}"
+
+
+def fake_output(output_type, prompt: str, rng: random.Random, cfg: FakeConfig):
+    if output_type is None:
+        return f"fake response ({estimate_tokens(prompt)} prompt tokens)"
+    gen = GENERATORS.get(getattr(output_type, "__name__", ""))
+    if gen is not None:
+        return gen(output_type, prompt, rng, cfg)
+    return output_type.model_validate(_fake_value(output_type, rng))
+
+
+# --- malformed outputs: the mechanical defects real models produce now and then ---
+
+def _malform(type_name: str, text: str, rng: random.Random) -> str:
+    obj = json.loads(text)
+    defects = ["prose", "fence"]
+    if type_name == "IdeasOutput":
+        defects += ["total", "category", "short"]
+    elif type_name in ("IdeaScore", "TriageScore"):
+        defects += ["out_of_range", "string_score"]
+    defect = rng.choice(defects)
+    if defect == "prose":
+        return "Here is the JSON you asked for:\n" + text + "\nLet me know if you need changes."
+    if defect == "fence":
+        return "```json\n" + json.dumps(obj, indent=2) + "\n```"
+    if defect == "total":
+        obj["total_ideas"] = len(obj["ideas"]) + 2
+    elif defect == "category":
+        rng.choice(obj["ideas"])["category"] = "digital marketing"
+    elif defect == "short":
+        dropped = rng.choice(CATEGORIES)
+        obj["ideas"] = [i for i in obj["ideas"] if i["category"] != dropped]
+    elif defect == "out_of_range":
+        obj["brand_fit"] = 5.001
+    elif defect == "string_score":
+        obj["virality"] = f"{obj['virality']}/5"
+    return json.dumps(obj)
+
+
+def _structured_output(output_type, prompt: str, rng: random.Random, cfg: FakeConfig):
+    """
+    Generate for the agent's output type. Wrapped output schemas (anything with
+    validate_json, e.g. the repair layer's) get the raw text, possibly malformed,
+    exactly as the SDK would hand it over.
+    """
+    schema = output_type if hasattr(output_type, "validate_json") else None
+    target = schema.output_type if schema is not None else output_type
+    output = fake_output(target, prompt, rng, cfg)
+    malformed = hasattr(output, "model_dump_json") and cfg.malformed_rate and rng.random() < cfg.malformed_rate
+    if schema is None and not malformed:
+        return output
+    text = output.model_dump_json()
+    if malformed:
+        text = _malform(target.__name__, text, rng)
+    if schema is None:
+        from agents import AgentOutputSchema
+
+        schema = AgentOutputSchema(target)
+    return schema.validate_json(text)
+
+
+@dataclass
+class FakeRunResult:
+    final_output: Any
+    context_wrapper: Any = None
+    latency: float = 0.0
+
+
+class FakeStreamedResult:
+    """Quacks like RunResultStreaming: raw text deltas spread over the call latency, then final_output."""
+
+    def __init__(self, runner: "FakeRunner", agent, prompt: str, chunk_chars: int = 200):
+        self._runner, self._agent, self._prompt = runner, agent, prompt
+        self._chunk_chars = chunk_chars
+        self.final_output = None
+
+    async def stream_events(self):
+        latency, output, usage = self._runner._plan(self._agent, self._prompt)
+        text = output.model_dump_json() if hasattr(output, "model_dump_json") else str(output)
+        chunks = [text[i:i + self._chunk_chars] for i in range(0, len(text), self._chunk_chars)] or [""]
+        for chunk in chunks:
+            await asyncio.sleep(latency / len(chunks))
+            data = SimpleNamespace(type="response.output_text.delta", delta=chunk)
+            yield SimpleNamespace(type="raw_response_event", data=data)
+        self.final_output = output
+        self.context_wrapper = SimpleNamespace(usage=usage)
+
+
+class FakeRunner:
+    """Drop-in for agents.Runner (run / run_streamed) backed by deterministic fake outputs."""
+
+    def __init__(self, config: Optional[FakeConfig] = None):
+        self.config = config or FakeConfig()
+        self._rng = random.Random(self.config.seed)
+        self._seen_instructions = set()
+        self.calls = 0
+        self.latencies: List[float] = []
+
+    @classmethod
+    def from_env(cls) -> "FakeRunner":
+        return cls(FakeConfig.from_env())
+
+    def _latency(self, agent_name: str) -> float:
+        cfg = self.config
+        median = cfg.agent_latency.get(agent_name, cfg.latency_median)
+        latency = median * (math.exp(self._rng.gauss(0, cfg.latency_sigma)) if cfg.latency_sigma else 1.0)
+        if cfg.tail_prob and self._rng.random() < cfg.tail_prob:
+            latency *= cfg.tail_multiplier
+        return latency * cfg.time_scale
+
+    def _maybe_fail(self) -> None:
+        cfg = self.config
+        roll = self._rng.random()
+        if roll < cfg.rate_limit_rate:
+            raise FakeAPIError(429, "Rate limit reached (fake)", retry_after=cfg.retry_after * cfg.time_scale)
+        if roll < cfg.rate_limit_rate + cfg.error_rate:
+            raise FakeAPIError(500, "Internal server error (fake)")
+
+    def _plan(self, agent, prompt: str):
+        self.calls += 1
+        self._maybe_fail()
+        instructions = agent.instructions if isinstance(agent.instructions, str) else ""
+        output = _structured_output(getattr(agent, "output_type", None), prompt,
+                                    _rng(self.config.seed, agent.name, prompt), self.config)
+        body = output.model_dump_json() if hasattr(output, "model_dump_json") else str(output)
+        # prompt caching: the instructions prefix is cached after the first call per agent
+        cached = estimate_tokens(instructions) if instructions in self._seen_instructions else 0
+        self._seen_instructions.add(instructions)
+        usage = SimpleNamespace(
+            requests=1,
+            input_tokens=estimate_tokens(instructions) + estimate_tokens(prompt),
+            output_tokens=estimate_tokens(body),
+            input_tokens_details=SimpleNamespace(cached_tokens=cached),
+        )
+        return self._latency(agent.name), output, usage
+
+    async def run(self, agent, prompt: str) -> FakeRunResult:
+        latency, output, usage = self._plan(agent, prompt)
+        await asyncio.sleep(latency)
+        self.latencies.append(latency)
+        return FakeRunResult(final_output=output, context_wrapper=SimpleNamespace(usage=usage), latency=latency)
+
+    def run_streamed(self, agent, prompt: str) -> FakeStreamedResult:
+        return FakeStreamedResult(self, agent, prompt)
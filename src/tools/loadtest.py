@@ -0,0 +1,100 @@
+# src/tools/loadtest.py
+"""
+Load test for the pipeline service (src/pipeline/service.py) on the fake backend:
+starts the service in-process (or targets --url), gets one brief and one idea slate,
+then fires --requests /score calls from --clients concurrent clients, drawing ideas
+from a pool of --distinct so identical requests overlap in flight. Reports request
+latency percentiles, throughput and how many upstream calls single-flight saved.
+
+    python -m src.tools.loadtest --requests 400 --clients 32 --distinct 12
+    python -m src.tools.loadtest --no-coalesce        # same load, every request goes upstream
+"""
+import argparse, asyncio, os, random, time
+from collections import Counter
+from typing import Optional
+
+import httpx
+import numpy as np
+
+from src.context.processor import CAMPAIGN_GOAL, DOSSIER_FILE
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+async def run_load(url: str, dossier: str, requests: int, clients: int, distinct: int, seed: int) -> dict:
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=300) as http:
+        brief = (await http.post("/brief", json={"dossier": dossier, "goal": CAMPAIGN_GOAL})).raise_for_status().json()
+        ideas = (await http.post("/ideate", json={"brief": brief})).raise_for_status().json()["ideas"]
+        rng = random.Random(seed)
+        pool = ideas[:max(1, distinct)]
+        queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(requests):
+            queue.put_nowait(rng.choice(pool))
+
+        latencies, statuses = [], Counter()
+
+        async def client():
+            while not queue.empty():
+                idea = queue.get_nowait()
+                t = time.perf_counter()
+                res = await http.post("/score", json={"brief": brief, "idea": idea})
+                latencies.append(time.perf_counter() - t)
+                statuses[res.status_code] += 1
+
+        t = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        wall = time.perf_counter() - t
+        stats = (await http.get("/stats")).json()
+
+    arr = np.asarray(latencies)
+    return {
+        "requests": requests, "wall": wall, "rps": requests / wall if wall else 0.0,
+        "p50": float(np.percentile(arr, 50)), "p95": float(np.percentile(arr, 95)),
+        "p99": float(np.percentile(arr, 99)), "max": float(arr.max()),
+        "statuses": dict(statuses), "single_flight": stats.get("single_flight"), "report": stats.get("report", ""),
+    }
+
+
+async def main(args):
+    server = None
+    url: Optional[str] = args.url
+    if url is None:
+        from src.pipeline.service import PipelineService
+        from src.tools.clients import build_runner
+
+        runner = build_runner(cache=args.cache, accounting=False, rate_limit=False, coalesce=args.coalesce)
+        service = PipelineService(runner, concurrency=args.clients)
+        server = await service.start("127.0.0.1", 0)
+        url = "http://127.0.0.1:%d" % server.sockets[0].getsockname()[1]
+
+    with open(args.dossier, "r", encoding="utf-8") as f:
+        dossier = f.read()
+    try:
+        res = await run_load(url, dossier, args.requests, args.clients, args.distinct, args.seed)
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+    print(f"{res['requests']} /score requests, {args.clients} clients, {args.distinct} distinct ideas → "
+          f"{res['rps']:.1f} req/s over {res['wall']:.2f}s; statuses {res['statuses']}")
+    print(f"latency p50 {res['p50'] * 1000:.0f}ms  p95 {res['p95'] * 1000:.0f}ms  "
+          f"p99 {res['p99'] * 1000:.0f}ms  max {res['max'] * 1000:.0f}ms")
+    if res["report"]:
+        print(res["report"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the pipeline service on the fake backend.")
+    parser.add_argument("--url", default=None, help="a running service (default: start one in-process)")
+    parser.add_argument("--dossier", default=os.path.join(ROOT_DIR, DOSSIER_FILE))
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--clients", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--distinct", type=int, default=12, help="distinct ideas the requests draw from")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on (hits hide coalescing)")
+    parser.add_argument("--no-coalesce", dest="coalesce", action="store_false")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    os.environ.setdefault("OMNI_BACKEND", "fake")  # in-process service: no API key or network
+    asyncio.run(main(args))
@@ -0,0 +1,65 @@
+# src/tools/pool.py
+import asyncio, os, time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from src.tools.tracing import add_event
+
+POOL_SIZE = int(os.getenv("OMNI_POOL_SIZE", "16"))  # model calls in flight, across every job in the process
+
+
+@dataclass
+class PoolStats:
+    calls: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    waiting: int = 0
+    peak_waiting: int = 0
+    wait_seconds: float = 0.0
+
+    def summary(self) -> str:
+        avg_wait = self.wait_seconds / self.calls if self.calls else 0.0
+        return (f"pool: {self.calls} calls, peak {self.peak_in_flight} in flight, "
+                f"peak queue {self.peak_waiting}, avg wait {avg_wait:.2f}s")
+
+
+class PooledRunner:
+    """
+    Runner layer that bounds concurrent model calls with one semaphore. Share a
+    single instance between jobs so the whole process stays within POOL_SIZE calls;
+    waiters are served FIFO, so a job that issues many calls cannot starve the others.
+    """
+
+    def __init__(self, runner, size: int = POOL_SIZE):
+        self.runner = runner
+        self.size = size
+        self._sem = asyncio.Semaphore(size)
+        self.stats = PoolStats()
+
+    async def run(self, agent, prompt: str):
+        async with self.slot():
+            return await self.runner.run(agent, prompt)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the pool's places for the duration of a call."""
+        stats = self.stats
+        stats.waiting += 1
+        stats.peak_waiting = max(stats.peak_waiting, stats.waiting)
+        t = time.perf_counter()
+        try:
+            await self._sem.acquire()
+        finally:
+            stats.waiting -= 1
+        waited = time.perf_counter() - t
+        stats.wait_seconds += waited
+        if waited > 0.001:
+            add_event("pool_wait", seconds=round(waited, 3))
+        stats.calls += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        try:
+            yield
+        finally:
+            stats.in_flight -= 1
+            self._sem.release()
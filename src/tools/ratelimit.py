@@ -0,0 +1,241 @@
+# src/tools/ratelimit.py
+import asyncio, os, random, time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from src.tools.tokens import estimate_tokens, usage_from_result
+from src.tools.tracing import add_event
+
+RPM = float(os.getenv("OMNI_RPM", "500"))                       # requests per minute for the API key
+TPM = float(os.getenv("OMNI_TPM", "200000"))                    # tokens per minute (input + output)
+OUTPUT_TOKEN_ESTIMATE = int(os.getenv("OMNI_OUTPUT_TOKEN_ESTIMATE", "1500"))  # reserved per call until usage is known
+MAX_RETRIES = int(os.getenv("OMNI_MAX_RETRIES", "6"))
+RETRY_BASE = float(os.getenv("OMNI_RETRY_BASE", "1.0"))         # seconds, doubled per attempt
+RETRY_MAX = float(os.getenv("OMNI_RETRY_MAX", "60"))
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+MIN_RATE_FACTOR = 0.1
+
+
+class TokenBucket:
+    """Refills continuously at per_minute / 60 per second up to capacity (one minute's worth)."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, factor: float = 1.0) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.per_minute * factor / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float, factor: float = 1.0) -> float:
+        """Seconds until `amount` is available (0 if it is now)."""
+        self.refill(factor)
+        missing = min(amount, self.capacity) - self.level
+        return 0.0 if missing <= 0 else missing * 60.0 / (self.per_minute * factor)
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass
+class RateLimitStats:
+    calls: int = 0
+    retries: int = 0
+    rate_limited: int = 0            # 429 responses seen
+    transient_errors: int = 0        # retried 5xx / timeouts / connection errors
+    queue_depth: int = 0
+    peak_queue_depth: int = 0
+    throttled_seconds: float = 0.0   # waiting for RPM/TPM budget or a Retry-After cooldown
+    backoff_seconds: float = 0.0     # sleeping between retries
+    rate_factor: float = 1.0
+
+    def summary(self) -> str:
+        return (f"rate limit: {self.calls} calls, {self.retries} retries ({self.rate_limited}×429, "
+                f"{self.transient_errors} transient), peak queue {self.peak_queue_depth}, "
+                f"throttled {self.throttled_seconds:.1f}s, backoff {self.backoff_seconds:.1f}s, "
+                f"rate at {self.rate_factor:.0%}")
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Server-suggested delay from a Retry-After / retry-after-ms header or attribute, if any."""
+    value = getattr(exc, "retry_after", None)
+    if value is not None:
+        return float(value)
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000.0
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # no status: connection resets and timeouts (httpx / openai connection errors)
+    return isinstance(exc, (asyncio.TimeoutError, ConnectionError)) or \
+        type(exc).__name__ in ("APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout",
+                               "RemoteProtocolError")
+
+
+class RateLimiter:
+    """
+    Process-wide RPM/TPM budget. Callers reserve one request plus an estimate of
+    the tokens they will use, waiting FIFO when the buckets are empty. A 429 pauses
+    everyone until its Retry-After and cuts the refill rate; successes win it back.
+    """
+
+    def __init__(self, rpm: float = RPM, tpm: float = TPM):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.cooldown_until = 0.0
+        self.stats = RateLimitStats()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self, tokens: int) -> None:
+        stats = self.stats
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        stats.queue_depth += 1
+        stats.peak_queue_depth = max(stats.peak_queue_depth, stats.queue_depth)
+        t = time.monotonic()
+        try:
+            async with self._lock:  # FIFO: the head of the queue waits, the rest wait behind it
+                while True:
+                    wait = max(0.0, self.cooldown_until - time.monotonic())
+                    factor = stats.rate_factor
+                    if self.requests is not None:
+                        wait = max(wait, self.requests.wait_time(1, factor))
+                    if self.tokens is not None:
+                        wait = max(wait, self.tokens.wait_time(tokens, factor))
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+                if self.requests is not None:
+                    self.requests.take(1)
+                if self.tokens is not None:
+                    self.tokens.take(tokens)
+        finally:
+            stats.queue_depth -= 1
+            stats.throttled_seconds += time.monotonic() - t
+
+    def settle(self, reserved: int, used: int) -> None:
+        """Correct the token bucket once the real usage of a call is known."""
+        if self.tokens is not None and used:
+            if used < reserved:
+                self.tokens.give_back(reserved - used)
+            else:
+                self.tokens.take(used - reserved)
+
+    def refund(self, reserved: int) -> None:
+        """Give back a failed attempt's token reservation (a 429 or an error spends no TPM)."""
+        if self.tokens is not None:
+            self.tokens.give_back(reserved)
+
+    def on_success(self) -> None:
+        self.stats.rate_factor = min(1.0, self.stats.rate_factor + 0.05)
+
+    def on_rate_limited(self, delay: Optional[float]) -> None:
+        self.stats.rate_limited += 1
+        self.stats.rate_factor = max(MIN_RATE_FACTOR, self.stats.rate_factor * 0.7)
+        if delay:
+            self.cooldown_until = max(self.cooldown_until, time.monotonic() + delay)
+
+
+@lru_cache(maxsize=1)
+def get_limiter() -> RateLimiter:
+    """The one limiter per process; every RateLimitedRunner shares it unless given its own."""
+    return RateLimiter()
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE, cap: float = RETRY_MAX) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class RateLimitedRunner:
+    """Runner layer that spends the shared RPM/TPM budget and retries 429s / transient errors."""
+
+    def __init__(self, runner, limiter: Optional[RateLimiter] = None, max_retries: int = MAX_RETRIES,
+                 retry_base: float = RETRY_BASE):
+        self.runner = runner
+        self.limiter = limiter or get_limiter()
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+
+    @staticmethod
+    def estimate(agent, prompt: str) -> int:
+        instructions = agent.instructions if isinstance(agent.instructions, str) else ""
+        return estimate_tokens(instructions) + estimate_tokens(prompt) + OUTPUT_TOKEN_ESTIMATE
+
+    async def run(self, agent, prompt: str):
+        reserved = self.estimate(agent, prompt)
+        attempt = 0
+        while True:
+            await self.reserve(reserved)
+            try:
+                result = await self.runner.run(agent, prompt)
+            except asyncio.CancelledError:  # a deadline, a hedge that lost, or shutdown
+                self.limiter.refund(reserved)
+                raise
+            except Exception as e:
+                await asyncio.sleep(self.backoff(e, attempt, reserved))
+                attempt += 1
+                continue
+            self.settle(reserved, result)
+            return result
+
+    async def reserve(self, reserved: int) -> None:
+        """Wait for one request and `reserved` tokens of budget."""
+        t = time.perf_counter()
+        await self.limiter.acquire(reserved)
+        waited = time.perf_counter() - t
+        if waited > 0.001:
+            add_event("rate_limit_wait", seconds=round(waited, 3))
+        self.limiter.stats.calls += 1
+
+    def backoff(self, exc: Exception, attempt: int, reserved: int = 0) -> float:
+        """
+        Seconds to wait before retrying after `exc` failed attempt `attempt`; re-raises it
+        if it can't be retried. Either way the attempt's `reserved` tokens are given back,
+        since the next attempt reserves its own.
+        """
+        limiter, stats = self.limiter, self.limiter.stats
+        limiter.refund(reserved)
+        if not is_retryable(exc) or attempt >= self.max_retries:
+            raise exc
+        hinted = retry_after(exc)
+        if getattr(exc, "status_code", None) == 429:
+            limiter.on_rate_limited(hinted)
+        else:
+            stats.transient_errors += 1
+        delay = max(hinted or 0.0, backoff_delay(attempt, self.retry_base))
+        stats.retries += 1
+        stats.backoff_seconds += delay
+        add_event("retry", attempt=attempt + 1, status=getattr(exc, "status_code", None), delay=round(delay, 3))
+        return delay
+
+    def settle(self, reserved: int, result) -> None:
+        usage = usage_from_result(result)
+        self.limiter.settle(reserved, usage["input_tokens"] + usage["output_tokens"])
+        self.limiter.on_success()
+
+    @property
+    def stats(self) -> RateLimitStats:
+        return self.limiter.stats
+
+
+def rate_limit_enabled() -> bool:
+    return os.getenv("OMNI_RATE_LIMIT", "on").lower() not in ("0", "off", "false", "no")
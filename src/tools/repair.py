@@ -0,0 +1,329 @@
+# src/tools/repair.py
+"""
+Local validation-and-repair for structured outputs. When the model's JSON fails
+schema validation for mechanical reasons (prose around the JSON, trailing commas,
+a score of 5.001, "digital marketing" for "Digital", total_ideas ≠ len(ideas), ...)
+we fix it here instead of paying for the whole call again. Only what cannot be
+repaired locally (e.g. a category with too few ideas) is re-requested, and only
+that part (see ideator_processor.complete_categories).
+"""
+import json, math, re
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from src.tools.tracing import add_event
+
+CATEGORIES = ("Digital", "Influencer", "Events", "Partnerships", "PR", "Community")
+MIN_PER_CATEGORY = 3
+MIN_IDEAS = 18
+SCORE_FIELDS = ("brand_fit", "audience", "resonance", "virality", "feasibility")
+
+_CATEGORY_ALIASES = {
+    "digital": "Digital", "digital marketing": "Digital", "social": "Digital", "social media": "Digital",
+    "paid social": "Digital", "online": "Digital",
+    "influencer": "Influencer", "influencers": "Influencer", "influencer marketing": "Influencer",
+    "creator": "Influencer", "creators": "Influencer",
+    "event": "Events", "events": "Events", "experiential": "Events", "experiences": "Events",
+    "partnership": "Partnerships", "partnerships": "Partnerships", "collaboration": "Partnerships",
+    "collaborations": "Partnerships", "collabs": "Partnerships", "co-branding": "Partnerships",
+    "pr": "PR", "public relations": "PR", "press": "PR", "earned media": "PR", "media relations": "PR",
+    "community": "Community", "communities": "Community", "community building": "Community",
+}
+
+
+@dataclass
+class RepairStats:
+    outputs: int = 0               # structured outputs seen
+    clean: int = 0                 # valid as returned
+    repaired: int = 0              # invalid, fixed locally: one full re-request avoided each
+    partial: int = 0               # fixed locally except for missing parts
+    failed: int = 0                # not repairable; the caller sees the original error
+    topups: int = 0                # targeted re-requests for the missing parts
+    fixes: Counter = field(default_factory=Counter)
+
+    @property
+    def rerequests_avoided(self) -> int:
+        return self.repaired + self.partial
+
+    def summary(self) -> str:
+        fixes = ", ".join(f"{k} ×{n}" for k, n in self.fixes.most_common()) or "none"
+        return (f"repair: {self.outputs} outputs, {self.clean} clean, {self.repaired} repaired, "
+                f"{self.partial} partial (+{self.topups} top-up calls), {self.failed} failed; "
+                f"{self.rerequests_avoided} full re-requests avoided; fixes: {fixes}")
+
+
+@lru_cache(maxsize=1)
+def get_repair_stats() -> RepairStats:
+    return RepairStats()
+
+
+# --- lenient JSON ---
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.S)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+
+def extract_json(text: str, fixes: Optional[Counter] = None) -> Any:
+    """First JSON object/array in text, tolerating fences, surrounding prose and trailing commas."""
+    fixes = fixes if fixes is not None else Counter()
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+        fixes["code_fence"] += 1
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("no JSON object in model output")
+    start = min(starts)
+    if start > 0 and text[:start].strip():
+        fixes["leading_prose"] += 1
+    decoder = json.JSONDecoder()
+    try:
+        obj, end = decoder.raw_decode(text, start)
+    except json.JSONDecodeError:
+        obj, end = decoder.raw_decode(_TRAILING_COMMA.sub(r"\1", text), start)
+        fixes["trailing_comma"] += 1
+        return obj
+    if text[end:].strip():
+        fixes["trailing_prose"] += 1
+    return obj
+
+
+# --- per-schema repairers: dict in, dict out, counting what they change ---
+
+def _to_float(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        m = re.search(r"-?\d+(?:\.\d+)?", value)
+        if m:
+            return float(m.group(0))
+    return None
+
+
+def normalize_category(value: Any) -> Optional[str]:
+    if not isinstance(value, str):
+        return None
+    if value in CATEGORIES:
+        return value
+    key = re.sub(r"\s+", " ", value.strip().lower().replace("_", " "))
+    return _CATEGORY_ALIASES.get(key) or next((c for c in CATEGORIES if c.lower() == key), None)
+
+
+def repair_score(obj: dict, fixes: Counter, low: float = 0.0, high: float = 5.0) -> dict:
+    out = dict(obj)
+    for name in SCORE_FIELDS:
+        value = _to_float(out.get(name))
+        if value is None or math.isnan(value):
+            continue
+        if not isinstance(out.get(name), (int, float)):
+            fixes["score_coerced"] += 1
+        if value < low or value > high:
+            fixes["score_clamped"] += 1
+            value = min(high, max(low, value))
+        out[name] = round(value, 2)
+    if "confidence" in out:
+        conf = _to_float(out["confidence"])
+        if conf is not None:
+            if 1.0 < conf <= 100.0:  # a percentage
+                conf /= 100.0
+                fixes["confidence_scaled"] += 1
+            out["confidence"] = min(1.0, max(0.0, conf))
+    if isinstance(out.get("rationale"), list):
+        out["rationale"] = " ".join(map(str, out["rationale"]))
+        fixes["rationale_joined"] += 1
+    return out
+
+
+def repair_score_batch(obj: Any, fixes: Counter) -> dict:
+    items = obj.get("scores") if isinstance(obj, dict) else obj
+    if not isinstance(items, list):
+        return obj
+    kept = [repair_score(i, fixes) for i in items if isinstance(i, dict) and i.get("idea_id")]
+    if len(kept) < len(items):
+        fixes["score_without_id_dropped"] += len(items) - len(kept)
+    return {"scores": kept}
+
+
+def _repair_idea(item: Any, fixes: Counter) -> Optional[dict]:
+    if not isinstance(item, dict) or not item.get("title") or not item.get("concept"):
+        fixes["idea_incomplete_dropped"] += 1
+        return None
+    category = normalize_category(item.get("category"))
+    if category is None:
+        fixes["idea_unknown_category_dropped"] += 1
+        return None
+    if category != item.get("category"):
+        fixes["category_normalized"] += 1
+    sources = []
+    for s in item.get("sources") or []:
+        if not isinstance(s, str) or not re.match(r"https?://", s.strip()):
+            fixes["source_dropped"] += 1
+            continue
+        s = s.strip()
+        if s.startswith("http://"):
+            s = "https://" + s[len("http://"):]
+            fixes["source_https"] += 1
+        sources.append(s)
+    notes = item.get("execution_notes")
+    if isinstance(notes, list):
+        notes = "; ".join(map(str, notes))
+        fixes["execution_notes_joined"] += 1
+    return {
+        "category": category,
+        "title": str(item["title"]).strip(),
+        "concept": str(item["concept"]).strip(),
+        "execution_notes": notes or "",
+        "sources": sources,
+    }
+
+
+def repair_ideas(obj: dict, fixes: Counter) -> dict:
+    extra = set(obj) - {"campaign_intent", "brand_name", "ideas", "total_ideas"}
+    if extra:
+        fixes["extra_keys_dropped"] += len(extra)
+    ideas = [i for i in (_repair_idea(item, fixes) for item in obj.get("ideas") or []) if i is not None]
+    if obj.get("total_ideas") != len(ideas):
+        fixes["total_ideas_recomputed"] += 1
+    return {
+        "campaign_intent": obj.get("campaign_intent") or "",
+        "brand_name": obj.get("brand_name") or "",
+        "ideas": ideas,
+        "total_ideas": len(ideas),
+    }
+
+
+def repair_category_ideas(obj: dict, fixes: Counter) -> dict:
+    ideas = [i for i in (_repair_idea({**item, "category": item.get("category") or obj.get("category")}, fixes)
+                         for item in obj.get("ideas") or [] if isinstance(item, dict)) if i is not None]
+    return {"category": normalize_category(obj.get("category")) or obj.get("category"), "ideas": ideas}
+
+
+REPAIRERS: Dict[str, Callable[[Any, Counter], Any]] = {
+    "IdeasOutput": repair_ideas,
+    "CategoryIdeas": repair_category_ideas,
+    "IdeaScore": repair_score,
+    "TriageScore": repair_score,
+    "IdeaScoreBatch": repair_score_batch,
+}
+
+
+def missing_categories(ideas: List[dict], min_per_category: int = MIN_PER_CATEGORY,
+                       min_total: int = MIN_IDEAS) -> Dict[str, int]:
+    """{category: ideas still needed} so the slate has ≥min_per_category each and ≥min_total overall."""
+    counts = Counter(i.get("category") for i in ideas)
+    need = {c: max(0, min_per_category - counts.get(c, 0)) for c in CATEGORIES}
+    short = min_total - len(ideas) - sum(need.values())
+    for c in sorted(CATEGORIES, key=lambda c: counts.get(c, 0)):  # spread any remaining shortfall thinnest-first
+        if short <= 0:
+            break
+        need[c] += 1
+        short -= 1
+    return {c: n for c, n in need.items() if n > 0}
+
+
+def repair_output(output_type, text: str, stats: Optional[RepairStats] = None) -> Tuple[Any, bool]:
+    """
+    (instance, complete) for raw model text, or raises ValueError. complete=False means
+    only count constraints still fail (IdeasOutput short of ideas): the instance is built
+    without the top-level check so the caller can request just the missing categories.
+    """
+    stats = stats or get_repair_stats()
+    repairer = REPAIRERS.get(output_type.__name__)
+    fixes: Counter = Counter()
+    try:
+        obj = extract_json(text, fixes)
+        if repairer is not None:
+            obj = repairer(obj, fixes)
+        instance = output_type.model_validate(obj)
+        complete = True
+    except (ValueError, ValidationError) as e:
+        if output_type.__name__ == "IdeasOutput" and isinstance(e, ValidationError) and \
+                all(err["loc"] == ("total_ideas",) for err in e.errors()):
+            item_type = output_type.model_fields["ideas"].annotation.__args__[0]
+            instance = output_type.model_construct(**{**obj, "ideas": [item_type.model_validate(i) for i in obj["ideas"]]})
+            complete = False
+        else:
+            stats.failed += 1
+            raise ValueError(f"unrepairable {output_type.__name__}: {e}") from e
+    stats.fixes.update(fixes)
+    if complete:
+        stats.repaired += 1
+    else:
+        stats.partial += 1
+    return instance, complete
+
+
+def _output_schema_base():
+    from agents import AgentOutputSchema, AgentOutputSchemaBase
+
+    class RepairingOutputSchema(AgentOutputSchemaBase):
+        """Same JSON schema sent to the model; validation falls back to local repair."""
+
+        def __init__(self, output_type, stats: RepairStats):
+            self.output_type = output_type
+            self.inner = AgentOutputSchema(output_type)
+            self.stats = stats
+
+        def is_plain_text(self) -> bool:
+            return False
+
+        def name(self) -> str:
+            return self.inner.name()
+
+        def json_schema(self) -> Dict[str, Any]:
+            return self.inner.json_schema()
+
+        def is_strict_json_schema(self) -> bool:
+            return self.inner.is_strict_json_schema()
+
+        def validate_json(self, json_str: str) -> Any:
+            from agents.exceptions import ModelBehaviorError
+
+            self.stats.outputs += 1
+            try:  # repairable output types are pydantic models, which the SDK does not wrap
+                value = self.output_type.model_validate_json(json_str)
+            except ValidationError:
+                try:
+                    value, complete = repair_output(self.output_type, json_str, self.stats)
+                    add_event("repaired", complete=complete)
+                    return value
+                except ValueError as e:
+                    raise ModelBehaviorError(f"Invalid JSON when parsing {json_str[:200]!r}: {e}") from e
+            if self.output_type.__name__ == "IdeasOutput" and value.total_ideas != len(value.ideas):
+                self.stats.fixes["total_ideas_recomputed"] += 1
+                value.total_ideas = len(value.ideas)
+            self.stats.clean += 1
+            return value
+
+    return RepairingOutputSchema
+
+
+class RepairingRunner:
+    """
+    Runner layer that swaps a repairing output schema into agents with a pydantic
+    output type (types without a REPAIRERS entry still get the lenient JSON parse).
+    It belongs directly above the base runner, so cache keys and accounting above it
+    still see the original agent.
+    """
+
+    def __init__(self, runner, stats: Optional[RepairStats] = None):
+        self.runner = runner
+        self.stats = stats or get_repair_stats()
+        self._clones: Dict[int, Any] = {}
+
+    def _lenient(self, agent):
+        output_type = getattr(agent, "output_type", None)
+        if not hasattr(output_type, "model_validate_json"):  # plain text or non-model outputs
+            return agent
+        clone = self._clones.get(id(agent))
+        if clone is None:
+            clone = agent.clone(output_type=_output_schema_base()(output_type, self.stats))
+            self._clones[id(agent)] = clone
+        return clone
+
+    async def run(self, agent, prompt: str):
+        return await self.runner.run(self._lenient(agent), prompt)
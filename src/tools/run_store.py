@@ -0,0 +1,271 @@
+# src/tools/run_store.py
+"""
+Embedded SQLite store for pipeline runs: one row per run, its brief, its ideas and
+their scores, so runs accumulate instead of overwriting outputs/*.json, and
+cross-run questions are indexed queries:
+
+    python -m src.tools.run_store top --brand SKIMS --category Influencer --runs 50
+    python -m src.tools.run_store runs --brand SKIMS
+    python -m src.tools.run_store export 42 outputs/run-42     # the classic JSON files
+
+Each stage writes its rows in one transaction. OMNI_STORE sets the database path
+(default outputs/runs.sqlite3); OMNI_STORE=off disables it.
+"""
+import argparse, json, os, sqlite3, time
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from src.score.score_ranking import DIMENSIONS, parse_weights
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+STORE_PATH = os.getenv("OMNI_STORE", os.path.join(ROOT_DIR, "outputs", "runs.sqlite3"))
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    started_at  REAL NOT NULL,
+    finished_at REAL,
+    status      TEXT NOT NULL DEFAULT 'running',   -- running | ok | failed | timeout
+    error       TEXT,
+    brand       TEXT,
+    campaign    TEXT,
+    campaign_intent TEXT,
+    source      TEXT,                              -- entry point: orchestrator, batch, ...
+    out_dir     TEXT
+);
+CREATE TABLE IF NOT EXISTS briefs (
+    run_id      INTEGER PRIMARY KEY REFERENCES runs(id) ON DELETE CASCADE,
+    brand       TEXT NOT NULL,
+    goal        TEXT,
+    brief       TEXT NOT NULL                      -- InputPayload JSON
+);
+CREATE TABLE IF NOT EXISTS ideas (
+    id              INTEGER PRIMARY KEY,
+    run_id          INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    position        INTEGER NOT NULL,
+    category        TEXT NOT NULL,
+    title           TEXT NOT NULL,
+    concept         TEXT,
+    execution_notes TEXT,
+    sources         TEXT                           -- JSON list
+);
+CREATE TABLE IF NOT EXISTS scores (
+    idea_id     INTEGER PRIMARY KEY REFERENCES ideas(id) ON DELETE CASCADE,
+    run_id      INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    tier        TEXT,
+    {", ".join(f"{d} REAL" for d in DIMENSIONS)},
+    rationale   TEXT,
+    error       TEXT,
+    extra       TEXT                               -- JSON: triage scores, escalation, ...
+);
+CREATE INDEX IF NOT EXISTS runs_brand ON runs(brand, started_at);
+CREATE INDEX IF NOT EXISTS runs_campaign ON runs(campaign);
+CREATE INDEX IF NOT EXISTS ideas_run_category ON ideas(run_id, category);
+CREATE INDEX IF NOT EXISTS ideas_category ON ideas(category);
+CREATE INDEX IF NOT EXISTS scores_run ON scores(run_id);
+""" + "".join(f"CREATE INDEX IF NOT EXISTS scores_{d} ON scores({d});\n" for d in DIMENSIONS)
+
+_IDEA_FIELDS = ("category", "title", "concept", "execution_notes", "sources")
+_SCORE_KEYS = {"scores", "tier", "error"}
+
+
+class RunStore:
+    """Thin synchronous wrapper over one sqlite3 connection (local file, millisecond writes)."""
+
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # --- writes ---
+
+    def start_run(self, campaign: str = "", source: str = "", out_dir: Optional[str] = None) -> int:
+        with self.conn:
+            cur = self.conn.execute("INSERT INTO runs (started_at, campaign, source, out_dir) VALUES (?, ?, ?, ?)",
+                                    (time.time(), campaign, source, out_dir))
+        return cur.lastrowid
+
+    def finish_run(self, run_id: int, status: str = "ok", error: Optional[str] = None) -> None:
+        with self.conn:
+            self.conn.execute("UPDATE runs SET finished_at = ?, status = ?, error = ? WHERE id = ?",
+                              (time.time(), status, error, run_id))
+
+    def save_brief(self, run_id: int, brief: dict) -> None:
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO briefs (run_id, brand, goal, brief) VALUES (?, ?, ?, ?)",
+                              (run_id, brief.get("brand_name", ""), brief.get("goal"),
+                               json.dumps(brief, ensure_ascii=False)))
+            self.conn.execute("UPDATE runs SET brand = ? WHERE id = ?", (brief.get("brand_name", ""), run_id))
+
+    def save_ideas(self, run_id: int, ideas: List[dict], campaign_intent: Optional[str] = None) -> None:
+        """All of a run's ideas in one transaction (replacing any saved earlier for this run)."""
+        rows = [(run_id, pos, i.get("category", ""), i.get("title", ""), i.get("concept"),
+                 i.get("execution_notes"), json.dumps(i.get("sources") or [], ensure_ascii=False))
+                for pos, i in enumerate(ideas)]
+        with self.conn:
+            self.conn.execute("DELETE FROM ideas WHERE run_id = ?", (run_id,))
+            if campaign_intent is not None:
+                self.conn.execute("UPDATE runs SET campaign_intent = ? WHERE id = ?", (campaign_intent, run_id))
+            self.conn.executemany(
+                "INSERT INTO ideas (run_id, position, category, title, concept, execution_notes, sources) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def save_scores(self, run_id: int, scored: List[dict]) -> None:
+        """
+        Scored ideas (score_ideas / score_cascade output) in one transaction. Each is
+        matched to the run's idea row by (category, title); ideas the run did not save
+        yet (e.g. scored from a file) are inserted first.
+        """
+        with self.conn:
+            ids = {(r["category"], r["title"]): r["id"] for r in self.conn.execute(
+                "SELECT id, category, title FROM ideas WHERE run_id = ?", (run_id,))}
+            next_pos = self.conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM ideas WHERE run_id = ?",
+                                         (run_id,)).fetchone()[0]
+            rows = []
+            for idea in scored:
+                key = (idea.get("category", ""), idea.get("title", ""))
+                if key not in ids:
+                    cur = self.conn.execute(
+                        "INSERT INTO ideas (run_id, position, category, title, concept, execution_notes, sources) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (run_id, next_pos, *key, idea.get("concept"), idea.get("execution_notes"),
+                         json.dumps(idea.get("sources") or [], ensure_ascii=False)))
+                    ids[key], next_pos = cur.lastrowid, next_pos + 1
+                scores = idea.get("scores") or {}
+                extra = {k: v for k, v in idea.items() if k not in _SCORE_KEYS and k not in _IDEA_FIELDS}
+                score_extra = {k: v for k, v in scores.items() if k not in DIMENSIONS and k != "rationale"}
+                if score_extra:  # e.g. triage confidence
+                    extra["scores"] = score_extra
+                rows.append((ids[key], run_id, idea.get("tier"), *(scores.get(d) for d in DIMENSIONS),
+                             scores.get("rationale"), idea.get("error"),
+                             json.dumps(extra, ensure_ascii=False) if extra else None))
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO scores (idea_id, run_id, tier, {', '.join(DIMENSIONS)}, rationale, error, extra) "
+                f"VALUES ({', '.join('?' * (len(DIMENSIONS) + 6))})", rows)
+
+    # --- queries ---
+
+    def runs(self, brand: Optional[str] = None, limit: int = 20) -> List[dict]:
+        sql = ("SELECT r.*, (SELECT COUNT(*) FROM ideas i WHERE i.run_id = r.id) AS ideas FROM runs r"
+               + (" WHERE r.brand = ?" if brand else "") + " ORDER BY r.started_at DESC LIMIT ?")
+        return [dict(r) for r in self.conn.execute(sql, ((brand,) if brand else ()) + (limit,))]
+
+    def top_ideas(self, brand: str, category: Optional[str] = None, last_runs: int = 50, k: int = 10,
+                  weights: Optional[Dict[str, float]] = None) -> List[dict]:
+        """Best scored ideas for a brand over its last `last_runs` finished runs, by weighted composite."""
+        weights = weights or parse_weights()
+        total = sum(weights.values())
+        if total <= 0:
+            raise ValueError("weights must sum to a positive number")
+        composite = " + ".join(f"{weights[d] / total!r} * s.{d}" for d in DIMENSIONS)
+        sql = f"""
+            WITH recent AS (
+                SELECT id FROM runs WHERE brand = ? AND status = 'ok' ORDER BY started_at DESC LIMIT ?
+            )
+            SELECT i.run_id, i.category, i.title, i.concept, s.tier,
+                   {", ".join(f"s.{d}" for d in DIMENSIONS)}, ({composite}) AS composite
+            FROM ideas i JOIN scores s ON s.idea_id = i.id
+            WHERE i.run_id IN recent {"AND i.category = ?" if category else ""}
+              AND {" AND ".join(f"s.{d} IS NOT NULL" for d in DIMENSIONS)}
+            ORDER BY composite DESC LIMIT ?
+        """
+        params = (brand, last_runs) + ((category,) if category else ()) + (k,)
+        return [dict(r) for r in self.conn.execute(sql, params)]
+
+    # --- JSON export (same files and shapes the processors write) ---
+
+    def export_run(self, run_id: int, out_dir: str) -> List[str]:
+        os.makedirs(out_dir, exist_ok=True)
+        written = []
+
+        def _write(name: str, obj) -> None:
+            path = os.path.join(out_dir, name)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(obj, f, indent=2, ensure_ascii=False)
+            written.append(path)
+
+        brief = self.conn.execute("SELECT brief FROM briefs WHERE run_id = ?", (run_id,)).fetchone()
+        if brief is not None:
+            _write("brand_brief.json", json.loads(brief["brief"]))
+        brand = json.loads(brief["brief"]).get("brand_name", "") if brief is not None else ""
+        intent = self.conn.execute("SELECT campaign_intent FROM runs WHERE id = ?", (run_id,)).fetchone()
+        intent = (intent["campaign_intent"] if intent is not None else None) or ""
+        rows = self.conn.execute(
+            f"SELECT i.*, s.idea_id AS scored, s.tier, {', '.join(f's.{d}' for d in DIMENSIONS)}, "
+            "s.rationale, s.error, s.extra FROM ideas i LEFT JOIN scores s ON s.idea_id = i.id "
+            "WHERE i.run_id = ? ORDER BY i.position", (run_id,)).fetchall()
+        ideas = [{"category": r["category"], "title": r["title"], "concept": r["concept"],
+                  "execution_notes": r["execution_notes"], "sources": json.loads(r["sources"] or "[]")} for r in rows]
+        if ideas:
+            _write("ideas.json", {"campaign_intent": intent, "brand_name": brand, "ideas": ideas, "total_ideas": len(ideas)})
+        scored = []
+        for idea, r in zip(ideas, rows):
+            if r["scored"] is None:
+                continue
+            extra = json.loads(r["extra"] or "{}")
+            score_extra = extra.pop("scores", {})
+            scores = None if r["error"] else {**{d: r[d] for d in DIMENSIONS}, "rationale": r["rationale"], **score_extra}
+            out = {**idea, "scores": scores}  # same key order as the scorers write
+            if r["tier"]:
+                out["tier"] = r["tier"]
+            if r["error"]:
+                out["error"] = r["error"]
+            scored.append({**out, **extra})
+        if scored:
+            _write("scored_ideas.json", {"campaign_intent": intent, "brand_name": brand, "total_ideas": len(scored),
+                                         "complete": not any(i.get("incomplete") for i in scored),
+                                         "ideas": scored})
+        return written
+
+
+def store_enabled() -> bool:
+    return STORE_PATH.lower() not in ("", "0", "off", "false", "no")
+
+
+@lru_cache(maxsize=1)
+def get_run_store() -> RunStore:
+    return RunStore()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Query and export the run store.")
+    parser.add_argument("--db", default=STORE_PATH)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    top = sub.add_parser("top", help="best ideas for a brand across recent runs")
+    top.add_argument("--brand", required=True)
+    top.add_argument("--category", default=None)
+    top.add_argument("--runs", type=int, default=50, help="most recent finished runs to consider")
+    top.add_argument("-k", type=int, default=10)
+    top.add_argument("--weights", default=None, help="e.g. brand_fit=2,virality=1.5 (default: SCORE_WEIGHTS or equal)")
+    runs = sub.add_parser("runs", help="list recent runs")
+    runs.add_argument("--brand", default=None)
+    runs.add_argument("--limit", type=int, default=20)
+    export = sub.add_parser("export", help="write a run's brand_brief/ideas/scored_ideas JSON")
+    export.add_argument("run_id", type=int)
+    export.add_argument("out_dir")
+    args = parser.parse_args(argv)
+
+    store = RunStore(args.db)
+    if args.cmd == "top":
+        for r in store.top_ideas(args.brand, args.category, args.runs, args.k, parse_weights(args.weights)):
+            print(f"{r['composite']:>5.2f}  run {r['run_id']:<5} {r['category']:<13} {r['title']}")
+    elif args.cmd == "runs":
+        for r in store.runs(args.brand, args.limit):
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(r["started_at"]))
+            print(f"{r['id']:>5}  {started}  {r['status']:<8} {r['ideas']:>4} ideas  {r['brand'] or '?'}: {r['campaign']}")
+    else:
+        for path in store.export_run(args.run_id, args.out_dir):
+            print(f"Saved → {path}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
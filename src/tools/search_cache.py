@@ -0,0 +1,262 @@
+# src/tools/search_cache.py
+"""
+Cached web search for agents. The hosted WebSearchTool runs inside OpenAI's
+Responses API, so its queries never pass through this process and cannot be cached.
+With OMNI_SEARCH=cached, agents get a local `web_search` function tool instead:
+queries go through one process-wide SearchCache (normalized keys, per-domain TTLs,
+persisted in .cache/search/) in front of a pluggable SearchBackend. Set
+OMNI_SEARCH_BACKEND to "module:Class" to plug in a real search provider, or
+OMNI_SEARCH_CORPUS to a JSONL corpus for the offline BM25 stand-in. With neither,
+cached mode refuses to start, except on the fake backend (OMNI_BACKEND=fake), where
+the stand-in searches the example dossier.
+
+Note: function tools need a model that supports them; o3-deep-research only
+accepts hosted search, so use OPENAI_MODEL_IDEATION=o3 / gpt-4.1 etc. with cached mode.
+"""
+import asyncio, importlib, json, os, time, unicodedata
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Protocol
+from urllib.parse import urlparse
+
+from src.tools.tracing import set_attributes, span
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SEARCH_CACHE_FILE = os.getenv("OMNI_SEARCH_CACHE", os.path.join(ROOT_DIR, ".cache", "search", "results.json"))
+SEARCH_MAX_RESULTS = int(os.getenv("OMNI_SEARCH_MAX_RESULTS", "5"))
+DEFAULT_TTL = float(os.getenv("OMNI_SEARCH_TTL", str(3 * 24 * 3600)))  # seconds
+EMPTY_TTL = 3600.0  # "no results" is re-asked sooner
+
+DAY = 24 * 3600
+# Domain suffix → TTL. Regulations and help centers change slowly; news goes stale fast.
+DOMAIN_TTLS: Dict[str, float] = {
+    "ftc.gov": 30 * DAY,
+    "asa.org.uk": 30 * DAY,
+    "europa.eu": 30 * DAY,
+    "support.tiktok.com": 7 * DAY,
+    "tiktok.com": 3 * DAY,
+    "help.instagram.com": 7 * DAY,
+    "facebook.com": 3 * DAY,
+    "support.google.com": 7 * DAY,
+    "wikipedia.org": 14 * DAY,
+    "reuters.com": 1 * DAY,
+    "bloomberg.com": 1 * DAY,
+    "businessoffashion.com": 1 * DAY,
+    "wwd.com": 1 * DAY,
+}
+
+
+def _env_ttls() -> Dict[str, float]:
+    """OMNI_SEARCH_TTLS="ftc.gov=2592000,wwd.com=43200" overrides/extends DOMAIN_TTLS."""
+    out = dict(DOMAIN_TTLS)
+    for part in filter(None, os.getenv("OMNI_SEARCH_TTLS", "").split(",")):
+        domain, _, seconds = part.partition("=")
+        out[domain.strip().lower()] = float(seconds)
+    return out
+
+
+def domain_ttl(url: str, ttls: Dict[str, float], default: float = DEFAULT_TTL) -> float:
+    host = (urlparse(url).hostname or "").lower()
+    best, best_len = default, -1
+    for suffix, ttl in ttls.items():
+        if (host == suffix or host.endswith("." + suffix)) and len(suffix) > best_len:
+            best, best_len = ttl, len(suffix)
+    return best
+
+
+def normalize_query(query: str) -> str:
+    """Case/accents/punctuation/stopwords/word order don't change what a search returns."""
+    from src.context.dossier_index import tokenize
+
+    text = unicodedata.normalize("NFKD", query).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sorted(set(tokenize(text))))
+
+
+@dataclass
+class SearchResult:
+    title: str
+    url: str
+    snippet: str
+
+
+class SearchBackend(Protocol):
+    async def search(self, query: str, max_results: int) -> List[SearchResult]: ...
+
+
+class LocalSearchBackend:
+    """
+    Offline stand-in: BM25 over a JSONL corpus of {url, title, text} (OMNI_SEARCH_CORPUS),
+    or over the example dossier's passages when no corpus is configured (only chosen
+    for the fake backend: those passages are one brand's, whatever the query).
+    """
+
+    def __init__(self, corpus_path: Optional[str] = None):
+        from src.context.dossier_index import DossierIndex, chunk_dossier
+
+        corpus_path = corpus_path or os.getenv("OMNI_SEARCH_CORPUS")
+        if corpus_path:
+            with open(corpus_path, "r", encoding="utf-8") as f:
+                self.docs = [json.loads(line) for line in f if line.strip()]
+        else:
+            with open(os.path.join(ROOT_DIR, "examples", "skims.txt"), "r", encoding="utf-8") as f:
+                self.docs = [{"url": f"file://examples/skims.txt#p{i}", "title": chunk[:60], "text": chunk}
+                             for i, chunk in enumerate(chunk_dossier(f.read()))]
+        self.index = DossierIndex.from_chunks([f"{d.get('title', '')} {d['text']}" for d in self.docs])
+        self.calls = 0
+
+    async def search(self, query: str, max_results: int) -> List[SearchResult]:
+        self.calls += 1
+        scores = self.index.scores(query)
+        top = [int(i) for i in scores.argsort(kind="stable")[::-1][:max_results] if scores[i] > 0]
+        return [SearchResult(self.docs[i].get("title", ""), self.docs[i]["url"], self.docs[i]["text"][:400])
+                for i in top]
+
+
+@dataclass
+class SearchStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    coalesced: int = 0   # identical queries that waited on an in-flight search
+
+    def summary(self) -> str:
+        total = self.hits + self.misses + self.coalesced
+        rate = (self.hits + self.coalesced) / total if total else 0.0
+        return (f"search cache: {self.hits} hits, {self.coalesced} coalesced, {self.misses} misses "
+                f"({self.expired} expired) → {rate:.0%} hit rate")
+
+
+class SearchCache:
+    """Normalized-query → results store with per-entry expiry, persisted as one JSON file."""
+
+    def __init__(self, backend: SearchBackend, path: str = SEARCH_CACHE_FILE,
+                 ttls: Optional[Dict[str, float]] = None):
+        self.backend = backend
+        self.path = path
+        self.ttls = ttls if ttls is not None else _env_ttls()
+        self.stats = SearchStats()
+        self._entries: Dict[str, dict] = self._load()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        now = time.time()
+        live = {k: v for k, v in self._entries.items() if v["expires_at"] > now}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(live, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def ttl_for(self, results: List[SearchResult]) -> float:
+        """An entry lives as long as its most volatile source."""
+        if not results:
+            return EMPTY_TTL
+        return min(domain_ttl(r.url, self.ttls) for r in results)
+
+    async def search(self, query: str, max_results: int = SEARCH_MAX_RESULTS) -> List[SearchResult]:
+        key = f"{max_results}:{normalize_query(query) or query.strip().lower()}"
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry["expires_at"] > time.time():
+                self.stats.hits += 1
+                set_attributes(search_cache="hit")
+                return [SearchResult(**r) for r in entry["results"]]
+            self.stats.expired += 1
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats.coalesced += 1
+            set_attributes(search_cache="coalesced")
+            return await asyncio.shield(pending)
+
+        self.stats.misses += 1
+        set_attributes(search_cache="miss")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            results = await self.backend.search(query, max_results)
+            now = time.time()
+            self._entries[key] = {
+                "query": query, "fetched_at": now, "expires_at": now + self.ttl_for(results),
+                "results": [asdict(r) for r in results],
+            }
+            self._save()
+            future.set_result(results)
+            return results
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+
+def _load_backend() -> SearchBackend:
+    from src.tools.clients import backend, getenv
+
+    spec = getenv("OMNI_SEARCH_BACKEND", "") or ""
+    if spec in ("", "local"):
+        if not getenv("OMNI_SEARCH_CORPUS") and backend() != "fake":
+            raise RuntimeError("OMNI_SEARCH=cached needs a search backend: set OMNI_SEARCH_BACKEND=module:Class "
+                               "or OMNI_SEARCH_CORPUS=<corpus.jsonl> (the example dossier is for OMNI_BACKEND=fake)")
+        return LocalSearchBackend(getenv("OMNI_SEARCH_CORPUS"))
+    module, _, cls = spec.partition(":")
+    return getattr(importlib.import_module(module), cls)()
+
+
+@lru_cache(maxsize=1)
+def get_search_cache() -> SearchCache:
+    """The process-wide cache every agent's web_search tool goes through."""
+    return SearchCache(_load_backend())
+
+
+def format_results(results: List[SearchResult]) -> str:
+    if not results:
+        return "No results."
+    return "\n\n".join(f"[{i}] {r.title}\n{r.url}\n{r.snippet}" for i, r in enumerate(results, 1))
+
+
+@lru_cache(maxsize=1)
+def cached_search_tool():
+    from agents import function_tool
+
+    @function_tool(name_override="web_search")
+    async def web_search(query: str) -> str:
+        """Search the web. Returns numbered results with title, URL and snippet; cite URLs you rely on.
+
+        Args:
+            query: What to search for, e.g. "FTC influencer disclosure rules".
+        """
+        with span("web_search", "tool", query=query):
+            return format_results(await get_search_cache().search(query))
+
+    return web_search
+
+
+def search_tools() -> list:
+    """Tools for agents that research: hosted WebSearchTool (default) or the cached local tool."""
+    from src.tools.clients import getenv
+
+    if (getenv("OMNI_SEARCH", "hosted") or "hosted").lower() == "cached":
+        get_search_cache()  # fail at agent build time, not on the first tool call, if no backend is set
+        return [cached_search_tool()]
+    from agents import WebSearchTool
+
+    return [WebSearchTool()]
+
+
+def search_report() -> Optional[str]:
+    """Hit-rate summary if the cache was used in this process."""
+    if get_search_cache.cache_info().currsize == 0:
+        return None
+    return get_search_cache().stats.summary()
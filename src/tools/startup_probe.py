@@ -0,0 +1,85 @@
+# src/tools/startup_probe.py
+"""
+Measure what process startup costs: import time of the pipeline modules (each in
+a fresh interpreter), lazy agent construction, and optionally request latency
+with a fresh client per request vs the shared keep-alive pool.
+
+    python -m src.tools.startup_probe
+    python -m src.tools.startup_probe --url https://api.openai.com/v1/models -n 10
+"""
+import argparse, asyncio, os, statistics, subprocess, sys, time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+MODULES = [
+    "src.context.schemas",
+    "src.ideas.ideator_schemas",
+    "src.score.score_schemas",
+    "src.context.context_extractor",
+    "src.ideas.ideator_extractor",
+    "src.score.score_extractor",
+    "src.score.score_processor",
+]
+
+_IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {mod}; print(time.perf_counter() - t)"
+_AGENTS_SNIPPET = (
+    "import time\n"
+    "from src.context.context_extractor import get_context_extractor\n"
+    "from src.ideas.ideator_extractor import get_ideator_agent\n"
+    "from src.score.score_extractor import get_score_agent\n"
+    "t = time.perf_counter()\n"
+    "get_context_extractor(); get_ideator_agent(); get_score_agent()\n"
+    "print(time.perf_counter() - t)\n"
+)
+
+
+def _time_snippet(code: str, repeat: int) -> float:
+    env = {**os.environ, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-probe")}
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, env=env,
+                             capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+async def _probe_connections(url: str, n: int) -> tuple:
+    import httpx
+    from src.tools.clients import aclose_clients, get_http_client
+
+    cold = []
+    for _ in range(n):
+        t = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            await client.get(url)
+        cold.append(time.perf_counter() - t)
+
+    pooled = []
+    client = get_http_client()
+    for _ in range(n):
+        t = time.perf_counter()
+        await client.get(url)
+        pooled.append(time.perf_counter() - t)
+    await aclose_clients()
+    return statistics.median(cold), statistics.median(pooled)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import, agent-construction and connection costs.")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--url", help="endpoint for the cold-vs-pooled connection probe")
+    parser.add_argument("-n", type=int, default=10, help="requests per connection mode")
+    args = parser.parse_args()
+
+    print(f"{'import (median of %d)' % args.repeat:<40} {'ms':>8}")
+    for mod in MODULES:
+        print(f"{mod:<40} {_time_snippet(_IMPORT_SNIPPET.format(mod=mod), args.repeat) * 1000:>8.1f}")
+    print(f"{'build all three agents':<40} {_time_snippet(_AGENTS_SNIPPET, args.repeat) * 1000:>8.1f}")
+
+    if args.url:
+        cold, pooled = asyncio.run(_probe_connections(args.url, args.n))
+        print(f"GET {args.url}: fresh client {cold * 1000:.1f} ms, shared pool {pooled * 1000:.1f} ms (median)")
+
+
+if __name__ == "__main__":
+    main()
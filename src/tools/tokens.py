@@ -0,0 +1,192 @@
+# src/tools/tokens.py
+import json, time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+try:  # optional: exact counts when tiktoken is installed, heuristic otherwise
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _ENCODING = None
+
+_stage: ContextVar[str] = ContextVar("omni_stage", default="")
+_segments: ContextVar[Dict[str, str]] = ContextVar("omni_prompt_segments", default={})
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count via tiktoken if available, else ~4 chars/token (fine for English JSON)."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+@contextmanager
+def stage_scope(name: str):
+    """Attribute every Runner.run inside this block (and tasks spawned from it) to a stage."""
+    token = _stage.set(name)
+    try:
+        yield
+    finally:
+        _stage.reset(token)
+
+
+def current_stage() -> str:
+    return _stage.get()
+
+
+@contextmanager
+def prompt_segments(**segments: str):
+    """Label the parts of the next prompt(s) (brief, idea, dossier, ...) for the ledger."""
+    token = _segments.set({**_segments.get(), **segments})
+    try:
+        yield
+    finally:
+        _segments.reset(token)
+
+
+def compact_json_tokens(text: str) -> Optional[int]:
+    """Tokens the same JSON would cost without indentation; None if text is not JSON."""
+    try:
+        obj = json.loads(text)
+    except (TypeError, ValueError):
+        return None
+    return estimate_tokens(json.dumps(obj, ensure_ascii=False, separators=(",", ":")))
+
+
+def usage_from_result(result) -> Dict[str, int]:
+    """input/output/cached token counts reported by the SDK for one run (zeros if absent)."""
+    usage = getattr(getattr(result, "context_wrapper", None), "usage", None) or getattr(result, "usage", None)
+    if usage is None:
+        return {"input_tokens": 0, "output_tokens": 0, "cached_tokens": 0}
+    details = getattr(usage, "input_tokens_details", None)
+    return {
+        "input_tokens": int(getattr(usage, "input_tokens", 0) or 0),
+        "output_tokens": int(getattr(usage, "output_tokens", 0) or 0),
+        "cached_tokens": int(getattr(details, "cached_tokens", 0) or 0),
+    }
+
+
+@dataclass
+class CallRecord:
+    stage: str
+    agent: str
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    cache_hit: bool
+    seconds: float
+    segments: Dict[str, int] = field(default_factory=dict)          # estimated tokens per prompt segment
+    compact_segments: Dict[str, int] = field(default_factory=dict)  # same segments serialized compactly
+
+
+class TokenLedger:
+    """Collects one CallRecord per Runner.run and renders per-stage / per-agent / per-segment totals."""
+
+    def __init__(self):
+        self.records: List[CallRecord] = []
+
+    def record(self, rec: CallRecord) -> None:
+        self.records.append(rec)
+
+    def totals(self, by: str) -> Dict[str, Dict[str, float]]:
+        out: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for r in self.records:
+            row = out[getattr(r, by) or "-"]
+            row["calls"] += 1
+            row["cache_hits"] += int(r.cache_hit)
+            row["input_tokens"] += r.input_tokens
+            row["output_tokens"] += r.output_tokens
+            row["cached_tokens"] += r.cached_tokens
+            row["seconds"] += r.seconds
+        return out
+
+    def segment_totals(self) -> Dict[str, Dict[str, int]]:
+        out: Dict[str, Dict[str, int]] = defaultdict(lambda: {"pretty": 0, "compact": 0, "calls": 0})
+        for r in self.records:
+            if r.cache_hit:
+                continue
+            for name, n in r.segments.items():
+                row = out[name]
+                row["pretty"] += n
+                row["compact"] += r.compact_segments.get(name, n)
+                row["calls"] += 1
+        return out
+
+    def summary(self) -> str:
+        lines = []
+        for by in ("stage", "agent"):
+            lines.append(f"{by:<22} {'calls':>5} {'hits':>5} {'input':>9} {'cached':>9} {'output':>9} {'secs':>8}")
+            for name, row in sorted(self.totals(by).items()):
+                lines.append(f"{name[:22]:<22} {int(row['calls']):>5} {int(row['cache_hits']):>5} "
+                             f"{int(row['input_tokens']):>9,} {int(row['cached_tokens']):>9,} "
+                             f"{int(row['output_tokens']):>9,} {row['seconds']:>8.1f}")
+            lines.append("")
+
+        segs = self.segment_totals()
+        if segs:
+            lines.append(f"{'prompt segment (est.)':<22} {'calls':>5} {'as sent':>9} {'compact':>9} {'saving':>7}")
+            for name, row in sorted(segs.items(), key=lambda kv: -kv[1]["pretty"]):
+                saving = 1 - row["compact"] / row["pretty"] if row["pretty"] else 0.0
+                lines.append(f"{name[:22]:<22} {row['calls']:>5} {row['pretty']:>9,} {row['compact']:>9,} {saving:>7.0%}")
+        return "\n".join(lines).rstrip()
+
+    def to_json(self) -> dict:
+        return {
+            "by_stage": self.totals("stage"),
+            "by_agent": self.totals("agent"),
+            "segments": self.segment_totals(),
+            "calls": [asdict(r) for r in self.records],
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, indent=2)
+
+
+class AccountingRunner:
+    """Runner wrapper that records token usage for every call into a TokenLedger."""
+
+    def __init__(self, runner, ledger: Optional[TokenLedger] = None):
+        self.runner = runner
+        self.ledger = ledger or TokenLedger()
+
+    async def run(self, agent, prompt: str):
+        prompt_parts = dict(_segments.get())
+        t = time.perf_counter()
+        result = await self.runner.run(agent, prompt)
+        self.record(agent, prompt, result, time.perf_counter() - t, prompt_parts)
+        return result
+
+    def record(self, agent, prompt: str, result, seconds: float, prompt_parts: Optional[Dict[str, str]] = None) -> None:
+        """One ledger row for a finished call (run() and streamed calls that bypass it)."""
+        if prompt_parts is None:
+            prompt_parts = dict(_segments.get())
+        prompt_parts = {name: text for name, text in prompt_parts.items() if text}  # e.g. evidence off
+        usage = usage_from_result(result)
+        segments = {name: estimate_tokens(text) for name, text in prompt_parts.items()}
+        # whatever the labelled parts don't cover: headers, glue text, unlabelled prompts
+        segments["other"] = max(0, estimate_tokens(prompt) - sum(segments.values()))
+        instructions = agent.instructions if isinstance(agent.instructions, str) else ""
+        segments["instructions"] = estimate_tokens(instructions)
+
+        segment_text = {"instructions": instructions, **prompt_parts}
+        compact = {}
+        for name, text in segment_text.items():
+            n = compact_json_tokens(text)
+            if n is not None:
+                compact[name] = n
+
+        self.ledger.record(CallRecord(
+            stage=_stage.get(),
+            agent=agent.name,
+            cache_hit=bool(getattr(result, "cached", False)),
+            seconds=seconds,
+            segments=segments,
+            compact_segments=compact,
+            **usage,
+        ))
@@ -0,0 +1,292 @@
+# src/tools/tracing.py
+"""
+Structured run tracing: nested spans for run → stage → agent call → tool call (plus
+file I/O), exported as one JSON object per line. Off unless OMNI_TRACE is set (or an
+entry point's --trace flag is passed); when off, span() hands back a shared no-op
+context manager and the TracingRunner layer is not in the stack at all.
+
+    OMNI_BACKEND=fake python -m src.pipeline.orchestrator --trace
+    python -m src.tools.tracing                       # newest trace in outputs/traces/
+    python -m src.tools.tracing outputs/traces/run.jsonl --top 15
+
+Hosted tools (WebSearchTool) run inside the Responses API and cannot be traced; the
+cached web_search tool (OMNI_SEARCH=cached) shows up as "tool" spans.
+"""
+import argparse, asyncio, glob, itertools, json, os, time, uuid
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.tools.tokens import current_stage, usage_from_result
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+TRACE_DIR = os.path.join(ROOT_DIR, "outputs", "traces")
+TRACE = os.getenv("OMNI_TRACE", "")  # "" = off; "1"/"on" = outputs/traces/<timestamp>.jsonl; else a file path
+FLUSH_EVERY = 256                    # spans buffered before appending to the file
+
+_current: ContextVar[Optional["Span"]] = ContextVar("omni_span", default=None)
+_NOOP = nullcontext()
+_tracer: Optional["Tracer"] = None
+
+
+@dataclass
+class Span:
+    name: str
+    kind: str                      # run | stage | agent | tool | io | internal
+    span_id: int
+    parent_id: Optional[int]
+    start: float                   # seconds since the trace started
+    end: Optional[float] = None
+    status: str = "ok"             # ok | error | cancelled
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_json(self) -> dict:
+        out = {"id": self.span_id, "parent": self.parent_id, "name": self.name, "kind": self.kind,
+               "start": round(self.start, 6), "end": round(self.end, 6), "status": self.status}
+        if self.attrs:
+            out["attrs"] = self.attrs
+        if self.events:
+            out["events"] = self.events
+        return out
+
+
+class Tracer:
+    """Creates spans, tracks the current one per task (contextvar) and appends finished spans to a JSONL file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.trace_id = uuid.uuid4().hex[:16]
+        self._t0 = time.perf_counter()
+        self._ids = itertools.count(1)
+        self._buffer: List[dict] = []
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"trace_id": self.trace_id, "started_at": time.time()}) + "\n")
+
+    def now(self) -> float:
+        return time.perf_counter() - self._t0
+
+    @contextmanager
+    def span(self, name: str, kind: str, attrs: Dict[str, Any]):
+        parent = _current.get()
+        s = Span(name, kind, next(self._ids), parent.span_id if parent else None, self.now(), attrs=attrs)
+        token = _current.set(s)
+        try:
+            yield s
+        except BaseException as e:
+            s.status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+            s.attrs["error"] = f"{type(e).__name__}: {e}"[:300]
+            raise
+        finally:
+            s.end = self.now()
+            _current.reset(token)
+            self._buffer.append(s.to_json())
+            if len(self._buffer) >= FLUSH_EVERY:
+                self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(s, ensure_ascii=False) + "\n" for s in self._buffer))
+        self._buffer.clear()
+
+
+def resolve_trace_path(setting: Optional[str]) -> Optional[str]:
+    """OMNI_TRACE / --trace value → trace file path, or None for off."""
+    if not setting or setting.lower() in ("0", "off", "false", "no"):
+        return None
+    if setting.lower() in ("1", "on", "true", "yes"):
+        return os.path.join(TRACE_DIR, time.strftime("%Y%m%d-%H%M%S") + ".jsonl")
+    return setting
+
+
+def start_tracing(setting: Optional[str] = None) -> Optional[Tracer]:
+    """Turn tracing on for this process (a path or "on", else OMNI_TRACE); None if neither asks for it."""
+    global _tracer
+    path = resolve_trace_path(setting or TRACE)
+    if path is None:
+        return None
+    _tracer = Tracer(path)
+    return _tracer
+
+
+def stop_tracing() -> Optional[str]:
+    """Flush and turn tracing off; returns the trace file path if tracing was on."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is None:
+        return None
+    tracer.flush()
+    return tracer.path
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, kind: str = "internal", **attrs):
+    """Context manager yielding the new Span, or None (no-op) when tracing is off."""
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP
+    return tracer.span(name, kind, attrs)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def add_event(name: str, **attrs) -> None:
+    """Attach a timestamped event (retry, pool wait, repair, ...) to the current span, if any."""
+    s = _current.get()
+    if s is not None and _tracer is not None:
+        s.events.append({"name": name, "at": round(_tracer.now(), 6), **attrs})
+
+
+def set_attributes(**attrs) -> None:
+    s = _current.get()
+    if s is not None:
+        s.attrs.update(attrs)
+
+
+class TracingRunner:
+    """Outermost runner layer: one "agent" span per Runner.run with tokens, cache hit and stage."""
+
+    def __init__(self, runner):
+        self.runner = runner
+
+    async def run(self, agent, prompt: str):
+        from src.tools.cache import _model_name
+
+        with span(agent.name, "agent", agent=agent.name, stage=current_stage(), model=_model_name(agent)) as s:
+            result = await self.runner.run(agent, prompt)
+            if s is not None:
+                s.attrs.update(usage_from_result(result), cache_hit=bool(getattr(result, "cached", False)))
+            return result
+
+
+# --- report ---
+
+def load_trace(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [rec for rec in map(json.loads, filter(str.strip, f)) if "id" in rec]
+
+
+def critical_path(spans: List[dict]) -> List[dict]:
+    """
+    Spans that determined the end-to-end time, depth-first. From each span, walk back
+    from its end through the children that finished last without overlapping the one
+    chosen after them; each entry gets "depth" and "self" (time not covered by children
+    on the path).
+    """
+    kids: Dict[Optional[int], List[dict]] = defaultdict(list)
+    for s in spans:
+        kids[s["parent"]].append(s)
+    roots = kids.get(None, [])
+    if not roots:
+        return []
+    path: List[dict] = []
+
+    def visit(s: dict, depth: int) -> None:
+        cursor, chain = s["end"], []
+        for k in sorted(kids.get(s["id"], []), key=lambda k: k["end"], reverse=True):
+            if k["end"] <= cursor + 1e-9:
+                chain.append(k)
+                cursor = k["start"]
+        covered = sum(k["end"] - k["start"] for k in chain)
+        path.append({**s, "depth": depth, "self": max(0.0, s["end"] - s["start"] - covered)})
+        for k in reversed(chain):
+            visit(k, depth + 1)
+
+    visit(max(roots, key=lambda r: r["end"] - r["start"]), 0)
+    return path
+
+
+def call_stats(spans: List[dict]) -> Dict[str, Dict[str, float]]:
+    """Per agent / tool: calls, cache hits, retries, and p50/p95/p99/max latency of non-cached calls."""
+    groups: Dict[str, List[dict]] = defaultdict(list)
+    for s in spans:
+        if s["kind"] in ("agent", "tool"):
+            groups[f"{s['kind']}:{s['name']}"].append(s)
+    out = {}
+    for name, group in groups.items():
+        attrs = [s.get("attrs", {}) for s in group]
+        live = np.array([s["end"] - s["start"] for s, a in zip(group, attrs) if not a.get("cache_hit")])
+        p50, p95, p99 = np.percentile(live, [50, 95, 99]) if len(live) else (np.nan,) * 3
+        out[name] = {
+            "calls": len(group),
+            "cache_hits": sum(1 for a in attrs if a.get("cache_hit")),
+            "errors": sum(1 for s in group if s["status"] != "ok"),
+            "retries": sum(1 for s in group for e in s.get("events", []) if e["name"] == "retry"),
+            "input_tokens": sum(a.get("input_tokens", 0) for a in attrs),
+            "output_tokens": sum(a.get("output_tokens", 0) for a in attrs),
+            "p50": float(p50), "p95": float(p95), "p99": float(p99),
+            "max": float(live.max()) if len(live) else float("nan"),
+        }
+    return out
+
+
+def format_report(spans: List[dict], top: int = 10) -> str:
+    lines = []
+    path = critical_path(spans)
+    if path:
+        total = path[0]["end"] - path[0]["start"]
+        lines.append(f"critical path ({total:.2f}s):")
+        lines.append(f"  {'span':<44} {'kind':<6} {'start':>8} {'secs':>8} {'self':>7}")
+        for s in path:
+            label = ("  " * s["depth"] + s["name"])[:44]
+            lines.append(f"  {label:<44} {s['kind']:<6} {s['start']:>8.2f} {s['end'] - s['start']:>8.2f} {s['self']:>7.2f}")
+        by_kind: Dict[str, float] = defaultdict(float)
+        for s in path:
+            by_kind[s["kind"]] += s["self"]
+        shares = ", ".join(f"{k} {v / total:.0%}" for k, v in sorted(by_kind.items(), key=lambda kv: -kv[1]) if total)
+        lines.append(f"  time on path by kind: {shares}")
+        lines.append("")
+
+    calls = sorted((s for s in spans if s["kind"] in ("agent", "tool", "io")),
+                   key=lambda s: s["end"] - s["start"], reverse=True)[:top]
+    if calls:
+        lines.append(f"slowest {len(calls)} calls:")
+        for s in calls:
+            a = s.get("attrs", {})
+            note = " (cache hit)" if a.get("cache_hit") else ""
+            retries = sum(1 for e in s.get("events", []) if e["name"] == "retry")
+            note += f" ({retries} retries)" if retries else ""
+            note += f" [{s['status']}]" if s["status"] != "ok" else ""
+            lines.append(f"  {s['end'] - s['start']:>8.2f}s  {s['kind']:<5} {s['name'][:40]:<40} "
+                         f"{a.get('stage', '') or '':<8}{note}")
+        lines.append("")
+
+    stats = call_stats(spans)
+    if stats:
+        lines.append(f"{'agent / tool':<32} {'calls':>5} {'hits':>5} {'retry':>5} {'err':>4} "
+                     f"{'p50':>7} {'p95':>7} {'p99':>7} {'max':>7}")
+        for name, row in sorted(stats.items()):
+            lines.append(f"{name[:32]:<32} {row['calls']:>5} {row['cache_hits']:>5} {row['retries']:>5} "
+                         f"{row['errors']:>4} {row['p50']:>7.2f} {row['p95']:>7.2f} {row['p99']:>7.2f} {row['max']:>7.2f}")
+    return "\n".join(lines).rstrip()
+
+
+def main(path: Optional[str], top: int):
+    if path is None:
+        found = sorted(glob.glob(os.path.join(TRACE_DIR, "*.jsonl")), key=os.path.getmtime)
+        if not found:
+            raise SystemExit(f"No traces in {TRACE_DIR}; run with --trace or OMNI_TRACE=1 first")
+        path = found[-1]
+    spans = load_trace(path)
+    print(f"{path}: {len(spans)} spans")
+    print(format_report(spans, top))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Critical path, slowest calls and latency percentiles of a trace.")
+    parser.add_argument("trace", nargs="?", default=None, help="trace JSONL (default: newest in outputs/traces/)")
+    parser.add_argument("--top", type=int, default=10, help="slowest calls to list")
+    args = parser.parse_args()
+    main(args.trace, args.top)